@@ -0,0 +1,34 @@
+"""Cost of analyse_text by input size
+
+analyse_text only looks at a bounded prefix, so scoring a 50 MB file
+should take as long as scoring a 5 KB one.
+
+Usage: python benchmarks/bench_analyse.py
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+from corpus import generate
+
+
+def sized(text, size):
+    return (text * (size // len(text) + 1))[:size]
+
+
+def main(argv):
+    text = generate(100)
+    for size in (5000, 500000, 50000000):
+        sample = sized(text, size)
+        func = lambda: OpenSSLConfLexer.analyse_text(sample)
+        seconds = min(timeit.repeat(func, number=100, repeat=3)) / 100
+        print('%9d bytes  score %.2f  %8.1f us' % (size, func(), seconds * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,44 @@
+"""Per-item overhead of lex_many against a naive pygments.lex loop
+
+The naive loop looks the lexer up by name and creates it for every
+text, as in ``pygments.lex(text, get_lexer_by_name('openssl'))``.
+
+Usage: python benchmarks/bench_batch.py [count] [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+import pygments
+from pygments.lexers import get_lexer_by_name
+
+from pygments_openssl.batch import BatchLexer
+
+from corpus import generate
+
+
+def naive(texts):
+    return [list(pygments.lex(text, get_lexer_by_name('openssl'))) for text in texts]
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 500
+    sections = int(argv[2]) if len(argv) > 2 else 2
+    texts = [generate(sections, seed) for seed in range(count)]
+    print('%d texts of %d bytes on average' % (count, sum(map(len, texts)) // count))
+
+    seconds = min(timeit.repeat(lambda: naive(texts), number=1, repeat=3))
+    print('%-22s %8.1f ms  %6.1f us/text' % ('naive loop', seconds * 1000, seconds / count * 1e6))
+    for pool in (None, 'thread', 'process'):
+        with BatchLexer(pool=pool) as batch:
+            batch.lex_many(texts[:2])
+            seconds = min(timeit.repeat(lambda: batch.lex_many(texts), number=1, repeat=3))
+        print('%-22s %8.1f ms  %6.1f us/text' % (
+            'lex_many pool=%s' % pool, seconds * 1000, seconds / count * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,54 @@
+"""Highlighting a tree of files with pygmentize vs pygments-openssl
+
+Runs one pygmentize process per file, then the pygments-openssl command
+on the whole tree, cold and with all files unchanged.
+
+Usage: python benchmarks/bench_cli.py [files] [sections]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import generate
+
+
+def main(argv):
+    files = int(argv[1]) if len(argv) > 1 else 200
+    sections = int(argv[2]) if len(argv) > 2 else 20
+    tempdir = tempfile.mkdtemp()
+    try:
+        srcdir = os.path.join(tempdir, 'src')
+        for i in range(files):
+            path = os.path.join(srcdir, 'd%d' % (i % 10), 'f%d.cnf' % i)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(generate(sections, seed=i))
+        print('%d files, %d sections each' % (files, sections))
+
+        start = time.time()
+        for dirpath, dirnames, filenames in os.walk(srcdir):
+            for name in filenames:
+                subprocess.check_call([
+                    sys.executable, '-m', 'pygments', '-l', 'openssl', '-f', 'html',
+                    '-o', os.path.join(tempdir, name + '.html'), os.path.join(dirpath, name)])
+        print('%-28s %8.2f s' % ('pygmentize per file', time.time() - start))
+
+        command = [sys.executable, '-m', 'pygments_openssl.cli', '-o', os.path.join(tempdir, 'out'), srcdir]
+        for name in ('pygments-openssl cold', 'pygments-openssl unchanged'):
+            start = time.time()
+            output = subprocess.check_output(command).decode('utf-8').strip()
+            print('%-28s %8.2f s   %s' % (name, time.time() - start, output))
+    finally:
+        shutil.rmtree(tempdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,52 @@
+"""Peak memory of a TokenArray against a list of (tokentype, value) tuples
+
+Peak memory is measured with tracemalloc and excludes the text itself.
+
+Usage: python benchmarks/bench_columnar.py [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+import tracemalloc
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+from corpus import generate
+
+
+def peak(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 2000
+    text = generate(sections)
+    lexer = OpenSSLConfLexer()
+    list(lexer.get_tokens_unprocessed(text[:1000]))
+
+    tuples, tokens = peak(lambda: list(lexer.get_tokens_unprocessed(text)))
+    columns, array = peak(lambda: lexer.get_token_array(text))
+    assert list(array.get_tokens_unprocessed()) == tokens
+    print('%d bytes, %d tokens' % (len(text), len(tokens)))
+    print('%-14s %10.1f KiB  %5.1f bytes/token' % ('tuples', tuples / 1024.0, tuples / float(len(tokens))))
+    print('%-14s %10.1f KiB  %5.1f bytes/token' % ('TokenArray', columns / 1024.0, columns / float(len(tokens))))
+    print('reduction      %10.1fx' % (tuples / float(columns)))
+
+    del tokens
+    for name, func in [
+            ('tuples', lambda: list(lexer.get_tokens_unprocessed(text))),
+            ('TokenArray', lambda: lexer.get_token_array(text))]:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print('%-14s %10.1f ms' % (name, seconds * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
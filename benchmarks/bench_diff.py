@@ -0,0 +1,48 @@
+"""Cost of a token-annotated diff of two versions of a large file
+
+Compares lexing both versions from scratch with TokenDiff, with three
+lines of context and with all lines. The new version changes a line near
+the top, in the middle, and near the end of the file.
+
+Usage: python benchmarks/bench_diff.py [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments_openssl.diff import TokenDiff
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+from corpus import generate
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 20000
+    old = generate(sections)
+    lines = old.splitlines(True)
+    lexer = OpenSSLConfLexer()
+    print('%d bytes, %d lines' % (len(old), len(lines)))
+
+    def measure(name, func, repeat=3):
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        print('%-36s %10.2f ms' % (name, seconds * 1000))
+
+    def two_lexes():
+        list(lexer.get_tokens_unprocessed(old))
+        list(lexer.get_tokens_unprocessed(new))
+
+    for name, line in [('top', 10), ('middle', len(lines) // 2), ('end', len(lines) - 10)]:
+        changed = lines[:line] + ['changed = "value"\n', 'added = 1\n'] + lines[line+1:]
+        new = ''.join(changed)
+        measure('%s, lex both versions' % name, two_lexes)
+        measure('%s, TokenDiff with context' % name,
+                lambda: list(TokenDiff(old, new, lexer).iter_lines()))
+        measure('%s, TokenDiff all lines' % name,
+                lambda: list(TokenDiff(old, new, lexer, None).iter_lines()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
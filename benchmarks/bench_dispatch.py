@@ -0,0 +1,50 @@
+"""Lexing speed with and without first-character dispatch
+
+The undispatched variant tries every rule of the current state at every
+position, as the lexer did before. Rule attempts per token are counted
+with the ``profile`` option.
+
+Usage: python benchmarks/bench_dispatch.py [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+from corpus import generate
+
+
+class UndispatchedLexer(OpenSSLConfLexer):
+
+    def build_dispatch(self):
+        self._dispatch = (self._tokens, dict(
+            (state, [rules] * 128) for state, rules in self._tokens.items()))
+        return self._dispatch
+
+
+def attempts(cls, text):
+    lexer = cls(profile=True)
+    tokens = list(lexer.scan(text, 0, ['root']))
+    summary = lexer.profile.summary()
+    return sum(s['attempts'] for s in summary.values()) / float(len(tokens))
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 500
+    text = generate(sections)
+    print('%d bytes' % len(text))
+    for cls in (UndispatchedLexer, OpenSSLConfLexer):
+        lexer = cls()
+        lex = lambda: list(lexer.get_tokens_unprocessed(text))
+        lex()
+        seconds = min(timeit.repeat(lex, number=1, repeat=5))
+        print('%-20s %8.1f ms  %6.2f MB/s  %5.2f attempts/token' % (
+            cls.__name__, seconds * 1000, len(text) / seconds / 1e6, attempts(cls, text)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
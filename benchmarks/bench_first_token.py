@@ -0,0 +1,58 @@
+"""First-token latency in forked workers, with and without precompiling
+
+A master process imports the lexer and forks workers, which each create
+a lexer and lex a small text. With precompiling the master compiles the
+tokendefs before forking. Requires os.fork.
+
+Usage: python benchmarks/bench_first_token.py [workers]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+TEXT = '[ req ]\ndistinguished_name = req_dn # Comment\nsubjectAltName = email:copy\n'
+
+
+def worker(pipe):
+    from pygments_openssl.lexer import OpenSSLConfLexer
+    t = time.time()
+    next(iter(OpenSSLConfLexer().get_tokens(TEXT)))
+    os.write(pipe, ('%f\n' % ((time.time() - t) * 1000)).encode('ascii'))
+    os._exit(0)
+
+
+def run(workers, precompile):
+    # Fork a master so each run starts with an uncompiled lexer class
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        if precompile:
+            OpenSSLConfLexer.precompile()
+        for i in range(workers):
+            child = os.fork()
+            if child == 0:
+                worker(w)
+            os.waitpid(child, 0)
+        os._exit(0)
+    os.close(w)
+    os.waitpid(pid, 0)
+    with os.fdopen(r) as f:
+        return sorted(float(line) for line in f)
+
+
+def main(argv):
+    workers = int(argv[1]) if len(argv) > 1 else 20
+    for precompile in (False, True):
+        results = run(workers, precompile)
+        print('precompile=%-5s  median %7.3f ms  max %7.3f ms' % (
+            precompile, results[len(results) // 2], results[-1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
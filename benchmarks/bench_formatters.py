@@ -0,0 +1,46 @@
+"""Formatting speed of the OpenSSL formatters against Pygments' own
+
+The tokens are lexed once; only formatting is timed.
+
+Usage: python benchmarks/bench_formatters.py [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments.formatters import HtmlFormatter, TerminalFormatter
+
+from pygments_openssl.formatters import OpenSSLHtmlFormatter, OpenSSLTerminalFormatter
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+from corpus import generate
+
+
+class Discard(object):
+
+    def write(self, data):
+        pass
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 1000
+    tokens = list(OpenSSLConfLexer().get_tokens(generate(sections)))
+    for base, fast, options in [
+            (HtmlFormatter, OpenSSLHtmlFormatter, {}),
+            (HtmlFormatter, OpenSSLHtmlFormatter, {'noclasses': True}),
+            (TerminalFormatter, OpenSSLTerminalFormatter, {})]:
+        times = []
+        for cls in (base, fast):
+            formatter = cls(**options)
+            func = lambda: formatter.format(tokens, Discard())
+            times.append(min(timeit.repeat(func, number=1, repeat=5)))
+        print('%-18s %-20s %7.1f ms  %-25s %7.1f ms  %.2fx' % (
+            base.__name__, options or '', times[0] * 1000, fast.__name__, times[1] * 1000,
+            times[0] / times[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
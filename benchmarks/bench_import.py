@@ -0,0 +1,50 @@
+"""Cold-import latency of the lexer plugin entry point
+
+Each sample imports the module in a fresh interpreter. Pygments loads
+our module whenever it enumerates plugins, so this cost is paid by
+every pygmentize invocation.
+
+Usage: python benchmarks/bench_import.py [runs] [max-ms]
+"""
+
+from __future__ import print_function
+
+import subprocess
+import sys
+
+CODE = """\
+import time
+t = time.time()
+import %s
+print((time.time() - t) * 1000)
+"""
+
+
+def sample(module, runs):
+    results = []
+    for i in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', CODE % module])
+        results.append(float(out.decode('ascii')))
+    results.sort()
+    return results[len(results) // 2]
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 15
+    limit = float(argv[2]) if len(argv) > 2 else None
+
+    base = sample('pygments.lexer', runs)
+    ours = sample('pygments_openssl.lexer', runs)
+
+    print('pygments.lexer          %8.2f ms' % base)
+    print('pygments_openssl.lexer  %8.2f ms' % ours)
+    print('overhead                %8.2f ms' % (ours - base))
+
+    if limit is not None and ours - base > limit:
+        print('FAIL: overhead exceeds %.2f ms' % limit)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
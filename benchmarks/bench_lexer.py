@@ -0,0 +1,163 @@
+"""Lexer throughput and memory on the synthetic corpus
+
+Measures tokens/sec, bytes/sec and peak memory of the lexers, with and
+without formatting, and writes the results as JSON. Given a previous
+result file, reports and fails on regressions beyond the tolerance.
+
+Usage: python benchmarks/bench_lexer.py [-o results.json] [-c baseline.json]
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import pygments
+from pygments.formatters import HtmlFormatter, NullFormatter
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.scanner import OpenSSLConfScannerLexer
+
+from corpus import generate
+
+LEXERS = {
+    'regex': OpenSSLConfLexer,
+    'scanner': OpenSSLConfScannerLexer,
+}
+
+FORMATTERS = {
+    'none': None,
+    'null': NullFormatter,
+    'html': HtmlFormatter,
+}
+
+
+class Discard(object):
+
+    def write(self, data):
+        pass
+
+
+def workload(lexer, formatter, text):
+    if formatter is None:
+        count = 0
+        for token in lexer.get_tokens(text):
+            count += 1
+        return count
+    formatter.format(lexer.get_tokens(text), Discard())
+
+
+def peak_memory(func):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, lexers, formatters, repeat):
+    results = []
+    for sections in sizes:
+        text = generate(sections)
+        for lexer_name in lexers:
+            lexer = LEXERS[lexer_name]()
+            tokens = workload(lexer, None, text)
+            for formatter_name in formatters:
+                factory = FORMATTERS[formatter_name]
+                formatter = factory() if factory else None
+                func = lambda: workload(lexer, formatter, text)
+                seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+                size = len(text.encode('utf-8'))
+                result = {
+                    'lexer': lexer_name,
+                    'formatter': formatter_name,
+                    'sections': sections,
+                    'bytes': size,
+                    'tokens': tokens,
+                    'seconds': seconds,
+                    'tokens_per_sec': tokens / seconds,
+                    'bytes_per_sec': size / seconds,
+                    'peak_memory': peak_memory(func),
+                }
+                results.append(result)
+                print('%-8s %-5s %6d sections %9d bytes  %10.0f tokens/s  %6.2f MB/s  peak %s' % (
+                    lexer_name, formatter_name, sections, result['bytes'],
+                    result['tokens_per_sec'], result['bytes_per_sec'] / 1e6,
+                    '%.2f MB' % (result['peak_memory'] / 1e6) if result['peak_memory'] else '-'))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Return a list of regressions against the baseline results
+    def key(r):
+        return r['lexer'], r['formatter'], r['sections']
+
+    old = dict((key(r), r) for r in baseline['results'])
+    regressions = []
+    for r in results:
+        b = old.get(key(r))
+        if b is None:
+            continue
+        if r['bytes_per_sec'] < b['bytes_per_sec'] * (1 - tolerance):
+            regressions.append('%s: %.2f MB/s, was %.2f MB/s' % (
+                key(r), r['bytes_per_sec'] / 1e6, b['bytes_per_sec'] / 1e6))
+        if r['peak_memory'] and b['peak_memory'] and \
+                r['peak_memory'] > b['peak_memory'] * (1 + tolerance):
+            regressions.append('%s: peak %.2f MB, was %.2f MB' % (
+                key(r), r['peak_memory'] / 1e6, b['peak_memory'] / 1e6))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-s', '--sizes', default='10,100,1000',
+                        help='comma-separated numbers of sections')
+    parser.add_argument('-l', '--lexers', default='regex,scanner')
+    parser.add_argument('-f', '--formatters', default='none,html')
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', help='write results to this JSON file')
+    parser.add_argument('-c', '--compare', help='compare with this JSON file')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='allowed relative slowdown or memory growth')
+    args = parser.parse_args(argv[1:])
+
+    results = run([int(s) for s in args.sizes.split(',')], args.lexers.split(','),
+                  args.formatters.split(','), args.repeat)
+    data = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'pygments': pygments.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, indent=2, sort_keys=True) + u'\n')
+
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print('REGRESSION', line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
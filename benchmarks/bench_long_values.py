@@ -0,0 +1,65 @@
+"""Lexing speed on long values
+
+Compares the lexer against a variant that matches the catch-all rules one
+character at a time and relies on the tokenmerge filter, which is how
+the lexer worked up to version 1.6.
+
+Usage: python benchmarks/bench_long_values.py [repeat]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments.lexer import RegexLexer
+from pygments_openssl.lexer import OpenSSLConfLexer, T_LHS, T_RHS, T_SPACE
+from pygments.token import String
+
+
+class SingleCharLexer(OpenSSLConfLexer):
+
+    tokens = {
+        'lhs-default': [
+            (r'\\(?=\n)', String.Escape),
+            (r'\s+', T_SPACE),
+            (r'.', T_LHS),
+        ],
+        'rhs-default': [
+            (r'\\(?=\n)', String.Escape),
+            (r'\s+', T_SPACE),
+            (r'.', T_RHS),
+        ],
+    }
+
+    def __init__(self, **options):
+        super(SingleCharLexer, self).__init__(**options)
+        self.add_filter('tokenmerge')
+
+    get_tokens_unprocessed = RegexLexer.get_tokens_unprocessed
+
+
+INPUTS = {
+    'base64 policy': 'policy = %s\n' % ('MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8A/+' * 200),
+    'subjectAltName': 'subjectAltName = %s\n' % ','.join(
+        'DNS:host%d.example.com' % i for i in range(500)),
+    'distinguished name': 'subject = %s\n' % '/'.join(
+        'OU=Unit %d,O=Example Org' % i for i in range(300)),
+}
+
+
+def main(argv):
+    repeat = int(argv[1]) if len(argv) > 1 else 20
+    old, new = SingleCharLexer(), OpenSSLConfLexer()
+
+    for name, text in sorted(INPUTS.items()):
+        assert list(old.get_tokens(text)) == list(new.get_tokens(text))
+        t_old = min(timeit.repeat(lambda: list(old.get_tokens(text)), number=1, repeat=repeat))
+        t_new = min(timeit.repeat(lambda: list(new.get_tokens(text)), number=1, repeat=repeat))
+        print('%-20s %7d bytes  single-char %8.2f ms  runs %8.2f ms  %5.1fx' % (
+            name, len(text), t_old * 1000, t_new * 1000, t_old / t_new))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
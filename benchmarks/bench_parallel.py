@@ -0,0 +1,52 @@
+"""Scaling of parallel lexing across processes
+
+Usage: python benchmarks/bench_parallel.py [sections] [max-processes]
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import sys
+import time
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.parallel import ParallelLexer
+
+SECTION = """\
+[ tenant_%(i)d ]
+dir             = /srv/tenants/%(i)d
+certificate     = $dir/cacert.pem
+subjectAltName  = email:copy, IP:10.0.0.%(j)d, DNS:t%(i)d.example.com
+basicConstraints = critical, CA:true
+organizationName = "Tenant \\"%(i)d\\""
+
+"""
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 20000
+    processes = int(argv[2]) if len(argv) > 2 else multiprocessing.cpu_count()
+    text = ''.join(SECTION % {'i': i, 'j': i % 256} for i in range(sections))
+    print('input %.1f MB' % (len(text) / 1e6))
+
+    t = time.time()
+    for token in OpenSSLConfLexer().get_tokens_unprocessed(text):
+        pass
+    serial = time.time() - t
+    print('serial        %8.2f s' % serial)
+
+    n = 1
+    while n <= processes:
+        with ParallelLexer(processes=n) as lexer:
+            lexer.map(len, ['warm up'] * n)
+            t = time.time()
+            for token in lexer.get_tokens_unprocessed(text):
+                pass
+            t = time.time() - t
+        print('%2d processes  %8.2f s  %5.2fx' % (n, t, serial / t))
+        n *= 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,45 @@
+"""Regex tokendefs versus the hand-written scanner
+
+Usage: python benchmarks/bench_scanner.py [sections] [repeat]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.scanner import OpenSSLConfScannerLexer
+
+SECTION = """\
+[ ca_%(i)d ]
+dir             = /etc/ssl/ca%(i)d       # Where everything is kept
+certificate     = $dir/cacert.pem
+crl_dir         = ${dir}/crl
+policy          = policy_%(i)d
+default_days    = 365
+subjectAltName  = email:copy, IP:10.0.%(i)d.1, DNS:ca%(i)d.example.com
+basicConstraints = critical, CA:true, pathlen:0
+certificatePolicies = 1.3.6.1.4.1.%(i)d, @polsect_%(i)d
+organizationName = "Example \\"%(i)d\\" Ltd."
+
+"""
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 2000
+    repeat = int(argv[2]) if len(argv) > 2 else 5
+    text = ''.join(SECTION % {'i': i} for i in range(sections))
+
+    results = []
+    for lexer in (OpenSSLConfLexer(), OpenSSLConfScannerLexer()):
+        t = min(timeit.repeat(lambda: list(lexer.get_tokens(text)), number=1, repeat=repeat))
+        results.append(t)
+        print('%-25s %8.1f ms  %6.2f MB/s' % (
+            lexer.__class__.__name__, t * 1000, len(text) / t / 1e6))
+    print('speedup %.2fx' % (results[0] / results[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
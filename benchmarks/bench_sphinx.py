@@ -0,0 +1,78 @@
+"""Sphinx build times with the highlighting cache
+
+Builds a project of generated pages, each with a few OpenSSL code blocks,
+cold (no cache), warm (a full rebuild with the cache of the previous
+build), and without the extension.
+
+Usage: python benchmarks/bench_sphinx.py [pages] [parallel]
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from sphinx.application import Sphinx
+
+from corpus import generate
+
+BLOCKS = 4
+
+
+def write_project(srcdir, pages):
+    with open(os.path.join(srcdir, 'conf.py'), 'w') as f:
+        f.write('extensions = []\n')
+    with open(os.path.join(srcdir, 'index.rst'), 'w') as f:
+        f.write('Index\n=====\n\n.. toctree::\n\n')
+        for i in range(pages):
+            f.write('   page%d\n' % i)
+    for i in range(pages):
+        with open(os.path.join(srcdir, 'page%d.rst' % i), 'w') as f:
+            f.write('Page %d\n==========\n\n' % i)
+            for j in range(BLOCKS):
+                block = generate(10, seed=i * BLOCKS + j)
+                f.write('.. code-block:: openssl\n\n')
+                f.write(''.join('   %s\n' % line if line else '\n' for line in block.splitlines()))
+                f.write('\n')
+
+
+def build(srcdir, outdir, extensions, parallel):
+    start = time.time()
+    app = Sphinx(srcdir, srcdir, os.path.join(outdir, 'html'), os.path.join(outdir, 'doctrees'),
+                 'html', confoverrides=dict(extensions=extensions), status=io.StringIO(),
+                 warning=io.StringIO(), parallel=parallel)
+    app.build(force_all=True)
+    return time.time() - start, getattr(app, 'openssl_highlight_cache', None)
+
+
+def main(argv):
+    pages = int(argv[1]) if len(argv) > 1 else 100
+    parallel = int(argv[2]) if len(argv) > 2 else 0
+    tempdir = tempfile.mkdtemp()
+    try:
+        srcdir = os.path.join(tempdir, 'src')
+        os.mkdir(srcdir)
+        write_project(srcdir, pages)
+        print('%d pages, %d code blocks, -j %d' % (pages, pages * BLOCKS, parallel or 1))
+
+        ext = ['pygments_openssl.sphinxext']
+        for name, outdir, extensions in [('without extension', 'plain', []),
+                                         ('cold', 'cached', ext),
+                                         ('warm', 'cached', ext)]:
+            seconds, cache = build(srcdir, os.path.join(tempdir, outdir), extensions, parallel)
+            line = '%-20s %8.2f s' % (name, seconds)
+            if cache is not None:
+                info = cache.info()
+                line += '   %d hits, %d misses' % (info['hits'], info['misses'])
+            print(line)
+    finally:
+        shutil.rmtree(tempdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,63 @@
+"""Peak memory of streaming versus whole-text lexing
+
+Usage: python benchmarks/bench_streaming.py [sections]
+"""
+
+from __future__ import print_function
+
+import io
+import sys
+import time
+import tracemalloc
+
+from pygments.formatters import NullFormatter
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.streaming import StreamLexer
+
+SECTION = """\
+[ tenant_%(i)d ]
+dir             = /srv/tenants/%(i)d
+certificate     = $dir/cacert.pem
+subjectAltName  = email:copy, IP:10.0.0.%(j)d, DNS:t%(i)d.example.com
+organizationName = "Tenant \\"%(i)d\\""
+
+"""
+
+
+class Discard(object):
+
+    def write(self, data):
+        pass
+
+
+def measure(func):
+    tracemalloc.start()
+    t = time.time()
+    func()
+    t = time.time() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return t, peak
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 20000
+    data = ''.join(SECTION % {'i': i, 'j': i % 256} for i in range(sections)).encode('utf-8')
+    formatter = NullFormatter()
+
+    def whole():
+        text = io.BytesIO(data).read().decode('utf-8')
+        formatter.format(OpenSSLConfLexer().get_tokens(text), Discard())
+
+    def stream():
+        formatter.format(StreamLexer().get_tokens(io.BytesIO(data)), Discard())
+
+    print('input %.1f MB' % (len(data) / 1e6))
+    for name, func in (('whole text', whole), ('streaming', stream)):
+        t, peak = measure(func)
+        print('%-12s %8.2f s  peak %8.2f MB' % (name, t, peak / 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
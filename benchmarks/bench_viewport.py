@@ -0,0 +1,44 @@
+"""Cost of lexing a viewport of a large file
+
+Lexes 100 lines at the top, middle and end of the file, without and with
+a LineIndex, and compares with lexing the whole file.
+
+Usage: python benchmarks/bench_viewport.py [sections]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.viewport import LineIndex
+
+from corpus import generate
+
+LINES = 100
+
+
+def main(argv):
+    sections = int(argv[1]) if len(argv) > 1 else 20000
+    text = generate(sections)
+    lines = text.count('\n')
+    lexer = OpenSSLConfLexer()
+    print('%d bytes, %d lines' % (len(text), lines))
+
+    def measure(name, func, repeat=3):
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        print('%-28s %10.2f ms' % (name, seconds * 1000))
+
+    measure('whole file', lambda: list(lexer.get_tokens_unprocessed(text)), 1)
+    measure('build index', lambda: LineIndex.build(text, lexer), 1)
+    index = LineIndex.build(text, lexer)
+    for name, first in [('top', 1), ('middle', lines // 2), ('end', lines - LINES + 1)]:
+        last = first + LINES - 1
+        measure('%s without index' % name, lambda: list(lexer.get_line_tokens(text, first, last)))
+        measure('%s with index' % name, lambda: list(lexer.get_line_tokens(text, first, last, index)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
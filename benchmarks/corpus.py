@@ -0,0 +1,91 @@
+"""Synthetic openssl.cnf generator
+
+Produces configuration files resembling those written by CA tooling:
+sections, .include and .pragma directives, $var, ${var} and $(var)
+references, email:, IP: and DER: values, OIDs, quoted strings, comments,
+and continued lines.
+
+Usage: python benchmarks/corpus.py [sections] [seed] > example.cnf
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+
+WORDS = ['ca', 'root', 'intermediate', 'server', 'client', 'policy', 'crl',
+         'ocsp', 'tenant', 'req', 'dn', 'ext', 'v3', 'alt', 'names', 'default']
+
+
+def name(rand):
+    return '_'.join(rand.choice(WORDS) for i in range(rand.randint(1, 3)))
+
+
+def oid(rand):
+    return '1.3.6.1.4.1.%d.%d.%d' % (rand.randint(1, 60000), rand.randint(1, 99), rand.randint(1, 9))
+
+
+def ip(rand):
+    if rand.random() < 0.8:
+        return '.'.join(str(rand.randint(0, 255)) for i in range(4))
+    return 'fe80::%x:%x' % (rand.randint(0, 0xffff), rand.randint(0, 0xffff))
+
+
+def value(rand):
+    kind = rand.randint(0, 11)
+    if kind == 0:
+        return '$dir/%s.pem' % name(rand)
+    if kind == 1:
+        return '${%s::dir}/certs' % name(rand)
+    if kind == 2:
+        return '$(%s)' % name(rand)
+    if kind == 3:
+        return ', '.join(rand.choice([
+            'email:copy', 'email:%s@example.com' % name(rand), 'IP:%s' % ip(rand),
+            'DNS:%s.example.com' % name(rand), 'URI:http://example.com/%s' % name(rand),
+        ]) for i in range(rand.randint(1, 6)))
+    if kind == 4:
+        return 'DER:%s' % ':'.join('%02x' % rand.randint(0, 255) for i in range(rand.randint(4, 32)))
+    if kind == 5:
+        return '%s, @%s' % (oid(rand), name(rand))
+    if kind == 6:
+        return '"%s \\"%s\\""' % (name(rand), name(rand))
+    if kind == 7:
+        return 'critical, CA:true, pathlen:%d' % rand.randint(0, 3)
+    if kind == 8:
+        return str(rand.randint(1, 7300))
+    if kind == 9:
+        return ''.join(rand.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/')
+                       for i in range(rand.randint(40, 400)))
+    if kind == 10:
+        return '/C=DE/O=Example %s/CN=%s' % (name(rand), name(rand))
+    return name(rand)
+
+
+def generate(sections=100, seed=0):
+    """Return a configuration with the given number of sections.
+    """
+    rand = random.Random(seed)
+    lines = ['# Generated configuration', 'HOME = .', '.pragma dollarid:true',
+             '.include = /etc/ssl/common.cnf', '']
+    for i in range(sections):
+        lines.append('[ %s_%d ]' % (name(rand), i))
+        if rand.random() < 0.1:
+            lines.append('.include %s_%d.cnf' % (name(rand), i))
+        for j in range(rand.randint(3, 15)):
+            key = '%s_%d' % (name(rand), j)
+            if rand.random() < 0.1:
+                lines.append('%s = %s \\' % (key, value(rand)))
+                lines.append('    %s' % value(rand))
+            elif rand.random() < 0.15:
+                lines.append('%-24s = %s  # %s' % (key, value(rand), name(rand)))
+            else:
+                lines.append('%-24s = %s' % (key, value(rand)))
+        lines.append('')
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    sys.stdout.write(generate(sections, seed))
@@ -0,0 +1,126 @@
+"""Asyncio interface for highlighting OpenSSL configuration files
+
+Lexing and formatting run in an executor so they do not block the event
+loop. Tokens are fetched from the executor in batches, and formatted
+output is passed back as the formatter writes it, so both can be streamed
+with ``async for``. Cancelling the consuming task stops the work in the
+executor after the current batch. At most ``limit`` texts are lexed at
+the same time.
+
+Requires Python 3.7 or later.
+"""
+
+import asyncio
+import threading
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+
+class Cancelled(Exception):
+    """Raised in the executor to stop formatting.
+    """
+
+
+class AsyncLexer(object):
+    """Lex and format texts in ``executor``, the loop's default executor
+    if None.
+
+    Tokens are fetched in batches of ``batchsize``.
+    """
+
+    def __init__(self, lexer=None, executor=None, limit=4, batchsize=1000):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.executor = executor
+        self.limit = limit
+        self.batchsize = batchsize
+        self.loop = self.semaphore = None
+
+    def get_semaphore(self):
+        # Semaphores belong to a loop before Python 3.10
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.semaphore = loop, asyncio.Semaphore(self.limit)
+        return self.semaphore
+
+    async def iter_tokens(self, text):
+        """Yield (tokentype, value) tuples.
+        """
+        loop = asyncio.get_running_loop()
+        async with self.get_semaphore():
+            tokens = iter(self.lexer.get_tokens(text))
+            while True:
+                batch = await loop.run_in_executor(self.executor, take, tokens, self.batchsize)
+                for token in batch:
+                    yield token
+                if len(batch) < self.batchsize:
+                    break
+
+    async def get_tokens(self, text):
+        """Return a list of (tokentype, value) tuples.
+        """
+        result = []
+        async for token in self.iter_tokens(text):
+            result.append(token)
+        return result
+
+    async def iter_highlight(self, text, formatter):
+        """Yield the output of ``formatter`` in pieces as it is written.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        def put(piece):
+            loop.call_soon_threadsafe(queue.put_nowait, piece)
+
+        def run():
+            try:
+                formatter.format(checked(self.lexer.get_tokens(text), cancelled), Writer(put))
+            except Cancelled:
+                pass
+            finally:
+                put(done)
+
+        async with self.get_semaphore():
+            future = loop.run_in_executor(self.executor, run)
+            try:
+                while True:
+                    piece = await queue.get()
+                    if piece is done:
+                        break
+                    yield piece
+            finally:
+                cancelled.set()
+            await future
+
+    async def highlight(self, text, formatter):
+        """Return the output of ``formatter``.
+        """
+        pieces = []
+        async for piece in self.iter_highlight(text, formatter):
+            pieces.append(piece)
+        return (b'' if formatter.encoding else '').join(pieces)
+
+
+class Writer(object):
+
+    def __init__(self, put):
+        self.write = put
+
+
+def take(iterator, count):
+    # Return the next count items of iterator
+    result = []
+    for item in iterator:
+        result.append(item)
+        if len(result) == count:
+            break
+    return result
+
+
+def checked(tokens, cancelled):
+    for token in tokens:
+        if cancelled.is_set():
+            raise Cancelled()
+        yield token
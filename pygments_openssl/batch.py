@@ -0,0 +1,114 @@
+"""Batch lexing of many OpenSSL configuration files
+
+A BatchLexer lexes a list of texts with one lexer instance, either in the
+current thread or fanned out to a thread or process pool. Worker processes
+create the lexer once, when they start, from its class and options, which
+also works when they are spawned rather than forked. Texts are sent to
+them in batches. Results are returned in input order.
+"""
+
+import multiprocessing
+import multiprocessing.pool
+
+from pygments.token import string_to_tokentype
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+POOLS = (None, 'thread', 'process')
+
+
+class BatchLexer(object):
+    """Lex many texts with ``lexer``.
+
+    ``pool`` is None to lex in the current thread, 'thread' to use a
+    thread pool, or 'process' to use a process pool, of ``workers``
+    threads or processes. Texts are handed to the pool in batches of
+    ``batchsize``, by default about four batches per worker. ``context``
+    is the multiprocessing context of a process pool, by default the
+    multiprocessing module.
+    """
+
+    def __init__(self, lexer=None, pool=None, workers=None, batchsize=None, context=None):
+        if pool not in POOLS:
+            raise ValueError('pool must be one of %r' % (POOLS,))
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.kind = pool
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batchsize = batchsize
+        self.context = context or multiprocessing
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def get_pool(self):
+        if self.pool is None:
+            if self.kind == 'thread':
+                self.pool = multiprocessing.pool.ThreadPool(self.workers)
+            else:
+                self.pool = self.context.Pool(
+                    self.workers, initializer=init_worker,
+                    initargs=(type(self.lexer), self.lexer.options))
+        return self.pool
+
+    def lex(self, text):
+        """Return a list of (tokentype, value) tuples.
+        """
+        return list(self.lexer.get_tokens(text))
+
+    def lex_many(self, texts):
+        """Return a list of (tokentype, value) lists, one per text.
+        """
+        texts = list(texts)
+        if self.kind is None or len(texts) < 2:
+            return [self.lex(text) for text in texts]
+
+        batchsize = self.batchsize or max(1, -(-len(texts) // (4 * self.workers)))
+        if self.kind == 'thread':
+            return self.get_pool().map(self.lex, texts, batchsize)
+
+        batches = [texts[i:i+batchsize] for i in range(0, len(texts), batchsize)]
+        tokentypes = {}
+        results = []
+        for batch in self.get_pool().map(lex_batch, batches, 1):
+            for tokens in batch:
+                for ttype, value in tokens:
+                    if ttype not in tokentypes:
+                        tokentypes[ttype] = string_to_tokentype(ttype)
+                results.append([(tokentypes[ttype], value) for ttype, value in tokens])
+        return results
+
+
+def lex_many(texts, lexer=None, pool=None, workers=None):
+    """Return a list of (tokentype, value) lists, one per text.
+
+    See BatchLexer for the arguments. The pool is closed before returning.
+    """
+    with BatchLexer(lexer, pool, workers) as batch:
+        return batch.lex_many(texts)
+
+
+# Lexer of a worker process
+worker_lexer = None
+
+
+def init_worker(cls, options):
+    global worker_lexer
+    worker_lexer = cls(**options)
+
+
+def lex_batch(texts):
+    """Lex a batch of texts in a worker process.
+
+    Returns the token lists with token types as strings.
+    """
+    return [[(str(t), v) for t, v in worker_lexer.get_tokens(text)] for text in texts]
@@ -0,0 +1,165 @@
+"""Token cache for OpenSSL configuration files
+
+Tokens are cached by a hash of the text, the lexer options, and a
+fingerprint of the lexer implementation. The fingerprint covers the
+Pygments version and the source of the modules defining the lexer, so
+cached tokens are not used after either changes.
+
+The cache holds the tokens before filtering. The lexer's filters are
+applied to them on every lookup.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+import pygments
+from pygments.filter import apply_filters
+from pygments.token import string_to_tokentype
+
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+_fingerprints = {}
+
+
+def fingerprint(lexer):
+    """Return a hash identifying the implementation of ``lexer``.
+    """
+    cls = lexer.__class__
+    if cls not in _fingerprints:
+        h = hashlib.sha1()
+        h.update(('%s %s.%s' % (pygments.__version__, cls.__module__, cls.__name__)).encode('utf-8'))
+        modules = set(c.__module__ for c in cls.__mro__)
+        modules.add(OpenSSLConfLexer.__module__)
+        for name in sorted(modules):
+            filename = getattr(sys.modules.get(name), '__file__', None)
+            if filename:
+                if filename.endswith(('.pyc', '.pyo')):
+                    filename = filename[:-1]
+                try:
+                    with open(filename, 'rb') as f:
+                        h.update(f.read())
+                except (IOError, OSError):
+                    h.update(name.encode('utf-8'))
+        _fingerprints[cls] = h.hexdigest()
+    return _fingerprints[cls]
+
+
+class TokenCache(object):
+    """Cache the tokens returned by ``lexer.get_tokens``.
+
+    At most ``maxsize`` token lists are kept in memory, evicting the least
+    recently used. If ``directory`` is given, token lists are also stored
+    there and survive process restarts.
+    """
+
+    def __init__(self, lexer=None, maxsize=128, directory=None):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.disk_hits = 0
+        self.prefix = fingerprint(self.lexer) + repr(sorted(
+            (k, v) for k, v in self.lexer.options.items() if k != 'filters'))
+        self.tokentypes = {}
+
+    def info(self):
+        """Return a dict of cache statistics.
+        """
+        with self.lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        disk_hits=self.disk_hits, maxsize=self.maxsize,
+                        currsize=len(self.entries))
+
+    def clear(self):
+        """Empty the in-memory cache and reset the statistics. The on-disk
+        store is left alone.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+    def key(self, text):
+        if not isinstance(text, bytes):
+            try:
+                text = text.encode('utf-8')
+            except UnicodeEncodeError:
+                text = text.encode('utf-8', 'surrogatepass')
+        h = hashlib.sha1(self.prefix.encode('utf-8'))
+        h.update(text)
+        return h.hexdigest()
+
+    def get_tokens(self, text):
+        """Return a tuple of (tokentype, value) tuples.
+        """
+        tokens = self.get_unfiltered_tokens(text)
+        if self.lexer.filters:
+            return tuple(apply_filters(tokens, self.lexer.filters, self.lexer))
+        return tokens
+
+    def get_unfiltered_tokens(self, text):
+        key = self.key(text)
+        with self.lock:
+            tokens = self.entries.pop(key, None)
+            if tokens is not None:
+                self.entries[key] = tokens
+                self.hits += 1
+                return tokens
+
+        tokens = self.load(key)
+        with self.lock:
+            if tokens is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if tokens is None:
+            tokens = tuple(self.lexer.get_tokens(text, unfiltered=True))
+            self.store(key, tokens)
+
+        with self.lock:
+            self.entries[key] = tokens
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return tokens
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(key), 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+        tokentypes = self.tokentypes
+        for ttype, value in data:
+            if ttype not in tokentypes:
+                tokentypes[ttype] = string_to_tokentype(ttype)
+        return tuple((tokentypes[ttype], value) for ttype, value in data)
+
+    def store(self, key, tokens):
+        if self.directory is None:
+            return
+        path = self.path(key)
+        data = json.dumps([(str(t), v) for t, v in tokens]).encode('utf-8')
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            os.remove(tmp)
@@ -0,0 +1,298 @@
+"""Highlight trees of OpenSSL configuration files
+
+Usage: pygments-openssl [options] -o OUTDIR PATH [PATH ...]
+
+Files matching the lexer's filename patterns are found in the PATHs,
+highlighted in a pool of worker processes, and written to OUTDIR under
+their path relative to the PATH they were found in, or their name for
+files given as PATH. Files that would be written to the same output are
+an error. Every worker creates the lexer and formatter once, by name, and
+highlights files in batches, writing the outputs of a batch together.
+
+A manifest in OUTDIR records the size, modification time, and hash of the
+files highlighted. Files whose size and modification time did not change
+are skipped without being read, files whose hash did not change are
+skipped without being highlighted. Changing the lexer, formatter, or
+options highlights all files again.
+"""
+
+from __future__ import print_function
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from pygments import highlight
+from pygments.formatters import get_formatter_by_name
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+from pygments_openssl.cache import fingerprint
+from pygments_openssl.lexer import OpenSSLConfLexer
+
+MANIFEST = '.pygments-openssl.json'
+
+# Format version of the manifest
+VERSION = 1
+
+
+def parse_options(value):
+    # Parse key=value,key=value like pygmentize -O
+    options = {}
+    for item in value.split(','):
+        item = item.strip()
+        if item:
+            key, sep, val = item.partition('=')
+            options[key.strip()] = val.strip() if sep else True
+    return options
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='pygments-openssl',
+        description='Highlight OpenSSL configuration files in bulk.')
+    parser.add_argument('paths', metavar='PATH', nargs='+',
+                        help='files or directories to highlight')
+    parser.add_argument('-o', '--output', metavar='OUTDIR', required=True,
+                        help='directory to write the outputs to')
+    parser.add_argument('-l', '--lexer', default='openssl',
+                        help='lexer alias (default: %(default)s)')
+    parser.add_argument('-f', '--formatter', default='openssl-html',
+                        help='formatter alias (default: %(default)s)')
+    parser.add_argument('-O', '--options', metavar='KEY=VALUE,...', default='',
+                        help='formatter options')
+    parser.add_argument('-x', '--suffix', default=None,
+                        help='suffix of the output files (default: from the formatter)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('-b', '--batchsize', type=int, default=16,
+                        help='files per batch (default: %(default)s)')
+    parser.add_argument('-a', '--all', action='store_true',
+                        help='highlight unchanged files as well')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='print the time taken by each file')
+    return parser
+
+
+def find_files(paths, patterns):
+    """Yield (path, relpath) tuples of the files in ``paths`` matching
+    ``patterns``, in sorted order.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path, os.path.basename(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                    filepath = os.path.join(dirpath, name)
+                    yield filepath, os.path.relpath(filepath, path)
+
+
+def output_suffix(formatter):
+    # The suffix of the first filename pattern of the formatter or its
+    # base classes
+    for cls in type(formatter).__mro__:
+        for pattern in getattr(cls, 'filenames', None) or ():
+            if pattern.startswith('*.'):
+                return pattern[1:]
+    return '.txt'
+
+
+def file_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class Manifest(object):
+    """Size, modification time, and hash of the files highlighted into a
+    directory with the settings identified by ``key``.
+    """
+
+    def __init__(self, directory, key):
+        self.path = os.path.join(directory, MANIFEST)
+        self.key = key
+        self.files = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+            if data['version'] == VERSION and data['key'] == self.key:
+                self.files = data['files']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            # A missing or unreadable manifest highlights all files
+            pass
+
+    def save(self):
+        data = json.dumps(dict(version=VERSION, key=self.key, files=self.files),
+                          sort_keys=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data.encode('utf-8'))
+            os.rename(tmp, self.path)
+        except (IOError, OSError):
+            os.remove(tmp)
+            raise
+
+    def unchanged(self, relpath, st):
+        entry = self.files.get(relpath)
+        return entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime
+
+    def update(self, relpath, st, digest):
+        self.files[relpath] = [st.st_size, st.st_mtime, digest]
+
+
+# Lexer and formatter of a worker process
+worker_lexer = worker_formatter = None
+
+
+def init_worker(lexer, formatter, options):
+    # Create rather than unpickle the lexer and formatter, so that their
+    # classes are set up in spawned workers as well
+    global worker_lexer, worker_formatter
+    worker_lexer = get_lexer_by_name(lexer)
+    worker_formatter = get_formatter_by_name(formatter, **options)
+
+
+def highlight_batch(jobs):
+    """Highlight a batch of (path, relpath, outpath) jobs and write the
+    outputs.
+
+    Returns a list of (relpath, digest, seconds, size, error) tuples.
+    """
+    results, outputs = [], []
+    for path, relpath, outpath in jobs:
+        start = time.time()
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            output = highlight(data, worker_lexer, worker_formatter)
+            if not isinstance(output, bytes):
+                output = output.encode('utf-8')
+        except Exception as e:
+            results.append((relpath, None, time.time() - start, 0, str(e)))
+            continue
+        outputs.append((len(results), outpath, output))
+        results.append((relpath, file_digest(data), time.time() - start, len(data), None))
+
+    for i, outpath, output in outputs:
+        directory = os.path.dirname(outpath)
+        try:
+            if not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    # Possibly created by another worker
+                    pass
+            with open(outpath, 'wb') as f:
+                f.write(output)
+        except (IOError, OSError) as e:
+            # The file counts as failed
+            relpath, digest, seconds, size, error = results[i]
+            results[i] = (relpath, None, seconds, 0, str(e))
+    return results
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    options = parse_options(args.options)
+    try:
+        lexer = get_lexer_by_name(args.lexer)
+        formatter = get_formatter_by_name(args.formatter, **options)
+    except ClassNotFound as e:
+        print('pygments-openssl: %s' % e, file=sys.stderr)
+        return 2
+    suffix = args.suffix if args.suffix is not None else output_suffix(formatter)
+    patterns = lexer.filenames or OpenSSLConfLexer.filenames
+
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    key = hashlib.sha1(repr((fingerprint(lexer), args.lexer, args.formatter,
+                             sorted(options.items()), suffix)).encode('utf-8'))
+    manifest = Manifest(args.output, key.hexdigest())
+    if not args.all:
+        manifest.load()
+
+    # Files with the same relative path in different PATHs would be
+    # written to the same output
+    files, seen = list(find_files(args.paths, patterns)), {}
+    for path, relpath in files:
+        if relpath in seen:
+            print('pygments-openssl: %s and %s would both be written to %s' % (
+                seen[relpath], path, os.path.join(args.output, relpath + suffix)),
+                file=sys.stderr)
+            return 2
+        seen[relpath] = path
+
+    start = time.time()
+    jobs, stats, skipped = [], {}, 0
+    for path, relpath in files:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            print('pygments-openssl: %s' % e, file=sys.stderr)
+            continue
+        outpath = os.path.join(args.output, relpath + suffix)
+        if not args.all and os.path.exists(outpath):
+            if manifest.unchanged(relpath, st):
+                skipped += 1
+                continue
+            entry = manifest.files.get(relpath)
+            if entry is not None and entry[0] == st.st_size:
+                with open(path, 'rb') as f:
+                    digest = file_digest(f.read())
+                if digest == entry[2]:
+                    manifest.update(relpath, st, digest)
+                    skipped += 1
+                    continue
+        stats[relpath] = st
+        jobs.append((path, relpath, outpath))
+
+    batches = [jobs[i:i+args.batchsize] for i in range(0, len(jobs), args.batchsize)]
+    workers = min(args.jobs or multiprocessing.cpu_count(), len(batches))
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=init_worker,
+                                    initargs=(args.lexer, args.formatter, options))
+        results = pool.imap_unordered(highlight_batch, batches)
+    else:
+        pool = None
+        init_worker(args.lexer, args.formatter, options)
+        results = (highlight_batch(batch) for batch in batches)
+
+    status, count, size = 0, 0, 0
+    try:
+        for batch in results:
+            for relpath, digest, seconds, length, error in batch:
+                if error is not None:
+                    print('pygments-openssl: %s: %s' % (relpath, error), file=sys.stderr)
+                    manifest.files.pop(relpath, None)
+                    status = 1
+                    continue
+                manifest.update(relpath, stats[relpath], digest)
+                count += 1
+                size += length
+                if args.verbose:
+                    print('%10.2f ms  %s' % (seconds * 1000, relpath))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        manifest.save()
+
+    seconds = time.time() - start
+    print('%d files highlighted, %d unchanged, %.1f kB in %.2f s (%.1f files/s, %.2f MB/s)' % (
+        count, skipped, size / 1e3, seconds, count / seconds if seconds else 0,
+        size / 1e6 / seconds if seconds else 0))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Columnar token storage
+
+A TokenArray keeps the tokens of a text as two arrays: a token type id
+and a start offset per token. Tokens are contiguous, so a token ends
+where the next one starts. Token values are sliced from the text only
+when they are asked for.
+"""
+
+from array import array
+
+
+class TokenArray(object):
+    """The merged tokens of ``text``.
+
+    ``types`` lists the token types by id, ``ids`` holds the type id and
+    ``starts`` the start offset of each token.
+    """
+
+    def __init__(self, text, types=None, ids=None, starts=None):
+        self.text = text
+        self.types = types if types is not None else []
+        self.ids = ids if ids is not None else array('B')
+        self.starts = starts if starts is not None else array('I' if len(text) < 2 ** 32 else 'L')
+
+    @classmethod
+    def from_tokens(cls, text, tokens):
+        """Return a TokenArray of (index, tokentype, value) tuples covering
+        ``text``. Consecutive tokens of the same type are merged.
+        """
+        self = cls(text)
+        types, ids, starts = self.types, self.ids, self.starts
+        typeids = {}
+        last = None
+        for index, ttype, value in tokens:
+            if ttype is last or not value:
+                continue
+            last = ttype
+            if ttype not in typeids:
+                typeids[ttype] = len(types)
+                types.append(ttype)
+                if len(types) > 256 and ids.typecode == 'B':
+                    ids = self.ids = array('H', ids)
+            ids.append(typeids[ttype])
+            starts.append(index)
+        return self
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        """Return the (tokentype, value) tuple of token ``i``.
+        """
+        if i < 0:
+            i += len(self.ids)
+        return self.types[self.ids[i]], self.text[self.starts[i]:self.end(i)]
+
+    def __iter__(self):
+        return self.get_tokens()
+
+    def ttype(self, i):
+        return self.types[self.ids[i]]
+
+    def start(self, i):
+        return self.starts[i]
+
+    def end(self, i):
+        if i + 1 < len(self.starts):
+            return self.starts[i+1]
+        return len(self.text)
+
+    def value(self, i):
+        return self.text[self.starts[i]:self.end(i)]
+
+    def get_tokens(self):
+        """Return an iterable of (tokentype, value) tuples.
+        """
+        for index, ttype, value in self.get_tokens_unprocessed():
+            yield ttype, value
+
+    def get_tokens_unprocessed(self):
+        """Return an iterable of (index, tokentype, value) tuples.
+        """
+        text, types, starts = self.text, self.types, self.starts
+        last = len(starts) - 1
+        for i, typeid in enumerate(self.ids):
+            start = starts[i]
+            end = starts[i+1] if i < last else len(text)
+            yield start, types[typeid], text[start:end]
@@ -0,0 +1,255 @@
+"""Token-annotated diffs of OpenSSL configuration files
+
+Lines are compared with difflib, and every line of the diff carries the
+tokens of its version of the text, cut at line ends. Unchanged lines
+carry the tokens of the new text, which differ from those of the old
+text if a change elsewhere affected them, e.g. by continuing a line.
+
+With context lines, only the hunks of the diff are lexed. Both texts are
+lexed from the last line start before the first hunk which is in the
+root state in both, found with the fast pass of the viewport module, to
+the end of the last hunk.
+
+Without context, all lines are included. The old text is lexed with an
+IncrementalLexer, which is then updated to the new text. The update
+resumes from the state stack recorded at the last line start before the
+first change, and stops as soon as the state agrees with the old text
+behind the last change. The common prefix and suffix are lexed once and
+their tokens shared by both texts.
+"""
+
+from bisect import bisect_right
+from difflib import SequenceMatcher
+
+from pygments.token import Generic, Text
+
+from pygments_openssl.incremental import IncrementalLexer, common_prefix, common_suffix
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.viewport import root_lines
+
+
+class TokenDiff(object):
+    """The diff of ``old`` and ``new`` lexed with ``lexer``, with
+    ``context`` unchanged lines around the changes, or all lines if
+    ``context`` is None.
+
+    Texts are lexed as is, i.e. without the preprocessing done by
+    ``get_tokens``.
+    """
+
+    def __init__(self, old, new, lexer=None, context=3):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.old, self.new = old, new
+        self.context = context
+        self.old_lines, self.old_starts = split_lines(old)
+        self.new_lines, self.new_starts = split_lines(new)
+        if context is None:
+            self.hunks = [self.get_opcodes()]
+            self.lex_all()
+        else:
+            self.hunks = self.get_hunks(context)
+            self.lex_hunks()
+
+    def lex_all(self):
+        inc = IncrementalLexer(self.old, self.lexer)
+        self.old_tokens = (list(inc.positions), list(inc.segments))
+        inc.update(self.new)
+        self.new_tokens = (inc.positions, inc.segments)
+
+    def lex_hunks(self):
+        self.old_tokens = self.new_tokens = ([], [])
+        if not self.hunks:
+            return
+        # Lines before the first change are the same in both texts
+        line, pos = restart_line(self.lexer, self.old, self.new, self.hunks[0][0][1] + 1)
+        last = self.hunks[-1][-1]
+        self.old_tokens = lex_range(self.lexer, self.old, pos, self.old_starts[last[2]])
+        self.new_tokens = lex_range(self.lexer, self.new, pos, self.new_starts[last[4]])
+
+    def get_opcodes(self):
+        """Return a list of difflib opcodes of the lines of the texts.
+        """
+        a, b = self.old_lines, self.new_lines
+        # Leave the common lines at either end out of the comparison
+        prefix = common_prefix(a, b)
+        suffix = common_suffix(a[prefix:], b[prefix:])
+        opcodes = []
+        if prefix:
+            opcodes.append(('equal', 0, prefix, 0, prefix))
+        matcher = SequenceMatcher(None, a[prefix:len(a)-suffix], b[prefix:len(b)-suffix], False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+        if suffix:
+            opcodes.append(('equal', len(a) - suffix, len(a), len(b) - suffix, len(b)))
+        return opcodes
+
+    def get_hunks(self, context=3):
+        """Return a list of hunks, each a list of opcodes with up to
+        ``context`` equal lines around the changes, like
+        SequenceMatcher.get_grouped_opcodes.
+        """
+        opcodes = self.get_opcodes()
+        if not [op for op in opcodes if op[0] != 'equal']:
+            return []
+        if opcodes[0][0] == 'equal':
+            tag, i1, i2, j1, j2 = opcodes[0]
+            opcodes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+        if opcodes[-1][0] == 'equal':
+            tag, i1, i2, j1, j2 = opcodes[-1]
+            opcodes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+        hunks, hunk = [], []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal' and i2 - i1 > 2 * context:
+                hunk.append((tag, i1, i1 + context, j1, j1 + context))
+                hunks.append(hunk)
+                hunk = []
+                i1, j1 = i2 - context, j2 - context
+            hunk.append((tag, i1, i2, j1, j2))
+        if hunk and not (len(hunk) == 1 and hunk[0][0] == 'equal'):
+            hunks.append(hunk)
+        return hunks
+
+    def iter_lines(self):
+        """Yield (tag, old_line, new_line, tokens) tuples.
+
+        ``tag`` is ' ' for an unchanged line, '-' for a removed line, and
+        '+' for an added line. Line numbers count from 1 and are None for
+        lines missing from a text. ``tokens`` is the list of (tokentype,
+        value) tuples of the line, including its line end.
+
+        With context lines, hunks are preceded by ('@', None, None,
+        header) tuples with the header of a unified diff.
+        """
+        for hunk in self.hunks:
+            if self.context is not None:
+                i1, i2, j1, j2 = hunk[0][1], hunk[-1][2], hunk[0][3], hunk[-1][4]
+                yield '@', None, None, '@@ -%s +%s @@\n' % (
+                    hunk_range(i1, i2), hunk_range(j1, j2))
+            for tag, i1, i2, j1, j2 in hunk:
+                if tag == 'equal':
+                    for n, tokens in enumerate(self.new_line_tokens(j1, j2)):
+                        yield ' ', i1 + n + 1, j1 + n + 1, tokens
+                    continue
+                for n, tokens in enumerate(self.old_line_tokens(i1, i2)):
+                    yield '-', i1 + n + 1, None, tokens
+                for n, tokens in enumerate(self.new_line_tokens(j1, j2)):
+                    yield '+', None, j1 + n + 1, tokens
+
+    def old_line_tokens(self, first, last):
+        return line_tokens(self.old_tokens, self.old_starts, first, last)
+
+    def new_line_tokens(self, first, last):
+        return line_tokens(self.new_tokens, self.new_starts, first, last)
+
+    def get_tokens(self):
+        """Return an iterable of (tokentype, value) tuples of the diff,
+        for formatting with a Pygments formatter.
+
+        Lines are prefixed with Generic.Deleted and Generic.Inserted
+        markers, hunk headers are Generic.Subheading.
+        """
+        for tag, old_line, new_line, tokens in self.iter_lines():
+            if tag == '@':
+                yield Generic.Subheading, tokens
+                continue
+            yield MARKERS[tag], tag
+            for token in tokens:
+                yield token
+            if not tokens or not tokens[-1][1].endswith('\n'):
+                yield Text, '\n'
+
+
+MARKERS = {' ': Text, '-': Generic.Deleted, '+': Generic.Inserted}
+
+
+def diff_lines(old, new, lexer=None, context=None):
+    """Return an iterable of (tag, old_line, new_line, tokens) tuples.
+
+    See TokenDiff.iter_lines.
+    """
+    return TokenDiff(old, new, lexer, context).iter_lines()
+
+
+def restart_line(lexer, old, new, line):
+    # Return the (line, offset) of the last line start at or before line
+    # which is in the root state in both texts
+    result = (1, 0)
+    new_roots = root_lines(lexer, new)
+    for old_root in root_lines(lexer, old):
+        if old_root[0] > line or next(new_roots, None) != old_root:
+            break
+        result = old_root
+    return result
+
+
+def lex_range(lexer, text, pos, end):
+    # Return the tokens of text from the root state line start pos up to
+    # end, as a checkpoint list like IncrementalLexer's
+    segment = []
+    for index, ttype, value in lexer.scan(text, pos, ['root']):
+        if index >= end:
+            break
+        segment.append((ttype, value))
+    return [pos], [segment]
+
+
+def split_lines(text):
+    # Return the lines of text, with line ends, and their start offsets
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    starts, pos = [], 0
+    for line in lines:
+        starts.append(pos)
+        pos += len(line)
+    starts.append(pos)
+    return lines, starts
+
+
+def line_tokens(tokens, starts, first, last):
+    # Return the merged token lists of lines first to last, counting from 0
+    positions, segments = tokens
+    start, end = starts[first], starts[last]
+    lines, line = [], []
+    for i in range(max(0, bisect_right(positions, start) - 1), len(positions)):
+        pos = positions[i]
+        if pos >= end:
+            break
+        for ttype, value in segments[i]:
+            stop = pos + len(value)
+            if stop <= start:
+                pos = stop
+                continue
+            if pos < start or stop > end:
+                value = value[max(0, start - pos):end - pos]
+            pos = stop
+            j = 0
+            while True:
+                eol = value.find('\n', j) + 1
+                piece = value[j:eol] if eol else value[j:]
+                if piece:
+                    if line and line[-1][0] is ttype:
+                        line[-1] = (ttype, line[-1][1] + piece)
+                    else:
+                        line.append((ttype, piece))
+                if not eol:
+                    break
+                lines.append(line)
+                line = []
+                j = eol
+            if pos >= end:
+                break
+    if line:
+        lines.append(line)
+    return lines
+
+
+def hunk_range(start, stop):
+    # Line range of a unified diff hunk header
+    length = stop - start
+    if length == 1:
+        return '%d' % (start + 1)
+    if not length:
+        start -= 1
+    return '%d,%d' % (start + 1, length)
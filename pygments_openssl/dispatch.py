@@ -0,0 +1,199 @@
+"""First-character dispatch for RegexLexer tokendefs
+
+For every state and ASCII character, the dispatch table lists the rules
+whose pattern can match at a position starting with that character, in
+their original order. The other rules cannot match there, so skipping
+them does not change the result. Non-ASCII characters and the end of
+the text use the full rule list.
+
+Rules can also be guarded: once a guarded rule fails at a position, it
+is known to fail at every position up to a limit and is not tried there
+again. This keeps rules that scan far ahead, like quoted strings, from
+rescanning the same text over and over.
+"""
+
+import re
+import threading
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+ASCII = frozenset(chr(o) for o in range(128))
+
+CATEGORIES = {
+    'CATEGORY_DIGIT': r'\d',
+    'CATEGORY_NOT_DIGIT': r'\D',
+    'CATEGORY_SPACE': r'\s',
+    'CATEGORY_NOT_SPACE': r'\S',
+    'CATEGORY_WORD': r'\w',
+    'CATEGORY_NOT_WORD': r'\W',
+}
+
+# Flags that change the meaning of categories
+CATEGORY_FLAGS = re.UNICODE | getattr(re, 'ASCII', 0)
+
+# The guards remembering a failure, per thread, for release
+remembering = threading.local()
+
+
+def first_chars(pattern, flags=0):
+    """Return the set of ASCII characters a match of ``pattern`` can start
+    with, or None if the pattern can match the empty string.
+
+    The set may be too large, but never too small.
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    flags |= re.compile(pattern, flags).flags
+    chars, nullable = first(parsed, flags)
+    return None if nullable else frozenset(chars)
+
+
+def first(items, flags):
+    # Return (chars, nullable) of a sequence of parsed items
+    result = set()
+    for op, av in items:
+        # Opcode names are lowercase on Python 2
+        op = str(op).upper()
+        if op in ('AT', 'ASSERT', 'ASSERT_NOT'):
+            # Zero-width
+            continue
+        if op in ('SUBPATTERN', 'ATOMIC_GROUP'):
+            chars, nullable = first(av[-1] if op == 'SUBPATTERN' else av, flags)
+        elif op == 'BRANCH':
+            chars, nullable = set(), False
+            for branch in av[1]:
+                c, n = first(branch, flags)
+                chars |= c
+                nullable = nullable or n
+        elif op in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            chars, nullable = first(av[2], flags)
+            nullable = nullable or av[0] == 0
+        elif op == 'LITERAL':
+            chars, nullable = matching(lambda c: ord(c) == av, flags), False
+        elif op == 'NOT_LITERAL':
+            chars, nullable = matching(lambda c: ord(c) != av, flags), False
+        elif op == 'IN':
+            chars, nullable = matching(lambda c: in_set(c, av, flags), flags), False
+        else:
+            # ANY and anything not analysed
+            chars, nullable = ASCII, False
+        result |= chars
+        if not nullable:
+            return result, False
+    return result, True
+
+
+def matching(predicate, flags):
+    # Return the ASCII characters matching predicate, ignoring case if
+    # the pattern does
+    if flags & re.IGNORECASE:
+        return set(c for c in ASCII
+                   if predicate(c) or predicate(c.lower()) or predicate(c.upper()))
+    return set(c for c in ASCII if predicate(c))
+
+
+def in_set(c, items, flags):
+    # Return True if c is in a parsed character set
+    negate = False
+    for op, av in items:
+        op = str(op).upper()
+        if op == 'NEGATE':
+            negate = True
+        elif op == 'LITERAL':
+            if ord(c) == av:
+                return not negate
+        elif op == 'RANGE':
+            if av[0] <= ord(c) <= av[1]:
+                return not negate
+        elif op == 'CATEGORY':
+            category = CATEGORIES.get(str(av).upper())
+            if category is None:
+                return True
+            # Categories are ASCII on Python 2 unless the pattern is UNICODE
+            if re.match(category, c, flags & CATEGORY_FLAGS):
+                return not negate
+        else:
+            return True
+    return negate
+
+
+class Guard(object):
+    """Wrap the match function of a rule so it is not tried again where it
+    is known to fail.
+
+    ``limit(text, pos)`` returns the position up to which the rule cannot
+    match after failing at ``pos``. Only failures where ``start(text,
+    pos)`` is true, i.e. at a character the rule can start with, are
+    remembered; elsewhere the failure says nothing about the positions
+    that follow. The last failure is remembered per thread, until
+    released.
+    """
+
+    def __init__(self, rexmatch, limit, start):
+        self.rexmatch = rexmatch
+        self.limit = limit
+        self.start = start
+        self.local = threading.local()
+
+    def match(self, text, pos):
+        failed = getattr(self.local, 'failed', None)
+        if failed is not None and failed[0] is text and failed[1] < pos < failed[2]:
+            return None
+        m = self.rexmatch(text, pos)
+        if m is None and self.start(text, pos):
+            self.local.failed = (text, pos, self.limit(text, pos))
+            try:
+                remembering.guards.add(self)
+            except AttributeError:
+                remembering.guards = set([self])
+        return m
+
+
+def release(text):
+    """Forget the failures of all guards on ``text`` in the current thread,
+    so the guards do not keep it alive.
+    """
+    guards = getattr(remembering, 'guards', None)
+    if not guards:
+        return
+    for guard in list(guards):
+        failed = guard.local.failed
+        if failed is None or failed[0] is text:
+            guard.local.failed = None
+            guards.discard(guard)
+
+
+def dispatch_table(tokendefs, patterns, guards=None):
+    """Return a dict mapping state names to lists of 128 rule tuples, one
+    per ASCII character.
+
+    ``patterns`` is a dict of compiled tokendefs with the same layout
+    whose regexes are analysed; the rules are taken from ``tokendefs``.
+    ``guards`` maps regexes to (limit, start) functions for Guard.
+    """
+    guards = guards or {}
+    guarded = {}
+    table = {}
+    for state, rules in tokendefs.items():
+        starts = []
+        rules = list(rules)
+        for i, (rexmatch, action, new_state) in enumerate(patterns[state]):
+            rex = rexmatch.__self__
+            starts.append(first_chars(rex.pattern, rex.flags))
+            if rex.pattern in guards:
+                rule = rules[i]
+                if rule[0] not in guarded:
+                    guarded[rule[0]] = Guard(rule[0], *guards[rex.pattern]).match
+                rules[i] = (guarded[rule[0]],) + tuple(rule[1:])
+        candidates = {}
+        column = []
+        for o in range(128):
+            key = tuple(i for i, chars in enumerate(starts)
+                        if chars is None or chr(o) in chars)
+            if key not in candidates:
+                candidates[key] = tuple(rules[i] for i in key)
+            column.append(candidates[key])
+        table[state] = column
+    return table
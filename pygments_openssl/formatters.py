@@ -0,0 +1,187 @@
+"""HTML and terminal formatters for OpenSSL configuration files
+
+The formatters produce the same output as HtmlFormatter and
+TerminalFormatter. The markup of the token types produced by the lexers
+is computed up front, and lines are assembled from pre-escaped segments
+and written with one join.
+"""
+
+from pygments.console import ansiformat
+from pygments.formatters.html import HtmlFormatter
+from pygments.formatters.terminal import TerminalFormatter
+from pygments.token import Comment, Error, Keyword, Name, Operator, String, Text
+
+from pygments_openssl.lexer import T_LHS, T_RHS, T_SPACE, T_KNOWNDIR, T_KNOWNNAME
+
+# Token types produced by the lexers
+TOKEN_TYPES = (
+    Text, T_SPACE, Error, Comment, Operator, Keyword, T_KNOWNNAME, T_KNOWNDIR,
+    T_LHS, T_RHS, String.Double, String.Single, String.Escape,
+    Name.Variable, Name.Constant, Name.Function,
+)
+
+# Stand-in for the token text when computing markup
+MARKER = u'\x00'
+
+# Characters HtmlFormatter may escape, depending on the Pygments version
+ESCAPE_CHARS = u'&<>"\''
+
+# Token values up to this length are escaped or colored once per
+# formatter, up to this number of distinct values
+ESCAPE_LENGTH = 64
+ESCAPE_CACHE_SIZE = 10000
+
+
+class OpenSSLHtmlFormatter(HtmlFormatter):
+    """HtmlFormatter with precomputed span openers.
+
+    Accepts the options of HtmlFormatter. With the ``tagsfile`` option
+    tokens are formatted by HtmlFormatter itself.
+    """
+
+    name = 'OpenSSL HTML'
+    aliases = ['openssl-html']
+    filenames = []
+
+    def __init__(self, **options):
+        super(OpenSSLHtmlFormatter, self).__init__(**options)
+        self.openers = {}
+        self.escaped = {}
+        self.table = self.escape_table()
+        for ttype in TOKEN_TYPES:
+            self.openers[ttype] = self.span_opener(ttype)
+
+    def span_opener(self, ttype):
+        # Let HtmlFormatter format a marker to find out
+        line = ''.join(piece for t, piece in HtmlFormatter._format_lines(self, [(ttype, MARKER)]))
+        return line.split(MARKER)[0]
+
+    def escape_table(self):
+        # Let HtmlFormatter escape the characters between markers to find
+        # out how the installed version escapes them
+        table = {}
+        for char in ESCAPE_CHARS:
+            tokens = [(Text, MARKER + char + MARKER)]
+            line = ''.join(piece for t, piece in HtmlFormatter._format_lines(self, tokens))
+            table[ord(char)] = line.split(MARKER)[1]
+        return table
+
+    def _format_lines(self, tokensource):
+        if self.tagsfile:
+            return HtmlFormatter._format_lines(self, tokensource)
+        return self.format_lines(tokensource)
+
+    def format_lines(self, tokensource):
+        openers = self.openers
+        escaped = self.escaped
+        lsep = self.lineseparator
+        table = self.table
+
+        lspan = ''
+        line = []
+        for ttype, value in tokensource:
+            try:
+                cspan = openers[ttype]
+            except KeyError:
+                cspan = openers[ttype] = self.span_opener(ttype)
+
+            try:
+                value = escaped[value]
+            except KeyError:
+                if len(value) <= ESCAPE_LENGTH and len(escaped) < ESCAPE_CACHE_SIZE:
+                    value = escaped[value] = value.translate(table)
+                else:
+                    value = value.translate(table)
+            if '\n' in value:
+                parts = value.split('\n')
+                # For all but the last line
+                for part in parts[:-1]:
+                    if line:
+                        if lspan != cspan and part:
+                            line.extend(((lspan and '</span>'), cspan, part,
+                                         (cspan and '</span>'), lsep))
+                        else:
+                            line.extend((part, (lspan and '</span>'), lsep))
+                        yield 1, ''.join(line)
+                        line = []
+                    elif part:
+                        yield 1, ''.join((cspan, part, (cspan and '</span>'), lsep))
+                    else:
+                        yield 1, lsep
+                value = parts[-1]
+
+            # For the last line
+            if value:
+                if not line:
+                    line = [cspan, value]
+                    lspan = cspan
+                elif lspan != cspan:
+                    line.extend(((lspan and '</span>'), cspan, value))
+                    lspan = cspan
+                else:
+                    line.append(value)
+
+        if line:
+            line.extend(((lspan and '</span>'), lsep))
+            yield 1, ''.join(line)
+
+
+class OpenSSLTerminalFormatter(TerminalFormatter):
+    """TerminalFormatter with precomputed color sequences.
+
+    Accepts the options of TerminalFormatter. With the ``linenos`` option
+    tokens are formatted by TerminalFormatter itself.
+    """
+
+    name = 'OpenSSL Terminal'
+    aliases = ['openssl-terminal']
+    filenames = []
+
+    def __init__(self, **options):
+        super(OpenSSLTerminalFormatter, self).__init__(**options)
+        self.sequences = {}
+        self.formatted = {}
+        for ttype in TOKEN_TYPES:
+            self.sequences[ttype] = self.color_sequences(ttype)
+
+    def color_sequences(self, ttype):
+        # Return the (start, end) sequences of a token type, or None
+        color = self._get_color(ttype)
+        if color:
+            return tuple(ansiformat(color, MARKER).split(MARKER))
+        return None
+
+    def format_unencoded(self, tokensource, outfile):
+        if self.linenos:
+            return TerminalFormatter.format_unencoded(self, tokensource, outfile)
+
+        sequences = self.sequences
+        formatted = self.formatted
+        out = []
+        for ttype, value in tokensource:
+            try:
+                out.append(formatted[ttype, value])
+                continue
+            except KeyError:
+                pass
+            try:
+                colors = sequences[ttype]
+            except KeyError:
+                colors = sequences[ttype] = self.color_sequences(ttype)
+
+            pieces = []
+            for line in value.splitlines(True):
+                if line.endswith('\n'):
+                    if colors:
+                        pieces.extend((colors[0], line.rstrip('\n'), colors[1], '\n'))
+                    else:
+                        pieces.extend((line.rstrip('\n'), '\n'))
+                elif colors:
+                    pieces.extend((colors[0], line, colors[1]))
+                else:
+                    pieces.append(line)
+            piece = ''.join(pieces)
+            if len(value) <= ESCAPE_LENGTH and len(formatted) < ESCAPE_CACHE_SIZE:
+                formatted[ttype, value] = piece
+            out.append(piece)
+        outfile.write(''.join(out))
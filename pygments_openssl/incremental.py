@@ -0,0 +1,187 @@
+"""Incremental lexing of OpenSSL configuration files
+
+The incremental lexer records the state stack at the start of each line.
+After an edit it re-lexes from the last line whose preceding tokens were
+not affected by the edit, and stops as soon as the state stack agrees
+with the previous run at a line start behind the edit. The remaining
+tokens are reused.
+"""
+
+import sys
+
+from bisect import bisect_left
+
+from pygments_openssl.lexer import OpenSSLConfLexer, T_RHS, merge_tokens
+
+# Horizon of a token whose lexing depended on the rest of the file
+EOF = sys.maxsize
+
+# States which try to match quoted strings
+STRING_STATES = ('rhs', 'pragma', 'other', 'value')
+
+
+class IncrementalLexer(object):
+    """Keep the tokens of a text up to date while it is being edited.
+
+    ``lexer`` is an OpenSSLConfLexer or OpenSSLConfScannerLexer instance.
+    The text is lexed as is, i.e. without the preprocessing done by
+    ``get_tokens``.
+    """
+
+    def __init__(self, text='', lexer=None, stack=('root',)):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.stack = tuple(stack)
+        self.text = ''
+        # One entry per checkpoint: position of the line start, state
+        # stack at that position, horizon of the tokens up to the next
+        # checkpoint, and the tokens themselves.
+        self.positions = []
+        self.stacks = []
+        self.horizons = []
+        self.segments = []
+        self.update(text)
+
+    def update(self, text):
+        """Replace the text and re-lex what changed.
+
+        Returns the (start, end) range of the new text which was re-lexed.
+        """
+        old = self.text
+        start = common_prefix(old, text)
+        end = len(old) - common_suffix(old[start:], text[start:])
+        return self.edit(start, end, text[start:len(text) - (len(old) - end)])
+
+    def edit(self, start, end, replacement):
+        """Replace ``text[start:end]`` with ``replacement`` and re-lex what
+        changed.
+
+        Returns the (start, end) range of the new text which was re-lexed.
+        """
+        old = self.text
+        start = max(0, min(start, len(old)))
+        end = max(start, min(end, len(old)))
+        text = self.text = old[:start] + replacement + old[end:]
+        delta = len(text) - len(old)
+
+        # Find the last checkpoint whose preceding tokens did not look at
+        # the changed text
+        k, reach = 0, 0
+        for i in range(len(self.positions)):
+            if self.positions[i] > start or reach > start:
+                break
+            k = i
+            reach = max(reach, self.horizons[i])
+
+        if self.positions:
+            pos, stack = self.positions[k], self.stacks[k]
+        else:
+            pos, stack = 0, self.stack
+
+        positions, stacks, horizons, segments, j = self.lex(
+            text, pos, stack, start + len(replacement), delta)
+
+        if j is None:
+            j = len(self.positions)
+            resync = len(text)
+        else:
+            resync = self.positions[j] + delta
+
+        self.positions[k:] = positions + [p + delta for p in self.positions[j:]]
+        self.stacks[k:] = stacks + self.stacks[j:]
+        self.horizons[k:] = horizons + [
+            h if h == EOF else h + delta for h in self.horizons[j:]]
+        self.segments[k:] = segments + self.segments[j:]
+        return pos, resync
+
+    def lex(self, text, pos, stack, limit, delta):
+        # Lex from a checkpoint until the state stack agrees with the old
+        # checkpoints at or after limit, or until the end of the text.
+        positions, stacks, horizons, segments = [], [], [], []
+        old_positions, old_stacks = self.positions, self.stacks
+        for position, stack, horizon, segment in scan_lines(self.lexer, text, pos, list(stack)):
+            if position >= limit:
+                j = bisect_left(old_positions, position - delta)
+                if j < len(old_positions) and old_positions[j] == position - delta \
+                        and old_stacks[j] == stack:
+                    return positions, stacks, horizons, segments, j
+            positions.append(position)
+            stacks.append(stack)
+            horizons.append(horizon)
+            segments.append(segment)
+        return positions, stacks, horizons, segments, None
+
+    def get_tokens_unprocessed(self):
+        """Return an iterable of (index, tokentype, value) tuples.
+        """
+        return merge_tokens(self.iter_tokens())
+
+    def get_tokens(self):
+        """Return an iterable of (tokentype, value) tuples.
+        """
+        for index, ttype, value in self.get_tokens_unprocessed():
+            yield ttype, value
+
+    def iter_tokens(self):
+        for pos, segment in zip(self.positions, self.segments):
+            for ttype, value in segment:
+                yield pos, ttype, value
+                pos += len(value)
+
+
+def scan_lines(lexer, text, pos, stack):
+    """Lex ``text`` from the line start ``pos`` and yield a (position,
+    stack, horizon, tokens) tuple for every line start which is also
+    a token boundary.
+
+    ``stack`` is the state stack at ``position`` and ``tokens`` is the
+    list of unmerged (tokentype, value) tuples up to the next line start
+    yielded. Lexing these tokens did not look at text at or beyond
+    ``horizon``. The ``stack`` argument is a list and is updated in place.
+    """
+    position = None
+    lineend = -1
+    for index, ttype, value in lexer.scan(text, pos, stack):
+        if index == 0 or text[index-1] == '\n':
+            if position is not None:
+                yield position, current, horizon, segment
+            position, current, horizon, segment = index, tuple(stack), 0, []
+
+        segment.append((ttype, value))
+
+        # A rule can look at the rest of the line, or the rest of the
+        # file for an unterminated quoted string
+        if index > lineend:
+            lineend = text.find('\n', index)
+            if lineend < 0:
+                lineend = len(text)
+        end = index + len(value)
+        if ttype is T_RHS and value[0] in '"\'' and stack[-1] in STRING_STATES:
+            horizon = EOF
+        elif end >= horizon or lineend >= horizon:
+            horizon = max(end, lineend) + 1
+
+    if position is not None:
+        yield position, current, horizon, segment
+
+
+def common_prefix(a, b):
+    # Binary search comparing slices
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix(a, b):
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a)-mid:] == b[len(b)-mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
@@ -3,17 +3,23 @@
 With inspiration from IniLexer and BashLexer.
 """
 
+import re
+
 from pygments.lexer import Lexer, LexerContext, RegexLexer, ExtendedRegexLexer, \
     bygroups, include, using, this, do_insertions, default
 from pygments.token import Punctuation, Text, Comment, Keyword, Name, String, \
-    Generic, Operator, Number, Whitespace, Literal
+    Generic, Operator, Number, Whitespace, Literal, Error, _TokenType
+from pygments.util import get_bool_opt
+
+from pygments_openssl.dispatch import dispatch_table, release
 
 T_LHS = Name.Attribute
 T_RHS = String
 
 # Pygments 2.11 changed the whitespace token type
-from pygments import lex, lexers
-T_SPACE = list(lex(' ', lexers.get_lexer_by_name('ini')))[0][0]
+import pygments
+pygments_version_info = tuple(map(int, pygments.__version__.split('.')[:2]))
+T_SPACE = Whitespace if pygments_version_info >= (2, 11) else Text
 
 T_NUMBER = T_RHS
 T_EMAIL = T_RHS
@@ -27,8 +33,56 @@ T_KNOWNNAME = Keyword.Pseudo
 T_OTHERNAME = T_RHS
 
 
+def merge_tokens(tokens):
+    """Merge consecutive (index, tokentype, value) tuples of the same type.
+    """
+    index, ttype, value = 0, None, ''
+    for i, t, v in tokens:
+        if t is ttype:
+            value += v
+        else:
+            if ttype is not None:
+                yield index, ttype, value
+            index, ttype, value = i, t, v
+    if ttype is not None:
+        yield index, ttype, value
+
+
+NAME_RUN = re.compile(r'[\w-]*').match
+
+
+def end_of_text(text, pos):
+    return len(text)
+
+
+def end_of_line(text, pos):
+    end = text.find('\n', pos)
+    return end if end >= 0 else len(text)
+
+
+def end_of_name(text, pos):
+    return NAME_RUN(text, pos).end()
+
+
+# Rules that scan ahead, with the position up to which they keep failing
+# once they failed where they can start: a string without closing quote or
+# a comment without newline has none further on either, a header is
+# missing its "]" at the end of the line, and a pragma name its colon at
+# the end of the name.
+GUARDS = {
+    r'#.*(?=\n)': (end_of_text, re.compile(r'#').match),
+    r'\[.*?\](?=\n)': (end_of_line, re.compile(r'\[').match),
+    r'(?s)"[^"\\]*(?:\\.[^"\\]*)*"': (end_of_text, re.compile(r'"').match),
+    r"(?s)'[^'\\]*(?:\\.[^'\\]*)*'": (end_of_text, re.compile(r"'").match),
+    r'([\w-]+)([^\S\n]*)(:)([^\S\n]*)': (end_of_name, re.compile(r'[\w-]').match),
+}
+
+
 class OpenSSLConfLexer(RegexLexer):
     """Pygments lexer for OpenSSL configuration files.
+
+    Pass ``profile=True`` to collect per-state and per-rule match
+    statistics in ``lexer.profile``.
     """
 
     name = 'OpenSSL'
@@ -36,6 +90,9 @@ class OpenSSLConfLexer(RegexLexer):
     filenames = ['*.cnf', '*.conf']
     mimetypes = ['text/x-openssl']
 
+    # (tokendefs, table) built by build_dispatch
+    _dispatch = None
+
     tokens = {
         'comment': [
             # Comment
@@ -43,9 +100,9 @@ class OpenSSLConfLexer(RegexLexer):
         ],
         'string': [
             # Double-quoted string
-            (r'(?s)"(\\\\|\\[0-7]+|\\.|[^"\\])*"', String.Double),
+            (r'(?s)"[^"\\]*(?:\\.[^"\\]*)*"', String.Double),
             # Single-quoted string
-            (r"(?s)'(\\\\|\\[0-7]+|\\.|[^'\\])*'", String.Single),
+            (r"(?s)'[^'\\]*(?:\\.[^'\\]*)*'", String.Single),
         ],
         'variable': [
             # Variable name inside curly braces
@@ -119,16 +176,18 @@ class OpenSSLConfLexer(RegexLexer):
             (r'\\(?=\n)', String.Escape),
             # Whitespace
             (r'\s+', T_SPACE),
-            # Catch all
-            (r'.', T_LHS),
+            # Catch all, plus any following characters that cannot
+            # start another rule
+            (r'.[^\s\w#\[.;=\\-]*', T_LHS),
         ],
         'rhs-default': [
             # Line continuation
             (r'\\(?=\n)', String.Escape),
             # Whitespace
             (r'\s+', T_SPACE),
-            # Catch all
-            (r'.', T_RHS),
+            # Catch all, plus any following characters that cannot
+            # start another rule
+            (r'.(?:(?<=\w)\w*)?[^\s\w#"\'$@\\-]*', T_RHS),
         ],
         'root': [
             include('comment'),
@@ -171,7 +230,7 @@ class OpenSSLConfLexer(RegexLexer):
             include('string'),
             include('variable'),
             # OID
-            (r'(?<=\W)\d+\.(?:\d+\.?)*(?=\W)', Name.Function),
+            (r'(?<=\W)\d+\.(?:\d+\.)*\d*(?=\W)', Name.Function),
             include('number'),
             # Section reference
             (r'(?<=\W)\@\w+', Name.Constant),
@@ -216,11 +275,206 @@ class OpenSSLConfLexer(RegexLexer):
 
     def __init__(self, **options):
         super(OpenSSLConfLexer, self).__init__(**options)
-        # Always apply tokenmerge filter
-        self.add_filter('tokenmerge')
+        self.profile = None
+        if get_bool_opt(options, 'profile', False):
+            from pygments_openssl.profiling import LexerProfile
+            self.profile = LexerProfile(self)
+
+    @classmethod
+    def precompile(cls):
+        """Compile the tokendefs now rather than on first instantiation.
+
+        Call this in a pre-fork master process so that workers start with
+        the compiled table.
+        """
+        if '_tokens' not in cls.__dict__:
+            cls()
+        return cls._tokens
+
+    def build_dispatch(self):
+        """Build the first-character dispatch table of the tokendefs.
+
+        The table is stored on the class, or on the instance if it has
+        tokendefs of its own, as when profiling.
+        """
+        cls = type(self)
+        table = dispatch_table(self._tokens, cls.precompile(), GUARDS)
+        if self._tokens is cls._tokens:
+            cls._dispatch = (self._tokens, table)
+            return cls._dispatch
+        self._dispatch = (self._tokens, table)
+        return self._dispatch
+
+    def get_tokens_unprocessed(self, text, stack=('root',)):
+        return merge_tokens(self.scan(text, 0, list(stack)))
+
+    def get_token_array(self, text, stack=('root',)):
+        """Return the tokens of ``text`` as a TokenArray.
+
+        Holds the same tokens as get_tokens_unprocessed in a fraction of
+        the memory.
+        """
+        from pygments_openssl.columnar import TokenArray
+        return TokenArray.from_tokens(text, self.scan(text, 0, list(stack)))
+
+    def get_line_tokens(self, text, first, last, index=None):
+        """Return an iterable of (index, tokentype, value) tuples for lines
+        ``first`` to ``last`` of ``text``, counting from 1.
+
+        ``index`` is an optional LineIndex of the text. See
+        pygments_openssl.viewport.
+        """
+        from pygments_openssl.viewport import lex_lines
+        return lex_lines(self, text, first, last, index)
+
+    def scan(self, text, pos, stack):
+        """Yield unmerged (index, tokentype, value) tuples starting at
+        ``pos``. The state ``stack`` is a list and is updated in place.
+        """
+        tokendefs = self._tokens
+        dispatch = self._dispatch
+        if dispatch is None or dispatch[0] is not tokendefs:
+            dispatch = self.build_dispatch()
+        dispatch = dispatch[1]
+        statetokens = tokendefs[stack[-1]]
+        statedispatch = dispatch[stack[-1]]
+        end = len(text)
+        try:
+            while 1:
+                # Only try the rules that can match the current character
+                if pos < end:
+                    o = ord(text[pos])
+                    rules = statedispatch[o] if o < 128 else statetokens
+                else:
+                    rules = statetokens
+                for rexmatch, action, new_state in rules:
+                    m = rexmatch(text, pos)
+                    if m:
+                        if action is not None:
+                            if type(action) is _TokenType:
+                                yield pos, action, m.group()
+                            else:
+                                for item in action(self, m):
+                                    yield item
+                        pos = m.end()
+                        if new_state is not None:
+                            # State transition
+                            if isinstance(new_state, tuple):
+                                for state in new_state:
+                                    if state == '#pop':
+                                        if len(stack) > 1:
+                                            stack.pop()
+                                    elif state == '#push':
+                                        stack.append(stack[-1])
+                                    else:
+                                        stack.append(state)
+                            elif isinstance(new_state, int):
+                                # Pop, but keep at least one state on the stack
+                                if abs(new_state) >= len(stack):
+                                    del stack[1:]
+                                else:
+                                    del stack[new_state:]
+                            elif new_state == '#push':
+                                stack.append(stack[-1])
+                            statetokens = tokendefs[stack[-1]]
+                            statedispatch = dispatch[stack[-1]]
+                        break
+                else:
+                    # No rule matched
+                    if pos >= len(text):
+                        break
+                    if text[pos] == '\n':
+                        # At EOL, reset state to root
+                        stack[:] = ['root']
+                        statetokens = tokendefs['root']
+                        statedispatch = dispatch['root']
+                        yield pos, T_SPACE, '\n'
+                    else:
+                        yield pos, Error, text[pos]
+                    pos += 1
+        finally:
+            # Do not keep the text alive in guards, also when the
+            # generator is abandoned before the end of the text
+            release(text)
 
     def analyse_text(text):
-        npos = text.find('\n')
-        if npos < 3:
-            return False
-        return text[0] == '[' and text[npos-1] == ']'
+        return analyse_lines(text)
+
+
+# Bounds and patterns for analyse_text
+ANALYSE_SIZE = 8192
+ANALYSE_LINES = 100
+
+ANALYSE_LINE = re.compile(r"""
+    ^[^\S\n]*(?:
+        (?P<section>\[[^\S\n]*[\w.$-]+[^\S\n]*\][^\S\n]*(?:\#.*)?)
+      | (?P<directive>\.(?:include|pragma)(?=[\s=]).*)
+      | (?P<assignment>(?P<key>[\w.;-]+(?:::[\w.;-]+)?)[^\S\n]*=(?P<value>.*))
+      | (?P<comment>[#;].*)
+      | (?P<blank>)
+      | (?P<other>.+)
+    )$""", re.M | re.I | re.X)
+
+KNOWN_KEYS = re.compile(r"""
+    (?:openssl_conf|oid_section|default_ca|distinguished_name|
+       x509_extensions|req_extensions|copy_extensions|default_md|
+       default_bits|default_days|basicConstraints|keyUsage|
+       extendedKeyUsage|subjectAltName|subjectKeyIdentifier|
+       authorityKeyIdentifier|crlDistributionPoints|certificatePolicies|
+       private_key|certificate|new_certs_dir|crl_dir|RANDFILE|
+       string_mask|prompt|policy|unique_subject|nameConstraints)$""", re.X)
+
+# Variable references, with and without section
+ANALYSE_VARIABLE = re.compile(r"""
+    \$(?:\{[\w.]+(?P<braced>::[\w.]+)?\}|\([\w.]+(?P<parens>::[\w.]+)?\)|\w+(?P<plain>::\w+)?)""", re.X)
+
+
+def analyse_lines(text):
+    """Score ``text`` by the lines in its first ``ANALYSE_SIZE`` characters.
+
+    Only evidence specific to OpenSSL scores: ``.include`` and ``.pragma``
+    directives, well-known OpenSSL keys, and variable references naming a
+    section. Sections, assignments, and plain variable references, which
+    are common to INI, shell, and properties files, add to the score only
+    in the presence of such evidence. Text with more than a quarter of
+    unrecognized lines scores zero.
+    """
+    head = text[:ANALYSE_SIZE]
+    if len(text) > ANALYSE_SIZE:
+        # Do not judge a truncated line
+        head = head[:head.rfind('\n') + 1]
+    counts = dict(section=0, directive=0, assignment=0, comment=0, blank=0, other=0)
+    known = lines = variables = qualified = 0
+    for m in ANALYSE_LINE.finditer(head):
+        kind = m.lastgroup
+        if kind == 'assignment':
+            if KNOWN_KEYS.match(m.group('key')):
+                known += 1
+            for v in ANALYSE_VARIABLE.finditer(m.group('value')):
+                if v.group('braced') or v.group('parens') or v.group('plain'):
+                    qualified += 1
+                else:
+                    variables += 1
+        counts[kind] += 1
+        lines += 1
+        if lines >= ANALYSE_LINES:
+            break
+    total = counts['section'] + counts['directive'] + counts['assignment'] + counts['other']
+    if not total or counts['other'] * 4 > total:
+        return 0.0
+    score = 0.0
+    if counts['directive']:
+        score += 0.4
+    if known:
+        score += min(known, 3) * 0.2
+    if qualified:
+        score += 0.4
+    if not score:
+        return 0.0
+    if counts['assignment']:
+        score += 0.1
+    if counts['section']:
+        score += 0.1
+    if variables and not qualified:
+        score += 0.2
+    return min(score, 1.0)
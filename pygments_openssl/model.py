@@ -0,0 +1,267 @@
+"""Document model of OpenSSL configuration files
+
+The parser builds sections, entries, directives and variable references
+while lexing, from the tokens and the state stack of the lexer's scan.
+Nodes use __slots__ and refer to the text by offsets; substrings are only
+created when a property such as ``key`` or ``value`` is accessed.
+"""
+
+import re
+
+from pygments.token import Comment, Keyword, Name, Operator, String
+
+from pygments_openssl.lexer import OpenSSLConfLexer, T_LHS, T_KNOWNDIR, T_SPACE, merge_tokens
+
+# A T_LHS token starting a directive, as opposed to a left hand side
+DIRECTIVE = re.compile(r'\.[\w-]+\Z')
+
+
+class Node(object):
+    """Base class of nodes, spanning ``text[start:end]``.
+    """
+
+    __slots__ = ('text', 'start', 'end')
+
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+    @property
+    def source(self):
+        return self.text[self.start:self.end]
+
+    def __repr__(self):
+        return '<%s %d:%d %r>' % (self.__class__.__name__, self.start, self.end, self.source)
+
+
+class Document(Node):
+    """The parsed text, a list of sections.
+
+    The first section holds the entries before the first section header
+    and has no header.
+    """
+
+    __slots__ = ('sections',)
+
+    def __init__(self, text):
+        super(Document, self).__init__(text, 0, len(text))
+        self.sections = [Section(text, 0, 0, 'default')]
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def find(self, name):
+        """Return the sections called ``name``.
+        """
+        return [s for s in self.sections if s.name == name]
+
+    def lookup(self, section, key):
+        """Return the last entry for ``key`` in the sections called
+        ``section``, or None.
+        """
+        found = None
+        for s in self.find(section):
+            for entry in s.entries:
+                if entry.key == key:
+                    found = entry
+        return found
+
+
+class Section(Node):
+    """A section header and the entries and directives following it.
+    """
+
+    __slots__ = ('header_end', 'name', 'items')
+
+    def __init__(self, text, start, header_end, name):
+        super(Section, self).__init__(text, start, header_end)
+        self.header_end = header_end
+        self.name = name
+        self.items = []
+
+    @property
+    def header(self):
+        return self.text[self.start:self.header_end] or None
+
+    @property
+    def entries(self):
+        return [item for item in self.items if type(item) is Entry]
+
+    @property
+    def directives(self):
+        return [item for item in self.items if type(item) is Directive]
+
+
+class Item(Node):
+    """Base class of entries and directives.
+
+    The key spans ``text[key_start:key_end]`` and the value, without
+    surrounding whitespace and comments, ``text[value_start:value_end]``.
+    """
+
+    __slots__ = ('key_start', 'key_end', 'value_start', 'value_end', 'variables')
+
+    def __init__(self, text, key_start, key_end, value_start):
+        super(Item, self).__init__(text, key_start, value_start)
+        self.key_start = key_start
+        self.key_end = key_end
+        self.value_start = self.value_end = value_start
+        self.variables = ()
+
+    @property
+    def key(self):
+        return self.text[self.key_start:self.key_end]
+
+    @property
+    def value(self):
+        return self.text[self.value_start:self.value_end]
+
+
+class Entry(Item):
+    """A ``key = value`` line.
+    """
+
+    __slots__ = ()
+
+
+class Directive(Item):
+    """A ``.include`` or ``.pragma`` line. The key is the directive name.
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.key
+
+
+class VariableRef(Node):
+    """A ``$var``, ``$section::var``, ``${var}`` or ``$(var)`` reference.
+    ``name`` is None if the braces hold no name.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, text, start, end, name=None):
+        super(VariableRef, self).__init__(text, start, end)
+        self.name = name
+
+    @property
+    def section(self):
+        # The section part of section::name, or None
+        if self.name and '::' in self.name:
+            return self.name.split('::', 1)[0]
+        return None
+
+    @property
+    def variable(self):
+        if self.name and '::' in self.name:
+            return self.name.split('::', 1)[1]
+        return self.name
+
+
+class Parser(object):
+    """Build a Document while lexing.
+
+    ``lexer`` is an OpenSSLConfLexer or OpenSSLConfScannerLexer instance.
+    The text is lexed as is, i.e. without the preprocessing done by
+    ``get_tokens``.
+    """
+
+    def __init__(self, lexer=None):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.document = None
+
+    def parse(self, text):
+        """Return the Document for ``text``.
+        """
+        for token in self.scan(text):
+            pass
+        return self.document
+
+    def get_tokens_unprocessed(self, text):
+        """Return an iterable of (index, tokentype, value) tuples. Once it
+        is exhausted, ``parser.document`` holds the Document for ``text``.
+        """
+        return merge_tokens(self.scan(text))
+
+    def scan(self, text):
+        document = self.document = Document(text)
+        section = document.sections[0]
+        stack = ['root']
+        key = None
+        item = ref = None
+        inside = False
+
+        for index, ttype, value in self.lexer.scan(text, 0, stack):
+            end = index + len(value)
+            if len(stack) > 1:
+                # Right hand side of the current item
+                inside = True
+                if item is not None and ttype is not T_SPACE and ttype is not Comment \
+                        and ttype is not String.Escape:
+                    if item.value_start == item.value_end:
+                        item.value_start = index
+                    item.value_end = item.end = end
+                    if ttype is Name.Variable:
+                        if value in ('${', '$('):
+                            ref = VariableRef(text, index, end)
+                            add_variable(item, ref)
+                        elif ref is not None:
+                            ref.end = end
+                            if value in ('}', ')'):
+                                ref = None
+                            else:
+                                ref.name = value
+                        else:
+                            add_variable(item, VariableRef(text, index, end, value[1:]))
+                yield index, ttype, value
+                continue
+
+            if inside:
+                # Back in the root state
+                item = ref = None
+                inside = False
+            elif item is not None:
+                # Tokens of the rule which started the item
+                yield index, ttype, value
+                continue
+
+            if ttype is Keyword:
+                section.end = index
+                section = Section(text, index, end, value[1:-1].strip())
+                document.sections.append(section)
+                key = None
+            elif ttype is T_KNOWNDIR or ttype is T_LHS and DIRECTIVE.match(value):
+                item = Directive(text, index, end, end)
+                section.items.append(item)
+                key = None
+            elif ttype is Operator:
+                start = key[0] if key else index
+                item = Entry(text, start, key[1] if key else index, end)
+                section.items.append(item)
+                key = None
+            elif ttype is T_LHS:
+                key = (key[0] if key else index, end)
+            elif ttype is T_SPACE and '\n' in value:
+                key = None
+            yield index, ttype, value
+
+        section.end = len(text)
+
+
+def add_variable(item, ref):
+    if item.variables:
+        item.variables.append(ref)
+    else:
+        item.variables = [ref]
+
+
+def parse(text, lexer=None):
+    """Return the Document for ``text``.
+    """
+    return Parser(lexer).parse(text)
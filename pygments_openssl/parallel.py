@@ -0,0 +1,163 @@
+"""Parallel lexing of large OpenSSL configuration files
+
+The text is split at section headers, the chunks are lexed in a process
+pool, and the token streams are joined. A chunk's tokens are used only if
+the previous chunk ended in the root state and the chunk's tokens did not
+depend on text after its end. Otherwise lexing continues serially until
+the next chunk boundary reached in the root state.
+
+Worker processes create their own lexer from the lexer's class and
+options when they start, so that lexers work with every start method.
+With spawn, an unpickled lexer would lack the tokendefs compiled on
+first instantiation.
+"""
+
+import re
+import multiprocessing
+
+from pygments.token import string_to_tokentype
+
+from pygments_openssl.lexer import OpenSSLConfLexer, merge_tokens
+from pygments_openssl.incremental import scan_lines
+
+# Section header at the start of a line which is not a continued line
+HEADER = re.compile(r'(?<=[^\\]\n)\[.*\](?=\n)')
+
+ROOT = ('root',)
+
+
+class ParallelLexer(object):
+    """Lex large texts in a process pool.
+
+    ``lexer`` is an OpenSSLConfLexer or OpenSSLConfScannerLexer instance.
+    Texts are split into chunks of at least ``chunksize`` characters,
+    roughly four per process. With ``processes=1`` chunks are lexed in
+    the current process. ``context`` is the multiprocessing context of
+    the pool, by default the multiprocessing module.
+    """
+
+    def __init__(self, lexer=None, processes=None, chunksize=262144, context=None):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self.context = context or multiprocessing
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def map(self, func, jobs):
+        if self.processes == 1:
+            return [func(job, self.lexer) for job in jobs]
+        if self.pool is None:
+            self.pool = self.context.Pool(
+                self.processes, initializer=init_worker,
+                initargs=(type(self.lexer), self.lexer.options))
+        return self.pool.map(func, jobs, 1)
+
+    def get_tokens(self, text, stack=ROOT):
+        """Return an iterable of (tokentype, value) tuples.
+        """
+        for index, ttype, value in self.get_tokens_unprocessed(text, stack):
+            yield ttype, value
+
+    def get_tokens_unprocessed(self, text, stack=ROOT):
+        """Return an iterable of (index, tokentype, value) tuples.
+        """
+        bounds = self.split(text)
+        if len(bounds) < 3:
+            return self.lexer.get_tokens_unprocessed(text, stack)
+        return merge_tokens(self.join(text, bounds, tuple(stack)))
+
+    def split(self, text):
+        # Return chunk boundaries, including 0 and len(text)
+        size = max(self.chunksize, len(text) // (4 * self.processes))
+        bounds = [0]
+        while True:
+            m = HEADER.search(text, bounds[-1] + size)
+            if m is None:
+                break
+            bounds.append(m.start())
+        bounds.append(len(text))
+        return bounds
+
+    def join(self, text, bounds, stack):
+        jobs = []
+        for start, end in zip(bounds, bounds[1:]):
+            context = 1 if start else 0
+            jobs.append((text[start-context:end], context, stack if start == 0 else ROOT))
+        results = self.map(lex_chunk, jobs)
+        tokentypes = {}
+
+        def valid(j):
+            # True if the chunk's tokens did not look beyond its end. In the
+            # root state only whitespace runs look at the first character
+            # of the next chunk, a '[' which ends them like the end of text.
+            tokens, end, reach = results[j]
+            size = len(jobs[j][0])
+            return j == len(results) - 1 or reach <= size or reach == size + 1 and end == ROOT
+
+        i, current = 0, stack
+        while i < len(results):
+            tokens, end, reach = results[i]
+            if current == jobs[i][2] and valid(i):
+                offset = bounds[i] - jobs[i][1]
+                for index, ttype, value in tokens:
+                    if ttype not in tokentypes:
+                        tokentypes[ttype] = string_to_tokentype(ttype)
+                    yield offset + index, tokentypes[ttype], value
+                i, current = i + 1, end
+                continue
+
+            # Lex serially until a chunk boundary is reached in the root state
+            j = i + 1
+            for position, state, horizon, segment in scan_lines(
+                    self.lexer, text, bounds[i], list(current)):
+                while j < len(results) and bounds[j] < position:
+                    j += 1
+                if j < len(results) and position == bounds[j] and state == ROOT and valid(j):
+                    break
+                for ttype, value in segment:
+                    yield position, ttype, value
+                    position += len(value)
+            else:
+                return
+            i, current = j, ROOT
+
+
+# Lexer of a worker process
+worker_lexer = None
+
+
+def init_worker(cls, options):
+    global worker_lexer
+    worker_lexer = cls(**options)
+
+
+def lex_chunk(job, lexer=None):
+    """Lex a chunk with ``lexer``, by default the lexer of the worker
+    process.
+
+    Returns the merged tokens with token types as strings, the state
+    stack at the end of the chunk, and the horizon of the tokens.
+    """
+    text, context, stack = job
+    lexer = lexer if lexer is not None else worker_lexer
+    stack = list(stack)
+    tokens = []
+    reach = 0
+    for position, current, horizon, segment in scan_lines(lexer, text, context, stack):
+        reach = max(reach, horizon)
+        for ttype, value in segment:
+            tokens.append((position, ttype, value))
+            position += len(value)
+    return [(i, str(t), v) for i, t, v in merge_tokens(tokens)], tuple(stack), reach
@@ -0,0 +1,95 @@
+"""Per-state and per-rule profiling of OpenSSLConfLexer
+
+The profiler replaces the lexer instance's compiled tokendefs with a copy
+whose match functions count attempts, matches, and time spent. Lexers
+created without the ``profile`` option use the class's table unchanged.
+"""
+
+import timeit
+
+from pygments.lexer import include
+
+
+class LexerProfile(object):
+    """Collect match statistics for the rules of a RegexLexer instance.
+    """
+
+    def __init__(self, lexer, timer=timeit.default_timer):
+        self.lexer = lexer
+        self.timer = timer
+        self.rules = {}
+        tokendefs = {}
+        for state, rules in lexer.__class__.precompile().items():
+            labels = rule_labels(lexer.tokens, state)
+            stats = self.rules[state] = []
+            tokendefs[state] = []
+            for label, (rexmatch, action, new_state) in zip(labels, rules):
+                counters = [0, 0, 0.0]
+                stats.append((label, rexmatch.__self__.pattern, counters))
+                tokendefs[state].append((self.wrap(rexmatch, counters), action, new_state))
+        lexer._tokens = tokendefs
+
+    def wrap(self, rexmatch, counters):
+        timer = self.timer
+
+        def match(text, pos):
+            start = timer()
+            m = rexmatch(text, pos)
+            counters[2] += timer() - start
+            counters[0] += 1
+            if m:
+                counters[1] += 1
+            return m
+        return match
+
+    def reset(self):
+        for stats in self.rules.values():
+            for label, pattern, counters in stats:
+                counters[:] = [0, 0, 0.0]
+
+    def summary(self):
+        """Return the statistics as a dict keyed by state name.
+
+        Each state has totals for ``attempts``, ``matches`` and ``time``,
+        and a list of ``rules`` with the same keys plus the ``rule`` label
+        (the state defining it and its index there) and regex ``pattern``.
+        """
+        result = {}
+        for state, stats in self.rules.items():
+            rules = [dict(rule=label, pattern=pattern, attempts=counters[0],
+                          matches=counters[1], time=counters[2])
+                     for label, pattern, counters in stats]
+            result[state] = dict(
+                attempts=sum(r['attempts'] for r in rules),
+                matches=sum(r['matches'] for r in rules),
+                time=sum(r['time'] for r in rules),
+                rules=rules)
+        return result
+
+    def report(self):
+        """Return the statistics as a text table, busiest states first.
+        """
+        lines = ['%-24s %10s %10s %10s  %s' % ('state/rule', 'attempts', 'matches', 'ms', 'pattern')]
+        summary = self.summary()
+        for state in sorted(summary, key=lambda s: -summary[s]['time']):
+            s = summary[state]
+            if not s['attempts']:
+                continue
+            lines.append('%-24s %10d %10d %10.2f' % (
+                state, s['attempts'], s['matches'], s['time'] * 1000))
+            for r in s['rules']:
+                if r['attempts']:
+                    lines.append('  %-22s %10d %10d %10.2f  %s' % (
+                        r['rule'], r['attempts'], r['matches'], r['time'] * 1000, r['pattern']))
+        return '\n'.join(lines)
+
+
+def rule_labels(tokens, state):
+    # Label the rules of a state in the order RegexLexer flattens includes
+    labels = []
+    for i, tdef in enumerate(tokens[state]):
+        if isinstance(tdef, include):
+            labels.extend(rule_labels(tokens, str(tdef)))
+        else:
+            labels.append('%s:%d' % (state, i))
+    return labels
@@ -0,0 +1,273 @@
+"""Include and variable resolution of OpenSSL configuration files
+
+The resolver follows ``.include`` directives, files and directories, and
+substitutes ``$var``, ``$section::var``, ``${...}`` and ``$(...)``
+references with the values defined before them, like OpenSSL does when
+it loads a configuration. The result is a resolved view whose tokens can
+be passed to a formatter.
+
+Files are read and parsed once per FileCache, and again only when their
+modification time or size changes. Large files are decoded straight from
+a memory map.
+"""
+
+import codecs
+import mmap
+import os
+import re
+import threading
+
+from bisect import bisect_right
+
+from pygments_openssl.lexer import OpenSSLConfLexer, T_RHS, merge_tokens
+from pygments_openssl.model import Directive, Parser
+
+# File name extensions of files included from directories
+INCLUDE_EXTENSIONS = ('.cnf', '.conf')
+
+PRAGMA = re.compile(r'\s*(\w+)\s*:\s*(.*?)\s*\Z')
+
+
+class CachedFile(object):
+    """A file read and parsed by a FileCache.
+    """
+
+    __slots__ = ('path', 'stat', 'text', 'document', 'tokens', 'indices')
+
+    def __init__(self, path, stat, text, document, tokens):
+        self.path = path
+        self.stat = stat
+        self.text = text
+        self.document = document
+        self.tokens = tokens
+        self.indices = [index for index, ttype, value in tokens]
+
+    def get_tokens(self, start, end):
+        """Yield the (tokentype, value) tuples of ``text[start:end]``,
+        cutting the tokens at the edges.
+        """
+        tokens = self.tokens
+        i = max(0, bisect_right(self.indices, start) - 1)
+        while i < len(tokens):
+            index, ttype, value = tokens[i]
+            if index >= end:
+                break
+            if index + len(value) > start:
+                yield ttype, value[max(0, start - index):end - index]
+            i += 1
+
+
+class FileCache(object):
+    """Cache files read and parsed with ``lexer``.
+
+    Files of ``mmap_size`` bytes or more are memory mapped for decoding.
+    """
+
+    def __init__(self, lexer=None, encoding='utf-8', mmap_size=1 << 20):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.encoding = encoding
+        self.mmap_size = mmap_size
+        self.files = {}
+        self.lock = threading.Lock()
+        self.hits = self.reads = self.mapped = 0
+
+    def info(self):
+        """Return a dict of cache statistics.
+        """
+        with self.lock:
+            return dict(hits=self.hits, reads=self.reads, mapped=self.mapped,
+                        currsize=len(self.files))
+
+    def clear(self):
+        with self.lock:
+            self.files.clear()
+            self.hits = self.reads = self.mapped = 0
+
+    def get(self, path):
+        """Return the CachedFile for ``path``. Raises IOError or OSError
+        if the file cannot be read.
+        """
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        stat = (st.st_mtime, st.st_size)
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached.stat == stat:
+                self.hits += 1
+                return cached
+
+        text = self.read(path, st.st_size)
+        parser = Parser(self.lexer)
+        tokens = list(parser.get_tokens_unprocessed(text))
+        cached = CachedFile(path, stat, text, parser.document, tokens)
+        with self.lock:
+            self.files[path] = cached
+            self.reads += 1
+        return cached
+
+    def read(self, path, size):
+        with open(path, 'rb') as f:
+            if size < self.mmap_size:
+                return f.read().decode(self.encoding, 'replace')
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with self.lock:
+                    self.mapped += 1
+                return codecs.getdecoder(self.encoding)(m, 'replace')[0]
+            finally:
+                m.close()
+
+
+class Resolved(object):
+    """The resolved view of a configuration file.
+
+    ``values`` maps section names to dicts of resolved values, ``files``
+    lists the files read in include order, and ``errors`` lists problems
+    such as missing include files and undefined variables as (path,
+    offset, message) tuples.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.values = {}
+        self.files = []
+        self.errors = []
+        # Pieces of the view: a (CachedFile, start, end) range, or a
+        # (None, text, None) substitution
+        self.pieces = []
+        # State while resolving
+        self.section = 'default'
+        self.pragmas = {}
+        self.including = []
+
+    @property
+    def text(self):
+        return ''.join(
+            f.text[start:end] if f is not None else start
+            for f, start, end in self.pieces)
+
+    def get_tokens(self):
+        """Return an iterable of (tokentype, value) tuples for the resolved
+        view. Substituted values are String tokens.
+        """
+        return ((ttype, value) for index, ttype, value in merge_tokens(self.iter_tokens()))
+
+    def iter_tokens(self):
+        for f, start, end in self.pieces:
+            if f is None:
+                yield 0, T_RHS, start
+            else:
+                for ttype, value in f.get_tokens(start, end):
+                    yield 0, ttype, value
+
+    def lookup(self, section, name):
+        """Return the resolved value of ``name`` in ``section``, or None.
+        """
+        return self.values.get(section, {}).get(name)
+
+
+class Resolver(object):
+    """Resolve configuration files, sharing ``cache`` between them.
+
+    Relative include paths are resolved against the ``includedir`` pragma
+    or, failing that, the directory of the including file. Variables of
+    the ``ENV`` section are looked up in ``environ``.
+    """
+
+    def __init__(self, cache=None, environ=None, lexer=None):
+        self.cache = cache if cache is not None else FileCache(lexer)
+        self.environ = environ if environ is not None else os.environ
+
+    def resolve(self, path):
+        """Return the Resolved view of the file at ``path``.
+        """
+        resolved = Resolved(path)
+        resolved.values['default'] = {}
+        self.walk(self.cache.get(path), resolved)
+        return resolved
+
+    def walk(self, f, resolved):
+        resolved.files.append(f.path)
+        resolved.including.append(f.path)
+        pieces = resolved.pieces
+        pos = 0
+        for s in f.document:
+            if s.header is not None:
+                resolved.section = s.name
+                resolved.values.setdefault(s.name, {})
+            for item in s.items:
+                if type(item) is Directive:
+                    end = f.text.find('\n', item.end)
+                    end = len(f.text) if end < 0 else end + 1
+                    pieces.append((f, pos, end))
+                    pos = end
+                    self.directive(f, item, resolved)
+                    continue
+                parts, start = [], item.value_start
+                for ref in item.variables:
+                    value = self.variable(ref, resolved)
+                    if value is None:
+                        resolved.errors.append((f.path, ref.start, 'undefined variable %s' % ref.source))
+                        continue
+                    parts.extend((f.text[start:ref.start], value))
+                    start = ref.end
+                    pieces.extend(((f, pos, ref.start), (None, value, None)))
+                    pos = ref.end
+                parts.append(f.text[start:item.value_end])
+                resolved.values[resolved.section][item.key] = ''.join(parts)
+        pieces.append((f, pos, len(f.text)))
+        if f.text and not f.text.endswith('\n'):
+            pieces.append((None, '\n', None))
+        resolved.including.pop()
+
+    def directive(self, f, item, resolved):
+        name, value = item.key.lower(), unquote(item.value)
+        if name == '.pragma':
+            m = PRAGMA.match(value)
+            if m is not None:
+                resolved.pragmas[m.group(1)] = m.group(2)
+            return
+        if name != '.include' or not value:
+            return
+
+        if not os.path.isabs(value):
+            if resolved.pragmas.get('abspath', '').lower() in ('true', 'on'):
+                resolved.errors.append((f.path, item.start, 'relative include %s' % value))
+                return
+            base = resolved.pragmas.get('includedir') or os.path.dirname(f.path)
+            value = os.path.join(base, value)
+
+        if os.path.isdir(value):
+            paths = [os.path.join(value, name) for name in sorted(os.listdir(value))
+                     if name.endswith(INCLUDE_EXTENSIONS)]
+        else:
+            paths = [value]
+        for path in paths:
+            if os.path.realpath(path) in resolved.including:
+                resolved.errors.append((f.path, item.start, 'include cycle %s' % path))
+                continue
+            try:
+                included = self.cache.get(path)
+            except (IOError, OSError):
+                resolved.errors.append((f.path, item.start, 'cannot read %s' % path))
+                continue
+            self.walk(included, resolved)
+
+    def variable(self, ref, resolved):
+        if ref.name is None:
+            return None
+        scope, name = ref.section, ref.variable
+        if scope == 'ENV':
+            return self.environ.get(name)
+        if scope is not None:
+            return resolved.lookup(scope, name)
+        value = resolved.lookup(resolved.section, name)
+        if value is None:
+            value = resolved.lookup('default', name)
+        return value
+
+
+def unquote(value):
+    if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
@@ -0,0 +1,419 @@
+"""Hand-written scanner for OpenSSL configuration files
+
+The scanner implements the states of OpenSSLConfLexer as an explicit
+state machine. Instead of trying every rule of the current state in turn,
+it looks at the current character and attempts only the rules that can
+start with it. The token stream is identical to that of OpenSSLConfLexer.
+
+Since OpenSSLConfLexer dispatches on the current character as well, the
+two lexers run at about the same speed. The scanner is kept as a second,
+independent implementation of the grammar, against which the tests check
+the tokens of the regex-based lexer.
+"""
+
+import re
+
+from pygments.lexer import Lexer
+from pygments.token import Comment, Keyword, Name, String, Operator
+
+from pygments_openssl.lexer import T_LHS, T_RHS, T_SPACE, T_NUMBER, T_EMAIL, \
+    T_IP, T_HEX, T_KNOWNDIR, T_OTHERDIR, T_KNOWNNAME, T_OTHERNAME, merge_tokens
+
+
+class CharClass(dict):
+    """Memoizing character predicate with the semantics of a regex class.
+    """
+
+    def __init__(self, pattern):
+        self.match = re.compile(pattern).match
+
+    def __missing__(self, char):
+        result = self[char] = self.match(char) is not None
+        return result
+
+
+WORD = CharClass(r'\w')
+SPACE = CharClass(r'\s')
+DIGIT = CharClass(r'\d')
+NAME = CharClass(r'[\w-]')
+LHS = CharClass(r'[\w\.;-]')
+
+# Spans
+blanks = re.compile(r'[^\S\n]*').match
+spaces = re.compile(r'\s*').match
+lhs_run = re.compile(r'[\w\.;-]+').match
+lhs_default = re.compile(r'[^\s\w#\[.;=\\-]*').match
+rhs_default = re.compile(r'(?:(?<=\w)\w*)?[^\s\w#"\'$@\\-]*').match
+double_quoted = re.compile(r'(?s)"[^"\\]*(?:\\.[^"\\]*)*"').match
+single_quoted = re.compile(r"(?s)'[^'\\]*(?:\\.[^'\\]*)*'").match
+variable = re.compile(r'\$\w+(?:::\w+)?').match
+variable_name = re.compile(r'\w+(?:::\w+)?').match
+section_reference = re.compile(r'\@\w+').match
+oid = re.compile(r'\d+\.(?:\d+\.)*\d*(?=\W)').match
+float_ = re.compile(r'\d+\.\d+(?=\W)').match
+int_ = re.compile(r'\d+(?=\W)').match
+not_brace = re.compile(r'[^}]+').match
+not_paren = re.compile(r'[^)]+').match
+email = re.compile(r'[\w\.+-]+\@[\w\.-]+').match
+ip4 = re.compile(r'[\d\.]+').match
+ip6 = re.compile(r'[\da-fA-F:\.]+').match
+hex_ = re.compile(r'[\da-fA-F:]+').match
+
+# Rules with groups
+known_directive = re.compile(r'(?i)\.(?:(pragma)|include)').match
+other_directive = re.compile(r'\.[\w-]+').match
+email_tag = re.compile(r'(?i)(email)(?=\W)([^\S\n]*)(:)([^\S\n]*)').match
+ip_tag = re.compile(r'(?i)(IP)(?=\W)([^\S\n]*)(:)([^\S\n]*)').match
+der_tag = re.compile(r'(?i)(DER)(?=\W)([^\S\n]*)(:)([^\S\n]*)').match
+critical = re.compile(r'(?i)critical(?=\W)').match
+known_name = re.compile(
+    r'(?i)(abspath|dollarid|includedir)(?=\W)([^\S\n]*)(:)([^\S\n]*)').match
+other_name = re.compile(r'([\w-]+)([^\S\n]*)(:)([^\S\n]*)').match
+name_run = re.compile(r'[\w-]*').match
+
+TAG_TYPES = (T_RHS, T_SPACE, T_RHS, T_SPACE)
+KNOWN_NAME_TYPES = (T_KNOWNNAME, T_SPACE, Operator, T_SPACE)
+OTHER_NAME_TYPES = (T_OTHERNAME, T_SPACE, T_RHS, T_SPACE)
+
+VALUE_STATES = ('rhs', 'pragma', 'other', 'value')
+BRACE_STATES = {
+    'curly-brace': ('}', not_brace, 'close-brace', 1),
+    'close-brace': ('}', not_brace, None, 2),
+    'paren': (')', not_paren, 'close-paren', 1),
+    'close-paren': (')', not_paren, None, 2),
+}
+
+
+def pop(stack, count):
+    # Pop like RegexLexer, keeping at least one state on the stack
+    if count >= len(stack):
+        del stack[1:]
+    else:
+        del stack[-count:]
+
+
+def find_eol(text, pos):
+    # Return the position of the next newline, or len(text)
+    end = text.find('\n', pos)
+    return end if end >= 0 else len(text)
+
+
+def groups(match, types):
+    for i, ttype in enumerate(types):
+        data = match.group(i + 1)
+        if data:
+            yield match.start(i + 1), ttype, data
+
+
+class OpenSSLConfScannerLexer(Lexer):
+    """Pygments lexer for OpenSSL configuration files, using a hand-written
+    scanner instead of regular expression tokendefs.
+    """
+
+    name = 'OpenSSL (scanner)'
+    aliases = ['openssl-scanner']
+    filenames = []
+    mimetypes = []
+
+    @classmethod
+    def precompile(cls):
+        """Warm up the character class caches.
+
+        The scanner's patterns are compiled at import time. This is the
+        counterpart of OpenSSLConfLexer.precompile.
+        """
+        for char in 'azAZ09_-.;#[]{}()$@"\' \t\n\\=:':
+            for charclass in (WORD, SPACE, DIGIT, NAME, LHS):
+                charclass[char]
+
+    def get_tokens_unprocessed(self, text, stack=('root',)):
+        return merge_tokens(self.scan(text, 0, list(stack)))
+
+    def scan(self, text, pos, stack):
+        """Yield unmerged (index, tokentype, value) tuples starting at
+        ``pos``. The state ``stack`` is a list and is updated in place.
+        """
+        n = len(text)
+        # Where scanning ahead is known to fail, as with the GUARDS of
+        # OpenSSLConfLexer: the next newline, the quotes without closing
+        # quote, and the end of a pragma name without colon
+        eol = -1
+        no_double = no_single = n
+        no_name = -1
+
+        while pos < n:
+            state = stack[-1]
+            c = text[pos]
+
+            if state == 'root':
+                if c == '#':
+                    if eol < pos:
+                        eol = find_eol(text, pos)
+                    if eol < n:
+                        yield pos, Comment, text[pos:eol]
+                        pos = eol
+                        continue
+                elif c == '[':
+                    if eol < pos:
+                        eol = find_eol(text, pos)
+                    if pos + 1 < eol < n and text[eol-1] == ']':
+                        yield pos, Keyword, text[pos:eol]
+                        pos = eol
+                        continue
+                elif c == '.':
+                    m = known_directive(text, pos)
+                    if m is not None:
+                        q = m.end()
+                        r = blanks(text, q).end()
+                        if r < n and text[r] == '=':
+                            yield pos, T_KNOWNDIR, text[pos:q]
+                            if r > q:
+                                yield q, T_SPACE, text[q:r]
+                            yield r, Operator, '='
+                            pos = blanks(text, r+1).end()
+                            if pos > r + 1:
+                                yield r + 1, T_SPACE, text[r+1:pos]
+                            stack.append('pragma' if m.group(1) else 'other')
+                            continue
+                        if q < n and (SPACE[text[q]] or text[q] == '\\'):
+                            yield pos, T_KNOWNDIR, text[pos:q]
+                            if r > q:
+                                yield q, T_SPACE, text[q:r]
+                            pos = r
+                            stack.append('pragma' if m.group(1) else 'other')
+                            continue
+                    m = other_directive(text, pos)
+                    if m is not None:
+                        q = m.end()
+                        r = blanks(text, q).end()
+                        yield pos, T_OTHERDIR, text[pos:q]
+                        if r > q:
+                            yield q, T_SPACE, text[q:r]
+                        pos = r
+                        if r < n and text[r] == '=':
+                            yield r, Operator, '='
+                            pos = blanks(text, r+1).end()
+                            if pos > r + 1:
+                                yield r + 1, T_SPACE, text[r+1:pos]
+                        stack.append('other')
+                        continue
+                elif c == '=':
+                    yield pos, Operator, '='
+                    r = blanks(text, pos+1).end()
+                    if r > pos + 1:
+                        yield pos + 1, T_SPACE, text[pos+1:r]
+                    pos = r
+                    stack.append('rhs')
+                    continue
+                elif c == '\\':
+                    if text[pos+1:pos+2] == '\n':
+                        yield pos, String.Escape, c
+                        pos += 1
+                        continue
+
+                if LHS[c]:
+                    q = lhs_run(text, pos).end()
+                    r = spaces(text, q).end()
+                    yield pos, T_LHS, text[pos:q]
+                    if r > q:
+                        yield q, T_SPACE, text[q:r]
+                    pos = r
+                elif SPACE[c]:
+                    r = spaces(text, pos).end()
+                    yield pos, T_SPACE, text[pos:r]
+                    pos = r
+                else:
+                    r = lhs_default(text, pos+1).end()
+                    yield pos, T_LHS, text[pos:r]
+                    pos = r
+
+            elif state in VALUE_STATES:
+                if c == '#':
+                    if eol < pos:
+                        eol = find_eol(text, pos)
+                    if eol < n:
+                        yield pos, Comment, text[pos:eol]
+                        pos = eol
+                        continue
+                elif c == '\n':
+                    if pos == 0 or text[pos-1] != '\\':
+                        yield pos, T_SPACE, c
+                        pos += 1
+                        pop(stack, 2 if state == 'value' else 1)
+                        continue
+                elif c == '"':
+                    if pos < no_double:
+                        m = double_quoted(text, pos)
+                        if m is not None:
+                            yield pos, String.Double, m.group()
+                            pos = m.end()
+                            continue
+                        no_double = pos
+                elif c == "'":
+                    if pos < no_single:
+                        m = single_quoted(text, pos)
+                        if m is not None:
+                            yield pos, String.Single, m.group()
+                            pos = m.end()
+                            continue
+                        no_single = pos
+                elif c == '$':
+                    d = text[pos+1:pos+2]
+                    if d == '{':
+                        yield pos, Name.Variable, '${'
+                        pos += 2
+                        stack.append('curly-brace')
+                        continue
+                    if d == '(':
+                        yield pos, Name.Variable, '$('
+                        pos += 2
+                        stack.append('paren')
+                        continue
+                    m = variable(text, pos)
+                    if m is not None:
+                        yield pos, Name.Variable, m.group()
+                        pos = m.end()
+                        continue
+                elif c == '@':
+                    if state == 'rhs' and pos > 0 and not WORD[text[pos-1]]:
+                        m = section_reference(text, pos)
+                        if m is not None:
+                            yield pos, Name.Constant, m.group()
+                            pos = m.end()
+                            continue
+                elif c == '\\':
+                    if text[pos+1:pos+2] == '\n':
+                        yield pos, String.Escape, c
+                        pos += 1
+                        continue
+                elif c == '-':
+                    if state == 'pragma' and pos >= no_name:
+                        m = other_name(text, pos)
+                        if m is not None:
+                            for token in groups(m, OTHER_NAME_TYPES):
+                                yield token
+                            pos = m.end()
+                            stack.append('value')
+                            continue
+                        no_name = name_run(text, pos).end()
+                elif WORD[c]:
+                    boundary = pos > 0 and not WORD[text[pos-1]]
+                    if state == 'rhs':
+                        if boundary:
+                            if DIGIT[c]:
+                                m = oid(text, pos)
+                                if m is not None:
+                                    yield pos, Name.Function, m.group()
+                                    pos = m.end()
+                                    continue
+                                m = float_(text, pos) or int_(text, pos)
+                                if m is not None:
+                                    yield pos, T_NUMBER, m.group()
+                                    pos = m.end()
+                                    continue
+                            else:
+                                m = email_tag(text, pos)
+                                if m is not None:
+                                    for token in groups(m, TAG_TYPES):
+                                        yield token
+                                    pos = m.end()
+                                    stack.append('email')
+                                    continue
+                                m = ip_tag(text, pos)
+                                if m is not None:
+                                    for token in groups(m, TAG_TYPES):
+                                        yield token
+                                    pos = m.end()
+                                    stack.append('ip')
+                                    continue
+                                m = der_tag(text, pos)
+                                if m is not None:
+                                    for token in groups(m, TAG_TYPES):
+                                        yield token
+                                    pos = m.end()
+                                    stack.append('hex')
+                                    continue
+                                m = critical(text, pos)
+                                if m is not None:
+                                    yield pos, Keyword.Pseudo, m.group()
+                                    pos = m.end()
+                                    continue
+                    else:
+                        if state == 'pragma':
+                            m = None
+                            if boundary:
+                                m = known_name(text, pos)
+                                types = KNOWN_NAME_TYPES
+                            if m is None and pos >= no_name:
+                                m = other_name(text, pos)
+                                types = OTHER_NAME_TYPES
+                                if m is None:
+                                    no_name = name_run(text, pos).end()
+                            if m is not None:
+                                for token in groups(m, types):
+                                    yield token
+                                pos = m.end()
+                                stack.append('value')
+                                continue
+                        if boundary and DIGIT[c]:
+                            m = float_(text, pos) or int_(text, pos)
+                            if m is not None:
+                                yield pos, T_NUMBER, m.group()
+                                pos = m.end()
+                                continue
+
+                if SPACE[c]:
+                    r = spaces(text, pos).end()
+                    yield pos, T_SPACE, text[pos:r]
+                    pos = r
+                else:
+                    r = rhs_default(text, pos+1).end()
+                    yield pos, T_RHS, text[pos:r]
+                    pos = r
+
+            elif state in BRACE_STATES:
+                close, catch_all, push, count = BRACE_STATES[state]
+                if c == close:
+                    yield pos, Name.Variable, c
+                    pos += 1
+                    pop(stack, count)
+                elif push is not None and WORD[c]:
+                    m = variable_name(text, pos)
+                    yield pos, Name.Variable, m.group()
+                    pos = m.end()
+                    stack.append(push)
+                elif SPACE[c]:
+                    r = spaces(text, pos).end()
+                    yield pos, T_SPACE, text[pos:r]
+                    pos = r
+                else:
+                    r = catch_all(text, pos).end()
+                    yield pos, T_RHS, text[pos:r]
+                    pos = r
+
+            elif state == 'email':
+                m = email(text, pos)
+                if m is not None:
+                    yield pos, T_EMAIL, m.group()
+                    pos = m.end()
+                else:
+                    pop(stack, 1)
+
+            elif state == 'ip':
+                m = ip4(text, pos) or ip6(text, pos)
+                if m is not None:
+                    yield pos, T_IP, m.group()
+                    pos = m.end()
+                else:
+                    pop(stack, 1)
+
+            elif state == 'hex':
+                m = hex_(text, pos)
+                if m is not None:
+                    yield pos, T_HEX, m.group()
+                    pos = m.end()
+                else:
+                    pop(stack, 1)
+
+            else:
+                raise ValueError('unknown state %r' % state)
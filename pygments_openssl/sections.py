@@ -0,0 +1,164 @@
+"""Section index of OpenSSL configuration files
+
+The index is built in one pass over the text. Lines which leave the lexer
+in the root state, i.e. blank lines, comments, section headers and plain
+assignments, are recognized with a single regular expression. Anything
+else, such as directives, quoted strings, variables and continued lines,
+is handed to the lexer until it is back in the root state at a line start.
+Section headers are therefore the same as the Keyword tokens the lexer
+produces.
+"""
+
+import re
+
+from bisect import bisect_right
+from collections import namedtuple
+
+from pygments.token import Keyword
+
+from pygments_openssl.lexer import OpenSSLConfLexer, T_SPACE, merge_tokens
+
+# A line the lexer starts and ends in the root state
+SIMPLE_LINE = re.compile(r"""
+    [^\S\n]*
+    (?:
+        (?P<header>\[.*\])
+      | \#.*
+      | [\w;-][\w.;-]*[^\S\n]*=
+        (?:[^\S\n]+(?=\n)|(?:
+            [^\s"'$\#\\]
+          | [^\S\n]+(?=\S)
+          | \\(?!\n)
+          | \$(?![{(])
+          | \$\{\w+(?:::\w+)?\}
+          | \$\(\w+(?:::\w+)?\)
+          | "(?:\\[^\n]|[^"\\\n])*"
+          | '(?:\\[^\n]|[^'\\\n])*'
+        )*(?:\#.*(?<!\\))?)
+    )?
+    \n""", re.X)
+
+Section = namedtuple('Section', 'name header line offset end byte_offset')
+
+
+class SectionIndex(object):
+    """Index the section headers of ``text``.
+
+    Sections are Section tuples holding the name, the header as written,
+    the 1-based line number, the character offsets of the header and of
+    the end of the section, and the byte offset of the header in
+    ``encoding``. The text is indexed as is, i.e. without the
+    preprocessing done by ``get_tokens``.
+    """
+
+    def __init__(self, text, lexer=None, encoding='utf-8'):
+        self.text = text
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.encoding = encoding
+        self.sections = []
+        self.offsets = []
+        self.index()
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __getitem__(self, i):
+        return self.sections[i]
+
+    def index(self):
+        headers = []
+        for offset, header in find_headers(self.lexer, self.text):
+            headers.append((offset, header))
+
+        text, encoding = self.text, self.encoding
+        line, byte_offset, last = 1, 0, 0
+        for i, (offset, header) in enumerate(headers):
+            line += text.count('\n', last, offset)
+            byte_offset += len(text[last:offset].encode(encoding))
+            last = offset
+            end = headers[i+1][0] if i + 1 < len(headers) else len(text)
+            self.sections.append(Section(
+                header[1:-1].strip(), header, line, offset, end, byte_offset))
+        self.offsets = [s.offset for s in self.sections]
+
+    def find(self, name):
+        """Return the first section called ``name``, or None.
+        """
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    def section_at(self, offset):
+        """Return the section containing ``offset``, or None if ``offset``
+        is before the first section header.
+        """
+        i = bisect_right(self.offsets, offset)
+        return self.sections[i-1] if i else None
+
+    def get_tokens_unprocessed(self, offset=0):
+        """Return an iterable of (index, tokentype, value) tuples for the
+        section starting at ``offset``, or for the text before the first
+        section header if ``offset`` is 0.
+        """
+        return lex_section(self.lexer, self.text, offset)
+
+
+def find_headers(lexer, text):
+    """Yield (offset, header) tuples for the section headers of ``text``.
+    """
+    pos = 0
+    match = SIMPLE_LINE.match
+    while pos < len(text):
+        m = match(text, pos)
+        if m is not None:
+            if m.group('header'):
+                yield m.start('header'), m.group('header')
+            pos = m.end()
+            continue
+
+        pos, headers = resync(lexer, text, pos)
+        for header in headers:
+            yield header
+
+
+def resync(lexer, text, start):
+    """Let the lexer find its way back to the root state from ``start``,
+    a line start in the root state.
+
+    Returns the offset of the next line start in the root state, or
+    len(text), and a list of (offset, header) tuples for the section
+    headers on the way.
+    """
+    pos, stack, headers = len(text), ['root'], []
+    for index, ttype, value in lexer.scan(text, start, stack):
+        if stack == ['root']:
+            if index > start and text[index-1] == '\n':
+                pos = index
+                break
+            if ttype is T_SPACE and '\n' in value:
+                # Whitespace in the root state does not change state
+                pos = index + value.rfind('\n') + 1
+                break
+            if ttype is Keyword:
+                headers.append((index, value))
+    return pos, headers
+
+
+def lex_section(lexer, text, offset):
+    """Return an iterable of (index, tokentype, value) tuples for the text
+    from ``offset`` to the next section header. ``offset`` must be in the
+    root state, e.g. the offset of a section header.
+    """
+    return merge_tokens(scan_section(lexer, text, offset))
+
+
+def scan_section(lexer, text, offset):
+    stack = ['root']
+    for index, ttype, value in lexer.scan(text, offset, stack):
+        if ttype is Keyword and index > offset and stack == ['root']:
+            break
+        yield index, ttype, value
@@ -0,0 +1,206 @@
+"""Sphinx extension caching highlighted OpenSSL code blocks
+
+Add ``pygments_openssl.sphinxext`` to the ``extensions`` of a Sphinx
+project. Code blocks in the ``openssl`` and ``openssl-scanner`` languages
+are then highlighted once and reused by later builds for as long as the
+block, its options, the Pygments style, and the lexer implementation stay
+the same. The HTML builders are supported.
+
+Blocks are highlighted in the write phase, after Sphinx has saved the
+build environment, and by forked processes in parallel builds. The cache
+is therefore kept in a file of its own next to the environment, in the
+doctree directory. Worker processes append to journal files that are
+merged into the cache when the build finishes.
+
+Config values:
+
+``openssl_highlight_cache``
+    Set to False to disable the cache. Default True.
+
+``openssl_highlight_cache_size``
+    The number of blocks to keep, most recently used first. Default
+    10000.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from pygments.lexers import get_lexer_by_name
+from sphinx.util import logging
+
+from pygments_openssl.cache import fingerprint
+from pygments_openssl.lexer import OpenSSLConfLexer
+from pygments_openssl.scanner import OpenSSLConfScannerLexer
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = tuple(OpenSSLConfLexer.aliases + OpenSSLConfScannerLexer.aliases)
+
+# Cache file and journal directory in the doctree directory
+FILENAME = 'openssl-highlighting.pickle'
+JOURNALS = 'openssl-highlighting'
+
+# Format version of the cache file
+VERSION = 1
+
+
+class HighlightCache(object):
+    """Highlighted code blocks stored in ``directory``.
+
+    Entries map a hash of the block and of how it was highlighted to the
+    output and the number of the build that last used it.
+    """
+
+    def __init__(self, directory, maxsize=10000):
+        self.path = os.path.join(directory, FILENAME)
+        self.journals = os.path.join(directory, JOURNALS)
+        self.maxsize = maxsize
+        self.pid = os.getpid()
+        self.entries = {}
+        self.build = 0
+        self.hits = self.misses = 0
+        self.fingerprints = {}
+        self.load()
+
+    def info(self):
+        """Return a dict of cache statistics of the current build.
+        """
+        return dict(hits=self.hits, misses=self.misses, maxsize=self.maxsize,
+                    currsize=len(self.entries))
+
+    def wrap(self, bridge):
+        """Route the code blocks highlighted by PygmentsBridge ``bridge``
+        through the cache.
+        """
+        highlight_block = bridge.highlight_block
+
+        def cached(source, lang, opts=None, force=False, location=None, **kwargs):
+            if lang not in LANGUAGES:
+                return highlight_block(source, lang, opts, force, location, **kwargs)
+            key = self.key(bridge, source, lang, opts, force, kwargs)
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[1] = self.build
+                self.hits += 1
+                self.record(key)
+                return entry[0]
+            output = highlight_block(source, lang, opts, force, location, **kwargs)
+            self.entries[key] = [output, self.build]
+            self.misses += 1
+            self.record(key, output)
+            return output
+
+        bridge.highlight_block = cached
+
+    def key(self, bridge, source, lang, opts, force, kwargs):
+        if lang not in self.fingerprints:
+            self.fingerprints[lang] = fingerprint(get_lexer_by_name(lang))
+        h = hashlib.sha1(repr((
+            self.fingerprints[lang], bridge.dest, repr(bridge.formatter),
+            sorted(bridge.formatter_args.items()), lang, sorted((opts or {}).items()),
+            force, sorted(kwargs.items()))).encode('utf-8'))
+        h.update(source.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def record(self, key, output=None):
+        # Worker processes append hits and new entries to their journal
+        if os.getpid() == self.pid:
+            return
+        if not os.path.isdir(self.journals):
+            try:
+                os.makedirs(self.journals)
+            except OSError:
+                pass
+        with open(os.path.join(self.journals, '%d.pickle' % os.getpid()), 'ab') as f:
+            pickle.dump((key, output), f, 2)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            if data['version'] != VERSION:
+                return
+            self.entries, self.build = data['entries'], data['build'] + 1
+        except Exception:
+            # A missing or unreadable cache starts out empty
+            pass
+
+    def merge(self):
+        """Merge the journals of worker processes into the cache.
+        """
+        if not os.path.isdir(self.journals):
+            return
+        for name in sorted(os.listdir(self.journals)):
+            path = os.path.join(self.journals, name)
+            try:
+                with open(path, 'rb') as f:
+                    while True:
+                        key, output = pickle.load(f)
+                        if output is None:
+                            if key in self.entries:
+                                self.entries[key][1] = self.build
+                            self.hits += 1
+                        else:
+                            self.entries[key] = [output, self.build]
+                            self.misses += 1
+            except Exception:
+                # EOFError at the end of the journal, or a damaged one
+                pass
+            os.remove(path)
+
+    def save(self):
+        """Merge the journals and write the cache, keeping the ``maxsize``
+        most recently used entries.
+        """
+        self.merge()
+        entries = self.entries
+        if len(entries) > self.maxsize:
+            keys = sorted(entries, key=lambda k: entries[k][1], reverse=True)
+            for key in keys[self.maxsize:]:
+                del entries[key]
+        data = dict(version=VERSION, build=self.build, entries=entries)
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, 2)
+            os.rename(tmp, self.path)
+        except (IOError, OSError):
+            os.remove(tmp)
+            raise
+
+
+def builder_inited(app):
+    app.openssl_highlight_cache = None
+    if not app.config.openssl_highlight_cache:
+        return
+    cache = HighlightCache(app.doctreedir, app.config.openssl_highlight_cache_size)
+    for name in ('highlighter', 'dark_highlighter'):
+        bridge = getattr(app.builder, name, None)
+        if bridge is not None:
+            cache.wrap(bridge)
+            app.openssl_highlight_cache = cache
+
+
+def build_finished(app, exception):
+    cache = getattr(app, 'openssl_highlight_cache', None)
+    if cache is None:
+        return
+    cache.save()
+    info = cache.info()
+    total = info['hits'] + info['misses']
+    if total:
+        logger.info('openssl highlighting cache: %d hits, %d misses (%.0f%% hit rate)',
+                    info['hits'], info['misses'], 100.0 * info['hits'] / total)
+
+
+def setup(app):
+    app.add_config_value('openssl_highlight_cache', True, '')
+    app.add_config_value('openssl_highlight_cache_size', 10000, '')
+    app.connect('builder-inited', builder_inited)
+    app.connect('build-finished', build_finished)
+    return {'parallel_read_safe': True, 'parallel_write_safe': True}
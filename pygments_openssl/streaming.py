@@ -0,0 +1,101 @@
+"""Streaming lexing of OpenSSL configuration files
+
+The stream lexer reads text in chunks and yields tokens as soon as they
+can no longer change. Only the current line, or a construct that spans
+lines like a continued line, a quoted string, or a ``${...}`` variable,
+is kept in memory.
+"""
+
+import codecs
+
+from pygments_openssl.lexer import OpenSSLConfLexer, merge_tokens
+from pygments_openssl.incremental import scan_lines
+
+
+class StreamLexer(object):
+    """Lex text read from a file object or an iterable of chunks.
+
+    ``lexer`` is an OpenSSLConfLexer or OpenSSLConfScannerLexer instance.
+    Byte chunks are decoded with ``encoding``. The tokens are the same as
+    those returned by ``lexer.get_tokens_unprocessed`` for the whole text.
+    """
+
+    def __init__(self, lexer=None, chunksize=65536, encoding='utf-8'):
+        self.lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        self.chunksize = chunksize
+        self.encoding = encoding
+
+    def get_tokens(self, source, stack=('root',)):
+        """Return an iterable of (tokentype, value) tuples.
+        """
+        for index, ttype, value in self.get_tokens_unprocessed(source, stack):
+            yield ttype, value
+
+    def get_tokens_unprocessed(self, source, stack=('root',)):
+        """Return an iterable of (index, tokentype, value) tuples.
+        """
+        return merge_tokens(self.scan(self.chunks(source), stack))
+
+    def chunks(self, source):
+        if hasattr(source, 'read'):
+            read, size = source.read, self.chunksize
+            source = iter(lambda: read(size), source.read(0))
+        decoder = None
+        for chunk in source:
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(self.encoding)()
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        if decoder is not None:
+            chunk = decoder.decode(b'', True)
+            if chunk:
+                yield chunk
+
+    def scan(self, chunks, stack):
+        # Yield unmerged tokens. The buffer holds the text from the first
+        # line start which is not final yet, preceded by the newline
+        # before it as lookbehind context.
+        lexer = self.lexer
+        buf = ''
+        base = 0
+        context = 0
+        stack = tuple(stack)
+        wanted = 0
+
+        for chunk in chunks:
+            buf += chunk
+            if len(buf) < wanted:
+                continue
+
+            # Tokens before a line start are final if they did not look at
+            # the end of the buffer, and the line itself is complete
+            cut = None
+            reach = 0
+            for position, current, horizon, segment in scan_lines(lexer, buf, context, list(stack)):
+                if reach > len(buf) or buf.find('\n', position) < 0:
+                    break
+                if cut is not None:
+                    for ttype, value in cut[2]:
+                        yield base + index - context, ttype, value
+                        index += len(value)
+                cut = position, current, segment
+                index = position
+                reach = max(reach, horizon)
+
+            if cut is None or cut[0] == context:
+                # Wait until the buffer has doubled before trying again
+                wanted = 2 * len(buf)
+                continue
+
+            position, stack = cut[:2]
+            base += position - context
+            buf = buf[position-1:]
+            context = 1
+            wanted = 0
+
+        for position, current, horizon, segment in scan_lines(lexer, buf, context, list(stack)):
+            for ttype, value in segment:
+                yield base + position - context, ttype, value
+                position += len(value)
@@ -0,0 +1,176 @@
+"""Line range lexing of OpenSSL configuration files
+
+To lex a range of lines, the lexer starts at the nearest preceding line
+which is known to start in the root state, i.e. is not inside a continued
+line, a quoted string or a ``${``/``$(`` reference. Such lines are found
+with the fast path of the section index, or looked up in a LineIndex of
+every so many of them, which can be saved alongside the file. With an
+index, the cost of lexing a range does not depend on its position in the
+file.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from bisect import bisect_right
+
+from pygments_openssl.cache import fingerprint
+from pygments_openssl.lexer import OpenSSLConfLexer, merge_tokens
+from pygments_openssl.sections import SIMPLE_LINE, resync
+
+# Format version of saved indexes
+VERSION = 1
+
+
+class LineIndex(object):
+    """Line starts of a text known to be in the root state, about one
+    every ``every`` lines.
+
+    ``lines`` holds the 1-based line numbers and ``offsets`` the character
+    offsets of the line starts. ``size``, ``digest`` and ``fingerprint``
+    identify the text and the lexer the index was built for.
+    """
+
+    def __init__(self, lines=(1,), offsets=(0,), size=0, digest=None,
+                 fingerprint=None, every=100):
+        self.lines = list(lines)
+        self.offsets = list(offsets)
+        self.size = size
+        self.digest = digest
+        self.fingerprint = fingerprint
+        self.every = every
+
+    def __len__(self):
+        return len(self.lines)
+
+    @classmethod
+    def build(cls, text, lexer=None, every=100):
+        """Return the LineIndex of ``text``.
+        """
+        lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        lines, offsets = [1], [0]
+        for line, offset in root_lines(lexer, text):
+            if line >= lines[-1] + every:
+                lines.append(line)
+                offsets.append(offset)
+        return cls(lines, offsets, len(text), text_digest(text), fingerprint(lexer), every)
+
+    def matches(self, text, lexer=None):
+        """Return True if the index was built for ``text`` and ``lexer``.
+        """
+        lexer = lexer if lexer is not None else OpenSSLConfLexer()
+        return (self.size == len(text) and self.fingerprint == fingerprint(lexer) and
+                self.digest == text_digest(text))
+
+    def nearest(self, line):
+        """Return the (line, offset) of the last indexed line at or before
+        ``line``.
+        """
+        i = max(0, bisect_right(self.lines, line) - 1)
+        return self.lines[i], self.offsets[i]
+
+    def save(self, path):
+        """Write the index to ``path``.
+        """
+        data = json.dumps(dict(
+            version=VERSION, lines=self.lines, offsets=self.offsets, size=self.size,
+            digest=self.digest, fingerprint=self.fingerprint, every=self.every))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data.encode('utf-8'))
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, text=None, lexer=None):
+        """Read an index from ``path``.
+
+        Returns None if the file is missing or unreadable, or if ``text``
+        is given and the index was not built for it and ``lexer``.
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = json.loads(f.read().decode('utf-8'))
+            if data.pop('version') != VERSION:
+                return None
+            index = cls(**data)
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        if text is not None and not index.matches(text, lexer):
+            return None
+        return index
+
+
+def root_lines(lexer, text):
+    """Yield (line, offset) tuples for the line starts of ``text`` which
+    are in the root state, in order. Lines are counted from 1.
+    """
+    pos, line = 0, 1
+    match = SIMPLE_LINE.match
+    while pos < len(text):
+        yield line, pos
+        m = match(text, pos)
+        if m is not None:
+            pos = m.end()
+            line += 1
+            continue
+
+        start = pos
+        pos = resync(lexer, text, start)[0]
+        line += text.count('\n', start, pos)
+
+
+def lex_lines(lexer, text, first, last, index=None):
+    """Return an iterable of (index, tokentype, value) tuples for lines
+    ``first`` to ``last`` of ``text``, counting from 1.
+
+    Tokens spanning the edges of the range are cut. Lexing starts at the
+    nearest preceding line in the root state, taken from ``index`` if it
+    is given, or else found by a fast pass over the text before ``first``.
+    """
+    first = max(1, first)
+    if index is not None:
+        line, pos = index.nearest(first)
+    else:
+        line, pos = 1, 0
+        for line_, pos_ in root_lines(lexer, text):
+            if line_ > first:
+                break
+            line, pos = line_, pos_
+
+    start = skip_lines(text, pos, first - line)
+    end = skip_lines(text, start, last - first + 1)
+    return merge_tokens(cut_tokens(lexer.scan(text, pos, ['root']), start, end))
+
+
+def skip_lines(text, pos, count):
+    # Return the offset count lines after pos, or len(text)
+    for i in range(count):
+        pos = text.find('\n', pos) + 1
+        if pos == 0:
+            return len(text)
+    return pos
+
+
+def cut_tokens(tokens, start, end):
+    # Yield the tokens of text[start:end], cutting them at the edges
+    for index, ttype, value in tokens:
+        if index >= end:
+            break
+        if index + len(value) > start:
+            value = value[max(0, start - index):end - index]
+            if value:
+                yield max(index, start), ttype, value
+
+
+def text_digest(text):
+    try:
+        data = text.encode('utf-8')
+    except UnicodeEncodeError:
+        data = text.encode('utf-8', 'surrogatepass')
+    return hashlib.sha1(data).hexdigest()
@@ -1,3 +1,21 @@
+import sys
+
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+# Modules requiring a minimum Python version
+PYTHON_REQUIRES = {
+    ('pygments_openssl', 'aio'): (3, 7),
+}
+
+
+class BuildPy(build_py):
+    """Leave out modules the running Python cannot compile."""
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        return [m for m in modules
+                if sys.version_info >= PYTHON_REQUIRES.get(m[:2], (0,))]
+
 
-setup()
+setup(cmdclass={'build_py': BuildPy})
@@ -0,0 +1,101 @@
+import sys
+import threading
+import unittest
+
+TEXT = ''.join('[ section%d ]\nkey = value # Comment\n' % i for i in range(200))
+
+
+def make_lexer():
+    from pygments_openssl.lexer import OpenSSLConfLexer
+
+    class CountingLexer(OpenSSLConfLexer):
+        # Count tokens and concurrent get_tokens calls
+
+        def __init__(self, **options):
+            super(CountingLexer, self).__init__(**options)
+            self.lock = threading.Lock()
+            self.count = self.active = self.max_active = 0
+
+        def get_tokens(self, text, unfiltered=False):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            try:
+                for token in super(CountingLexer, self).get_tokens(text, unfiltered):
+                    self.count += 1
+                    yield token
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+    return CountingLexer()
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'requires Python 3.7')
+class AsyncLexerTests(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def collect(self, agen):
+        result = []
+        while True:
+            try:
+                result.append(self.loop.run_until_complete(agen.__anext__()))
+            except StopAsyncIteration:
+                return result
+
+    def test_iter_tokens(self):
+        from pygments_openssl.aio import AsyncLexer
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        tokens = self.collect(AsyncLexer(batchsize=7).iter_tokens(TEXT))
+        self.assertEqual(tokens, list(OpenSSLConfLexer().get_tokens(TEXT)))
+
+    def test_get_tokens(self):
+        from pygments_openssl.aio import AsyncLexer
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        tokens = self.loop.run_until_complete(AsyncLexer().get_tokens(TEXT))
+        self.assertEqual(tokens, list(OpenSSLConfLexer().get_tokens(TEXT)))
+
+    def test_highlight(self):
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.aio import AsyncLexer
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        result = self.loop.run_until_complete(AsyncLexer().highlight(TEXT, HtmlFormatter()))
+        self.assertEqual(result, highlight(TEXT, OpenSSLConfLexer(), HtmlFormatter()))
+        result = self.loop.run_until_complete(AsyncLexer().highlight(TEXT, HtmlFormatter(encoding='utf-8')))
+        self.assertEqual(result, highlight(TEXT, OpenSSLConfLexer(), HtmlFormatter(encoding='utf-8')))
+
+    def test_iter_highlight_streams(self):
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.aio import AsyncLexer
+        pieces = self.collect(AsyncLexer().iter_highlight(TEXT, HtmlFormatter()))
+        self.assertTrue(len(pieces) > 200)
+
+    def test_cancel(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.aio import AsyncLexer
+        lexer = make_lexer()
+        executor = ThreadPoolExecutor(1)
+        agen = AsyncLexer(lexer, executor).iter_highlight(TEXT * 20, HtmlFormatter())
+        self.loop.run_until_complete(agen.__anext__())
+        self.loop.run_until_complete(agen.aclose())
+        executor.shutdown(wait=True)
+        self.assertTrue(lexer.count < len(list(lexer.get_tokens(TEXT * 20))))
+
+    def test_limit(self):
+        import asyncio
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.aio import AsyncLexer
+        lexer = make_lexer()
+        aio = AsyncLexer(lexer, limit=1, batchsize=10)
+        tasks = [self.loop.create_task(coro) for coro in [
+            aio.get_tokens(TEXT), aio.get_tokens(TEXT), aio.highlight(TEXT, HtmlFormatter())]]
+        self.loop.run_until_complete(asyncio.gather(*tasks))
+        self.assertEqual(lexer.max_active, 1)
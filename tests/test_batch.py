@@ -0,0 +1,59 @@
+import multiprocessing
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+
+class BatchLexerTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+        self.texts = INPUTS + list(fuzzed_inputs(50, 15))
+
+    def expected(self):
+        return [list(self.lexer.get_tokens(text)) for text in self.texts]
+
+    def test_lex_many(self):
+        from pygments_openssl.batch import lex_many
+        self.assertEqual(lex_many(self.texts), self.expected())
+
+    def test_thread_pool(self):
+        from pygments_openssl.batch import BatchLexer
+        with BatchLexer(pool='thread', workers=3) as batch:
+            self.assertEqual(batch.lex_many(self.texts), self.expected())
+            self.assertEqual(batch.lex_many(self.texts[:1]), self.expected()[:1])
+
+    def test_process_pool(self):
+        from pygments_openssl.batch import lex_many
+        results = lex_many(self.texts, pool='process', workers=2)
+        self.assertEqual(results, self.expected())
+        # Token types are the singletons
+        self.assertTrue(results[0][0][0] is self.expected()[0][0][0])
+
+    @unittest.skipUnless(hasattr(multiprocessing, 'get_context'), 'requires Python 3')
+    def test_spawn(self):
+        # Workers create the lexer, whose class was never instantiated there
+        from pygments_openssl.batch import BatchLexer
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(stripnl=False)
+        with BatchLexer(lexer, pool='process', workers=2,
+                        context=multiprocessing.get_context('spawn')) as batch:
+            self.assertEqual(batch.lex_many(self.texts),
+                             [list(lexer.get_tokens(text)) for text in self.texts])
+
+    def test_lexer_options(self):
+        from pygments_openssl.batch import lex_many
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(stripnl=False)
+        texts = ['\na = b\n', 'c = d\n\n']
+        self.assertEqual(lex_many(texts, lexer, pool='process', workers=1),
+                         [list(lexer.get_tokens(text)) for text in texts])
+
+    def test_empty(self):
+        from pygments_openssl.batch import lex_many
+        self.assertEqual(lex_many([], pool='process'), [])
+
+    def test_bad_pool(self):
+        from pygments_openssl.batch import BatchLexer
+        self.assertRaises(ValueError, BatchLexer, pool='fork')
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+import unittest
+
+TEXT = '[ default ]\ndir = . # Comment\n'
+
+
+class TokenCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_tokens(self):
+        from pygments_openssl.cache import TokenCache
+        cache = TokenCache()
+        self.assertEqual(list(cache.get_tokens(TEXT)), list(cache.lexer.get_tokens(TEXT)))
+
+    def test_hits_and_misses(self):
+        from pygments_openssl.cache import TokenCache
+        cache = TokenCache()
+        first = cache.get_tokens(TEXT)
+        self.assertTrue(cache.get_tokens(TEXT) is first)
+        cache.get_tokens(TEXT + 'x = y\n')
+        info = cache.info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 2)
+        self.assertEqual(info['currsize'], 2)
+
+    def test_lru_eviction(self):
+        from pygments_openssl.cache import TokenCache
+        cache = TokenCache(maxsize=2)
+        cache.get_tokens('a = 1\n')
+        cache.get_tokens('b = 2\n')
+        cache.get_tokens('a = 1\n')
+        cache.get_tokens('c = 3\n')
+        self.assertEqual(cache.info()['evictions'], 1)
+        cache.get_tokens('a = 1\n')
+        self.assertEqual(cache.info()['hits'], 2)
+        cache.get_tokens('b = 2\n')
+        self.assertEqual(cache.info()['misses'], 4)
+
+    def test_lexer_options_are_part_of_the_key(self):
+        from pygments_openssl.cache import TokenCache
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        a = TokenCache(OpenSSLConfLexer())
+        b = TokenCache(OpenSSLConfLexer(stripnl=False))
+        self.assertNotEqual(a.key(TEXT), b.key(TEXT))
+
+    def test_filters(self):
+        # Filters are applied to cached tokens
+        from pygments.filters import VisibleWhitespaceFilter
+        from pygments_openssl.cache import TokenCache
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        TokenCache(directory=self.directory).get_tokens(TEXT)
+        lexer = OpenSSLConfLexer(filters=[VisibleWhitespaceFilter(spaces=True)])
+        cache = TokenCache(lexer, directory=self.directory)
+        for i in range(2):
+            self.assertEqual(list(cache.get_tokens(TEXT)), list(lexer.get_tokens(TEXT)))
+        self.assertEqual(cache.info()['disk_hits'], 1)
+
+    def test_disk_store(self):
+        from pygments_openssl.cache import TokenCache
+        tokens = TokenCache(directory=self.directory).get_tokens(TEXT)
+        cache = TokenCache(directory=self.directory)
+        self.assertEqual(cache.get_tokens(TEXT), tokens)
+        info = cache.info()
+        self.assertEqual(info['disk_hits'], 1)
+        self.assertEqual(info['misses'], 0)
+        # Token types are the Pygments singletons again
+        self.assertTrue(cache.get_tokens(TEXT)[0][0] is tokens[0][0])
+
+    def test_implementation_change_invalidates(self):
+        from pygments_openssl.cache import TokenCache, fingerprint
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+
+        class OtherLexer(OpenSSLConfLexer):
+            tokens = {}
+
+        self.assertNotEqual(fingerprint(OpenSSLConfLexer()), fingerprint(OtherLexer()))
+        self.assertNotEqual(fingerprint(OpenSSLConfLexer()), fingerprint(OpenSSLConfScannerLexer()))
+        TokenCache(directory=self.directory).get_tokens(TEXT)
+        cache = TokenCache(OpenSSLConfScannerLexer(), directory=self.directory)
+        cache.get_tokens(TEXT)
+        self.assertEqual(cache.info()['disk_hits'], 0)
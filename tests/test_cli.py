@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from tests.test_scanner import INPUTS
+
+
+class CommandLineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.srcdir = os.path.join(self.tempdir, 'src')
+        self.outdir = os.path.join(self.tempdir, 'out')
+        os.makedirs(os.path.join(self.srcdir, 'sub'))
+        self.files = {}
+        for i, text in enumerate(INPUTS[:10]):
+            name = os.path.join('sub' if i % 2 else '', 'f%d.%s' % (i, 'cnf' if i % 3 else 'conf'))
+            self.files[name] = text
+            self.write(name, text)
+        self.write('README.txt', 'not a config file\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, name, text):
+        with open(os.path.join(self.srcdir, name), 'wb') as f:
+            f.write(text.encode('utf-8'))
+
+    def run_cli(self, *args, **kw):
+        try:
+            from StringIO import StringIO
+        except ImportError:
+            from io import StringIO
+        from pygments_openssl.cli import main
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            status = main(['-o', self.outdir] + list(args) + kw.get('paths', [self.srcdir]))
+            self.errors = sys.stderr.getvalue()
+            return status, sys.stdout.getvalue()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+    def read(self, name):
+        with open(os.path.join(self.outdir, name), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def test_highlight(self):
+        from pygments import highlight
+        from pygments_openssl.formatters import OpenSSLHtmlFormatter
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        status, output = self.run_cli()
+        self.assertEqual(status, 0)
+        self.assertTrue(output.startswith('10 files highlighted, 0 unchanged'))
+        for name, text in self.files.items():
+            self.assertEqual(self.read(name + '.html'),
+                             highlight(text, OpenSSLConfLexer(), OpenSSLHtmlFormatter()))
+        self.assertFalse(os.path.exists(os.path.join(self.outdir, 'README.txt.html')))
+
+    def test_skip_unchanged(self):
+        self.run_cli()
+        status, output = self.run_cli()
+        self.assertTrue(output.startswith('0 files highlighted, 10 unchanged'))
+
+        # Touched but unchanged, and changed
+        path = os.path.join(self.srcdir, 'f0.conf')
+        os.utime(path, (0, 0))
+        self.write('sub/f1.cnf', 'a = changed\n')
+        status, output = self.run_cli('-v')
+        self.assertTrue(output.splitlines()[0].endswith('ms  ' + os.path.join('sub', 'f1.cnf')))
+        self.assertTrue(output.splitlines()[1].startswith('1 files highlighted, 9 unchanged'))
+        self.assertTrue('changed' in self.read('sub/f1.cnf.html'))
+
+        # Deleted output
+        os.remove(os.path.join(self.outdir, 'f2.cnf.html'))
+        status, output = self.run_cli()
+        self.assertTrue(output.startswith('1 files highlighted, 9 unchanged'))
+
+    def test_settings_change(self):
+        self.run_cli()
+        status, output = self.run_cli('-O', 'linenos=table')
+        self.assertTrue(output.startswith('10 files highlighted'))
+        self.assertTrue('linenos' in self.read('f0.conf.html'))
+        status, output = self.run_cli('-f', 'openssl-terminal')
+        self.assertTrue(output.startswith('10 files highlighted'))
+        self.assertTrue(os.path.exists(os.path.join(self.outdir, 'f0.conf.txt')))
+        status, output = self.run_cli('-f', 'openssl-terminal', '-a')
+        self.assertTrue(output.startswith('10 files highlighted'))
+
+    def test_process_pool(self):
+        self.run_cli('-j', '1', '-o', os.path.join(self.tempdir, 'serial'))
+        status, output = self.run_cli('-j', '2', '-b', '3')
+        self.assertEqual(status, 0)
+        for name in self.files:
+            with open(os.path.join(self.tempdir, 'serial', name + '.html'), 'rb') as f:
+                self.assertEqual(self.read(name + '.html'), f.read().decode('utf-8'))
+
+    @unittest.skipUnless(hasattr(multiprocessing, 'set_start_method'), 'requires Python 3')
+    def test_spawn(self):
+        # Workers create the lexer and formatter by name
+        import subprocess
+        code = ('import multiprocessing, sys; multiprocessing.set_start_method("spawn"); '
+                'from pygments_openssl.cli import main; sys.exit(main(sys.argv[1:]))')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+            [path for path in [env.get('PYTHONPATH')] if path])
+        process = subprocess.Popen(
+            [sys.executable, '-c', code, '-j', '2', '-b', '3', '-o', self.outdir, self.srcdir],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        output, errors = process.communicate()
+        self.assertEqual(process.returncode, 0, errors)
+        self.assertTrue(output.startswith(b'10 files highlighted'))
+        status, output = self.run_cli('-a', '-j', '1', '-o', os.path.join(self.tempdir, 'serial'))
+        for name in self.files:
+            with open(os.path.join(self.tempdir, 'serial', name + '.html'), 'rb') as f:
+                self.assertEqual(self.read(name + '.html'), f.read().decode('utf-8'))
+
+    def test_unknown_lexer(self):
+        status, output = self.run_cli('-l', 'does-not-exist')
+        self.assertEqual(status, 2)
+
+    def test_same_output(self):
+        # The same relative path in two PATHs
+        other = os.path.join(self.tempdir, 'other')
+        os.makedirs(other)
+        with open(os.path.join(other, 'f0.conf'), 'wb') as f:
+            f.write(b'a = other\n')
+        status, output = self.run_cli(paths=[self.srcdir, other])
+        self.assertEqual(status, 2)
+        self.assertTrue(os.path.join(other, 'f0.conf') in self.errors)
+        self.assertFalse(os.path.exists(os.path.join(self.outdir, 'f0.conf.html')))
+
+        # Different relative paths
+        os.rename(os.path.join(other, 'f0.conf'), os.path.join(other, 'g0.conf'))
+        status, output = self.run_cli(paths=[self.srcdir, other])
+        self.assertEqual(status, 0)
+        self.assertTrue(output.startswith('11 files highlighted'))
+        self.assertTrue('other' in self.read('g0.conf.html'))
+
+    def test_write_error(self):
+        # An output that cannot be written fails that file only
+        os.makedirs(os.path.join(self.outdir, 'f0.conf.html'))
+        status, output = self.run_cli()
+        self.assertEqual(status, 1)
+        self.assertTrue(output.startswith('9 files highlighted'))
+        self.assertTrue(self.errors.startswith('pygments-openssl: f0.conf: '))
+        os.rmdir(os.path.join(self.outdir, 'f0.conf.html'))
+        status, output = self.run_cli()
+        self.assertEqual(status, 0)
+        self.assertTrue(output.startswith('1 files highlighted, 9 unchanged'))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+
+class TokenArrayTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertSameTokens(self, text):
+        tokens = self.lexer.get_token_array(text)
+        self.assertEqual(
+            list(tokens.get_tokens_unprocessed()),
+            list(self.lexer.get_tokens_unprocessed(text)), repr(text))
+
+    def test_inputs(self):
+        for text in INPUTS:
+            self.assertSameTokens(text)
+
+    def test_fuzzed_inputs(self):
+        for text in fuzzed_inputs(2000, 18):
+            self.assertSameTokens(text)
+
+    def test_get_tokens(self):
+        text = u'[ ca ]\nname = Gr\u00fc\u00dfe # Comment\n'
+        tokens = self.lexer.get_token_array(text)
+        expected = [(t, v) for i, t, v in self.lexer.get_tokens_unprocessed(text)]
+        self.assertEqual(list(tokens), expected)
+        self.assertEqual([tokens[i] for i in range(len(tokens))], expected)
+        self.assertEqual(tokens[-1], expected[-1])
+
+    def test_columns(self):
+        from pygments.token import Operator
+        text = u'dir = .\n'
+        tokens = self.lexer.get_token_array(text)
+        self.assertEqual(list(tokens.starts), [0, 3, 4, 5, 6, 7])
+        self.assertEqual(tokens.ttype(2), Operator)
+        self.assertEqual((tokens.start(2), tokens.end(2)), (4, 5))
+        self.assertEqual(tokens.value(2), u'=')
+        self.assertEqual(tokens.end(5), len(text))
+        self.assertEqual(tokens.ids.typecode, 'B')
+
+    def test_empty(self):
+        tokens = self.lexer.get_token_array(u'')
+        self.assertEqual(len(tokens), 0)
+        self.assertEqual(list(tokens), [])
+
+    def test_many_types(self):
+        from pygments.token import Text
+        from pygments_openssl.columnar import TokenArray
+        types = [getattr(Text, 'T%d' % i) for i in range(300)]
+        text = u'x' * len(types)
+        tokens = TokenArray.from_tokens(text, [(i, t, u'x') for i, t in enumerate(types)])
+        self.assertEqual(tokens.ids.typecode, 'H')
+        self.assertEqual([t for t, v in tokens], types)
@@ -0,0 +1,153 @@
+import difflib
+import random
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, FRAGMENTS
+
+OLD = '''\
+[ ca ]
+default_ca = CA_default
+
+[ CA_default ]
+dir = ./demoCA
+certs = $dir/certs
+'''
+
+
+def line_tokens(lexer, text):
+    # The tokens of a full lex, cut at line ends
+    lines, line = [], []
+    for index, ttype, value in lexer.get_tokens_unprocessed(text):
+        pos = 0
+        while pos < len(value):
+            eol = value.find('\n', pos) + 1 or len(value)
+            line.append((ttype, value[pos:eol]))
+            if value[eol-1] == '\n':
+                lines.append(line)
+                line = []
+            pos = eol
+    if line:
+        lines.append(line)
+    return lines
+
+
+class CountingLexer(object):
+    # Count the lines each scan of the lexer gets through
+
+    def __init__(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+        self.lines = []
+
+    def scan(self, text, pos, stack):
+        self.lines.append(0)
+        for index, ttype, value in self.lexer.scan(text, pos, stack):
+            self.lines[-1] += value.count('\n')
+            yield index, ttype, value
+
+    def get_tokens_unprocessed(self, text):
+        return self.lexer.get_tokens_unprocessed(text)
+
+
+class TokenDiffTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertDiff(self, old, new, lexer=None, context=None):
+        from pygments_openssl.diff import TokenDiff
+        lexer = lexer or self.lexer
+        diff = TokenDiff(old, new, lexer, context)
+        old_lines, new_lines = line_tokens(lexer, old), line_tokens(lexer, new)
+        result = [line for line in diff.iter_lines() if line[0] != '@']
+        for tag, i, j, tokens in result:
+            if tag == '-':
+                self.assertEqual(tokens, old_lines[i-1], repr((old, new)))
+            else:
+                self.assertEqual(tokens, new_lines[j-1], repr((old, new)))
+        if context is None:
+            # The lines of both texts, in order
+            self.assertEqual([i for tag, i, j, tokens in result if tag != '+'],
+                             list(range(1, len(old_lines) + 1)))
+            self.assertEqual([j for tag, i, j, tokens in result if tag != '-'],
+                             list(range(1, len(new_lines) + 1)))
+        return diff
+
+    def test_diff_lines(self):
+        from pygments.token import Name, String
+        from pygments_openssl.diff import diff_lines
+        new = OLD.replace('./demoCA', '"./demoCA"')
+        result = list(diff_lines(OLD, new))
+        self.assertEqual([(tag, i, j) for tag, i, j, tokens in result], [
+            (' ', 1, 1), (' ', 2, 2), (' ', 3, 3), (' ', 4, 4),
+            ('-', 5, None), ('+', None, 5), (' ', 6, 6)])
+        self.assertEqual(result[4][3][4], (String, './demoCA'))
+        self.assertEqual(result[5][3][4], (String.Double, '"./demoCA"'))
+        self.assertEqual(result[6][3][0], (Name.Attribute, 'certs'))
+
+    def test_unified(self):
+        from pygments_openssl.diff import TokenDiff
+        old = OLD + ''.join('k%d = v\n' % i for i in range(20))
+        new = old.replace('dir = ./demoCA\n', 'dir = "./demo\nCA"\n').replace('k15 = v\n', '')
+        lines = []
+        for tag, i, j, tokens in TokenDiff(old, new).iter_lines():
+            lines.append(tokens if tag == '@' else tag + ''.join(v for t, v in tokens))
+        expected = difflib.unified_diff(old.splitlines(True), new.splitlines(True))
+        self.assertEqual(lines, list(expected)[2:])
+
+    def test_unchanged(self):
+        from pygments_openssl.diff import TokenDiff
+        self.assertEqual(list(TokenDiff(OLD, OLD).iter_lines()), [])
+        diff = TokenDiff(OLD, OLD, context=None)
+        self.assertEqual([tag for tag, i, j, tokens in diff.iter_lines()], [' '] * 6)
+
+    def test_lex_hunks_only(self):
+        lexer = CountingLexer()
+        old = OLD + ''.join('k%d = v\n' % i for i in range(1000))
+        new = old.replace('k500 = v\n', 'k500 = "w\n', 1).replace('k501 = v\n', 'k501 = x"\n', 1)
+        self.assertDiff(old, new, lexer, 3)
+        # The changed lines and three lines of context on either side
+        self.assertEqual(lexer.lines, [8, 8])
+
+    def test_share_unchanged_text(self):
+        lexer = CountingLexer()
+        old = OLD + ''.join('k%d = v\n' % i for i in range(1000))
+        new = old.replace('k500 = v\n', 'k500 = "w\n', 1).replace('k501 = v\n', 'k501 = x"\n', 1)
+        self.assertDiff(old, new, lexer)
+        # The old text, and the changed lines of the new text
+        self.assertEqual(lexer.lines, [1006, 3])
+
+    def test_affected_lines(self):
+        # Unchanged lines continuing a changed line carry the new tokens
+        from pygments.token import String
+        new = OLD.replace('./demoCA', './demoCA \\')
+        diff = self.assertDiff(OLD, new)
+        tag, i, j, tokens = list(diff.iter_lines())[-1]
+        self.assertEqual((tag, i, j), (' ', 6, 6))
+        self.assertEqual(tokens[0], (String, 'certs'))
+
+    def test_get_tokens(self):
+        from pygments.token import Generic
+        from pygments_openssl.diff import TokenDiff
+        new = OLD.replace('./demoCA', '"./demoCA"')[:-1]
+        tokens = list(TokenDiff(OLD, new, context=1).get_tokens())
+        self.assertEqual(tokens[0], (Generic.Subheading, '@@ -4,3 +4,3 @@\n'))
+        self.assertTrue((Generic.Deleted, '-') in tokens)
+        self.assertTrue((Generic.Inserted, '+') in tokens)
+        text = ''.join(v for t, v in tokens)
+        self.assertTrue(text.endswith('+certs = $dir/certs\n'))
+
+    def test_random_edits(self):
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        rand = random.Random(7)
+        texts = list(fuzzed_inputs(30, 7))
+        for lexer in (self.lexer, OpenSSLConfScannerLexer()):
+            for text in texts:
+                new = text
+                for i in range(rand.randint(1, 4)):
+                    start = rand.randint(0, len(new))
+                    end = rand.randint(start, min(len(new), start + 10))
+                    new = new[:start] + rand.choice(FRAGMENTS + ['']) + new[end:]
+                self.assertDiff(text, new, lexer)
+                self.assertDiff(text, new, lexer, rand.randint(0, 3))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+
+class FirstCharsTests(unittest.TestCase):
+
+    def test_literal(self):
+        from pygments_openssl.dispatch import first_chars
+        self.assertEqual(first_chars(r'#.*'), set('#'))
+        self.assertEqual(first_chars(r'(?i)(?<=\W)(IP)(?=\W)'), set('iI'))
+        self.assertEqual(first_chars(r'\$\(|"|\''), set('$"\''))
+
+    def test_categories(self):
+        import re
+        import string
+        from pygments_openssl.dispatch import ASCII, first_chars
+        self.assertEqual(first_chars(r'\d+\.\d+'), set(string.digits))
+        # Whitespace is ASCII only on Python 2
+        spaces = set(c for c in ASCII if re.match(r'[^\S\n]', c))
+        self.assertEqual(first_chars(r'[^\S\n]+'), spaces)
+        self.assertTrue(set(' \t\r\x0b\x0c') <= spaces)
+        self.assertEqual(first_chars(r'[^\S\n]+', re.UNICODE),
+                         set(c for c in ASCII if re.match(r'[^\S\n]', c, re.UNICODE)))
+        self.assertEqual(first_chars(r'(a|b?)c'), set('abc'))
+
+    def test_nullable(self):
+        from pygments_openssl.dispatch import first_chars
+        self.assertEqual(first_chars(r'a*'), None)
+        self.assertEqual(first_chars(r'(?=x)'), None)
+
+
+class DispatchTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertSameTokens(self, text):
+        # Compare with RegexLexer's loop, which tries every rule
+        from pygments.lexer import RegexLexer
+        from pygments_openssl.lexer import merge_tokens
+        self.assertEqual(
+            list(self.lexer.get_tokens_unprocessed(text)),
+            list(merge_tokens(RegexLexer.get_tokens_unprocessed(self.lexer, text))), repr(text))
+
+    def test_inputs(self):
+        for text in INPUTS:
+            self.assertSameTokens(text)
+
+    def test_fuzzed_inputs(self):
+        for text in fuzzed_inputs(2000, 19):
+            self.assertSameTokens(text)
+
+    def test_profile(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        list(lexer.get_tokens(u'foo = "bar" $baz\n'))
+        # String, space, variable, and newline
+        rhs = lexer.profile.summary()['rhs']
+        self.assertEqual((rhs['attempts'], rhs['matches']), (6, 4))
@@ -0,0 +1,65 @@
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+TEXT = '''\
+# <Comment> & more
+[ req ]
+dir = "a 'b' & <c>" \\
+    ${ENV::HOME}/$(x) # Comment
+.include = /etc/ssl/x.cnf
+'''
+
+
+class FormatterTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertSameOutput(self, base, fast, text, **options):
+        from pygments import highlight
+        self.assertEqual(highlight(text, self.lexer, fast(**options)),
+                         highlight(text, self.lexer, base(**options)), repr(text))
+
+    def test_html(self):
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.formatters import OpenSSLHtmlFormatter
+        for text in [TEXT] + INPUTS + list(fuzzed_inputs(200, 14)):
+            self.assertSameOutput(HtmlFormatter, OpenSSLHtmlFormatter, text)
+
+    def test_html_options(self):
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.formatters import OpenSSLHtmlFormatter
+        for options in [{'noclasses': True}, {'linenos': 'table'}, {'nowrap': True},
+                        {'linenos': 'inline', 'hl_lines': [2, 3]}, {'full': True},
+                        {'classprefix': 'x-', 'lineanchors': 'L'}]:
+            self.assertSameOutput(HtmlFormatter, OpenSSLHtmlFormatter, TEXT, **options)
+
+    def test_html_escaping(self):
+        # Escaping follows the installed version of HtmlFormatter
+        from pygments.formatters import HtmlFormatter
+        from pygments_openssl.formatters import OpenSSLHtmlFormatter
+        for char in '&<>"\'':
+            text = 'a = %s\nb = "%s" \'%s\' # %s\n' % (char, char, char, char)
+            self.assertSameOutput(HtmlFormatter, OpenSSLHtmlFormatter, text)
+
+    def test_html_other_token_types(self):
+        from pygments import format
+        from pygments.formatters import HtmlFormatter
+        from pygments.token import Generic
+        from pygments_openssl.formatters import OpenSSLHtmlFormatter
+        tokens = list(self.lexer.get_tokens(TEXT)) + [(Generic.Deleted, u'<x>\n')]
+        self.assertEqual(format(tokens, OpenSSLHtmlFormatter()), format(tokens, HtmlFormatter()))
+
+    def test_terminal(self):
+        from pygments.formatters import TerminalFormatter
+        from pygments_openssl.formatters import OpenSSLTerminalFormatter
+        for text in [TEXT, 'a = b\r\nc\x0bd\n'] + INPUTS + list(fuzzed_inputs(200, 14)):
+            self.assertSameOutput(TerminalFormatter, OpenSSLTerminalFormatter, text)
+
+    def test_terminal_options(self):
+        from pygments.formatters import TerminalFormatter
+        from pygments_openssl.formatters import OpenSSLTerminalFormatter
+        for options in [{'bg': 'dark'}, {'linenos': True}]:
+            self.assertSameOutput(TerminalFormatter, OpenSSLTerminalFormatter, TEXT, **options)
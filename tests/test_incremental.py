@@ -0,0 +1,87 @@
+import random
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, FRAGMENTS
+
+
+class IncrementalLexerTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertUpToDate(self, inc):
+        self.assertEqual(
+            list(inc.get_tokens_unprocessed()),
+            list(self.lexer.get_tokens_unprocessed(inc.text)), repr(inc.text))
+
+    def test_initial_text(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        inc = IncrementalLexer('[ default ]\ndir = .\n')
+        self.assertUpToDate(inc)
+        self.assertEqual(list(inc.get_tokens()), list(self.lexer.get_tokens(inc.text)))
+
+    def test_empty_text(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        inc = IncrementalLexer()
+        self.assertEqual(list(inc.get_tokens()), [])
+        inc.edit(0, 0, 'dir = .\n')
+        self.assertUpToDate(inc)
+        inc.edit(0, 8, '')
+        self.assertEqual(list(inc.get_tokens()), [])
+
+    def test_edit_relexes_changed_lines_only(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        text = ''.join('key%d = value%d\n' % (i, i) for i in range(100))
+        inc = IncrementalLexer(text)
+        pos = text.index('value50')
+        start, end = inc.edit(pos, pos + 5, 'VALUE')
+        self.assertEqual(start, text.index('key50'))
+        self.assertEqual(end, text.index('key51'))
+        self.assertUpToDate(inc)
+
+    def test_line_continuation(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        text = 'a = b\nc = d\ne = f\n'
+        inc = IncrementalLexer(text)
+        inc.edit(5, 5, '\\')
+        self.assertUpToDate(inc)
+        inc.edit(5, 6, '')
+        self.assertUpToDate(inc)
+
+    def test_multiline_string(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        text = 'a = "b\nc = d\ne = f\n'
+        inc = IncrementalLexer(text)
+        self.assertUpToDate(inc)
+        # Closing the string changes the tokens of the first line
+        inc.edit(len(text) - 1, len(text) - 1, '"')
+        self.assertUpToDate(inc)
+        inc.update(text)
+        self.assertUpToDate(inc)
+
+    def test_variable_braces(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        inc = IncrementalLexer('a = ${b\nc = d\ne = f\n')
+        inc.edit(7, 7, '}')
+        self.assertUpToDate(inc)
+        inc.edit(7, 8, '')
+        self.assertUpToDate(inc)
+
+    def test_random_edits(self):
+        from pygments_openssl.incremental import IncrementalLexer
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        rand = random.Random(42)
+        texts = list(fuzzed_inputs(30, 42))
+        for lexer in (self.lexer, OpenSSLConfScannerLexer()):
+            for text in texts:
+                inc = IncrementalLexer(text, lexer)
+                for i in range(10):
+                    start = rand.randint(0, len(inc.text))
+                    end = rand.randint(start, min(len(inc.text), start + 10))
+                    replacement = rand.choice(FRAGMENTS + [''])
+                    if i % 2:
+                        inc.edit(start, end, replacement)
+                    else:
+                        inc.update(inc.text[:start] + replacement + inc.text[end:])
+                    self.assertUpToDate(inc)
@@ -13,6 +13,11 @@ class InstallationTests(unittest.TestCase):
         from pygments.lexers import get_lexer_by_name
         get_lexer_by_name('openssl')
 
+    def test_has_formatters(self):
+        from pygments.formatters import get_formatter_by_name
+        get_formatter_by_name('openssl-html')
+        get_formatter_by_name('openssl-terminal')
+
     def test_unknown_lexer_raises(self):
         from pygments.lexers import get_lexer_by_name
         from pygments.util import ClassNotFound
@@ -23,3 +28,10 @@ class InstallationTests(unittest.TestCase):
         else:
             self.fail('ClassNotFound not raised')
 
+    def test_import_does_not_load_lexer_registry(self):
+        import subprocess
+        import sys
+        code = ('import sys; import pygments_openssl.lexer; '
+                'sys.exit("pygments.lexers" in sys.modules)')
+        rc = subprocess.call([sys.executable, '-c', code])
+        self.assertEqual(rc, 0)
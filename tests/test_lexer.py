@@ -251,6 +251,29 @@ class LexerTests(unittest.TestCase):
         self.assertEqual(tokens[5], (token.String, ',bar'))
         self.assertEqual(tokens[6], (T_SPACE, '\n'))
 
+    def test_lex_rhs_long_value(self):
+        from pygments import token
+
+        tokens = self.lex('foo = CN=a.b,O=c/d+e;f\n', 'openssl')
+        self.assertEqual(tokens[4], (token.String, 'CN=a.b,O=c/d+e;f'))
+        self.assertEqual(tokens[5], (T_SPACE, '\n'))
+
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        tokens = list(OpenSSLConfLexer().get_tokens_unprocessed('foo = a,b;c\n'))
+        self.assertEqual(tokens[4], (6, token.String, 'a,b;c'))
+
+    def test_precompile(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+
+        class SubLexer(OpenSSLConfLexer):
+            pass
+
+        self.assertFalse('_tokens' in SubLexer.__dict__)
+        tokens = SubLexer.precompile()
+        self.assertTrue(SubLexer.__dict__['_tokens'] is tokens)
+        self.assertTrue(SubLexer.precompile() is tokens)
+        self.assertEqual(sorted(tokens), sorted(OpenSSLConfLexer.tokens))
+
     def test_lex_incomplete_lhs(self):
         from pygments import token
 
@@ -301,6 +324,59 @@ class LexerTests(unittest.TestCase):
         self.assertEqual(tokens[9], (T_SPACE, '\n'))
 
 
+class AnalyseTextTests(unittest.TestCase):
+
+    def analyse(self, text):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        return OpenSSLConfLexer.analyse_text(text)
+
+    def test_generic_ini(self):
+        # Sections and assignments alone score below IniLexer
+        from pygments.lexers import IniLexer
+        for text in ['[ default ]\ndir = .\n',
+                     '[metadata]\nname = example\nversion = 1.0\n\n'
+                     '; Comment\n[options]\nzip_safe = false\n']:
+            self.assertTrue(self.analyse(text) < IniLexer.analyse_text(text), repr(text))
+
+    def test_leading_comments(self):
+        score = self.analyse('# Comment\nHOME = .\n\n[ ca ]\ndefault_ca = CA_default\n'
+                             'dir = $HOME/ca\n')
+        self.assertTrue(0.4 < score < 1.0)
+
+    def test_variables(self):
+        plain = self.analyse('[ ca ]\ndefault_ca = ca\ndir = .\n')
+        variable = self.analyse('[ ca ]\ndefault_ca = ca\ndir = $HOME\n')
+        qualified = self.analyse('[ ca ]\ndefault_ca = ca\ndir = ${ENV::HOME}\n')
+        self.assertTrue(plain < variable < qualified)
+        self.assertTrue(self.analyse('[ ca ]\ndir = ${ENV::HOME}\n') > 0.4)
+
+    def test_other_formats(self):
+        # Shell environment and Java properties files
+        self.assertEqual(self.analyse('HOME=/root\nPATH=$HOME/bin:/usr/bin\n'), 0.0)
+        self.assertEqual(self.analyse('# Settings\napp.name=Demo\n'
+                                      'app.home=${user.home}/demo\n'
+                                      'app.log=$(app.home)/log\n'), 0.0)
+        self.assertEqual(self.analyse('[ ca ]\ndir = $HOME\n'), 0.0)
+
+    def test_directives(self):
+        plain = self.analyse('HOME = .\n[ ca ]\ndir = .\n')
+        directive = self.analyse('.include /etc/ssl/common.cnf\n[ ca ]\ndir = .\n')
+        self.assertTrue(directive > plain)
+
+    def test_assignments_only(self):
+        self.assertEqual(self.analyse('a = 1\nb = 2\n'), 0.0)
+
+    def test_not_a_config(self):
+        self.assertEqual(self.analyse('Hello world,\nthis is prose.\nx = 1\n'), 0.0)
+        self.assertEqual(self.analyse('# Only a comment\n'), 0.0)
+
+    def test_bounded_prefix(self):
+        from pygments_openssl.lexer import ANALYSE_SIZE
+        text = 'HOME = .\n[ ca ]\ndir = ${ENV::HOME}\n'
+        self.assertEqual(self.analyse(text + 'prose\n' * ANALYSE_SIZE), 0.0)
+        self.assertEqual(self.analyse(text * ANALYSE_SIZE + 'prose\n' * ANALYSE_SIZE), self.analyse(text))
+
+
 class DirectiveLexerTests(unittest.TestCase):
 
     def lex(self, code, lexer_name):
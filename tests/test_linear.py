@@ -0,0 +1,128 @@
+import os
+import timeit
+import unittest
+
+# Inputs that make a backtracking lexer rescan the text, keyed by name,
+# as functions of a repeat count
+ADVERSARIAL = {
+    'escaped double quotes': lambda n: 'a = ' + '"\\' * n + '\n',
+    'escaped single quotes': lambda n: "a = " + "'\\" * n + '\n',
+    'octal escapes': lambda n: 'a = "' + '\\1' * n,
+    'unterminated strings': lambda n: 'a = "x\' \\\n' * n,
+    'oid': lambda n: 'a = 1.' + '1' * n + 'x\n',
+    'brackets': lambda n: '[' * n + '\n',
+    'brackets and names': lambda n: '[a' * n + '\n',
+    'comments without newline': lambda n: 'a = ' + '#' * n,
+    'pragma names': lambda n: '.pragma ' + 'a-' * n + '\n',
+    'unterminated variables': lambda n: 'a = ${x\nb = $(y\n' * n,
+}
+
+SIZE = 4000
+
+# Wall-clock timing is noisy on loaded machines
+TIMING = os.environ.get('PYGMENTS_OPENSSL_TIMING_TESTS')
+
+
+class LinearTimeTests(unittest.TestCase):
+
+    def work(self, text):
+        # Return the number of rule attempts, and of failed attempts of
+        # the rules that scan ahead
+        from pygments_openssl.lexer import OpenSSLConfLexer, GUARDS
+        lexer = OpenSSLConfLexer(profile=True)
+        list(lexer.get_tokens_unprocessed(text))
+        rules = [rule for state in lexer.profile.summary().values() for rule in state['rules']]
+        return (sum(rule['attempts'] for rule in rules),
+                sum(rule['attempts'] - rule['matches'] for rule in rules
+                    if rule['pattern'] in GUARDS))
+
+    def test_lexer_work(self):
+        # Four times the input takes at most four times the rule attempts,
+        # and rules that scan ahead do not fail more often
+        for name, make in sorted(ADVERSARIAL.items()):
+            small = self.work(make(SIZE))
+            large = self.work(make(4 * SIZE))
+            self.assertTrue(large[0] <= 4 * small[0] + 10,
+                '%s: %d, %d attempts for 4 times the input' % (name, small[0], large[0]))
+            self.assertEqual(large[1], small[1], name)
+
+    def seconds(self, lexer, text):
+        lex = lambda: list(lexer.get_tokens_unprocessed(text))
+        return min(timeit.repeat(lex, number=1, repeat=3))
+
+    def assertLinear(self, lexer):
+        # Four times the input may take four times as long, times a margin
+        # for noise; quadratic behavior takes sixteen times as long
+        for name, make in sorted(ADVERSARIAL.items()):
+            small = self.seconds(lexer, make(SIZE))
+            large = self.seconds(lexer, make(4 * SIZE))
+            self.assertTrue(large < 4 * 2.5 * small + 0.005,
+                '%s: %.4f s, %.4f s for 4 times the input' % (name, small, large))
+
+    @unittest.skipUnless(TIMING, 'set PYGMENTS_OPENSSL_TIMING_TESTS=1 to run')
+    def test_lexer(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.assertLinear(OpenSSLConfLexer())
+
+    @unittest.skipUnless(TIMING, 'set PYGMENTS_OPENSSL_TIMING_TESTS=1 to run')
+    def test_scanner(self):
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        self.assertLinear(OpenSSLConfScannerLexer())
+
+    def test_same_tokens(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        lexer = OpenSSLConfLexer()
+        scanner = OpenSSLConfScannerLexer()
+        for name, make in sorted(ADVERSARIAL.items()):
+            text = make(20)
+            self.assertEqual(
+                list(scanner.get_tokens_unprocessed(text)),
+                list(lexer.get_tokens_unprocessed(text)), name)
+
+    def test_guards(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer, GUARDS
+        patterns = set(rexmatch.__self__.pattern
+                       for rules in OpenSSLConfLexer.precompile().values()
+                       for rexmatch, action, new_state in rules)
+        self.assertEqual(set(GUARDS) - patterns, set())
+
+    def test_guard(self):
+        # A string without closing quote does not affect other texts
+        from pygments.token import String
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer()
+        tokens = list(lexer.get_tokens_unprocessed(u'a = "x\nb = 1\n'))
+        self.assertTrue(all(t is not String.Double for i, t, v in tokens))
+        tokens = list(lexer.get_tokens_unprocessed(u'a = x\nb = "y"\n'))
+        self.assertTrue((10, String.Double, u'"y"') in tokens)
+
+    def test_guard_start(self):
+        # Failures away from the first character of a rule are not
+        # remembered
+        import re
+        from pygments_openssl.dispatch import Guard
+        guard = Guard(re.compile(r'#.*(?=\n)').match, lambda text, pos: len(text),
+                      re.compile(r'#').match)
+        text = u'a = b # Comment\n'
+        self.assertEqual(guard.match(text, 0), None)
+        self.assertEqual(guard.match(text, 6).group(), u'# Comment')
+
+    def test_guard_release(self):
+        # An abandoned scan does not keep its text alive in guards
+        from pygments_openssl.dispatch import remembering
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer()
+        text = u'a = "x\nb = 1\nc = 2\n'
+
+        def remembered():
+            return [guard for guard in getattr(remembering, 'guards', ())
+                    if guard.local.failed[0] is text]
+
+        scan = lexer.scan(text, 0, ['root'])
+        for index, ttype, value in scan:
+            if index > 8:
+                break
+        self.assertNotEqual(remembered(), [])
+        scan.close()
+        self.assertEqual(remembered(), [])
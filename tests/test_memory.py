@@ -0,0 +1,149 @@
+"""Memory regression tests
+
+The peak memory used while lexing inputs of several shapes and sizes, and
+the memory retained after lexing, are compared with the baselines in
+memory_baselines.json. Measurements are allowed to exceed a baseline by
+RATIO plus SLACK bytes, to absorb differences between Python and Pygments
+versions.
+
+To record new baselines run: python -m tests.test_memory
+"""
+
+import gc
+import json
+import os
+import sys
+import unittest
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'memory_baselines.json')
+
+RATIO = 1.5
+SLACK = 16384
+
+SIZES = (1000, 10000, 40000)
+
+
+def long_value(size):
+    return 'a = ' + ''.join('v%d.-' % (i % 10) for i in range(size // 5)) + '\n'
+
+
+def long_string(size):
+    # The unterminated string makes a guarded rule fail
+    return 'a = "' + 'x\\"y ' * (size // 5) + '"\nb = "open\n'
+
+
+def small_lines(size):
+    return ''.join('k%d = v\n' % (i % 100) for i in range(size // 8))
+
+
+def nested(size):
+    depth = size // 4
+    return 'a = ' + '${x' * depth + '}' * depth + '\n'
+
+
+def references(size):
+    return 'a = ' + ' '.join('${s::n%d}$(m)' % (i % 10) for i in range(size // 14)) + '\n'
+
+
+SHAPES = dict(long_value=long_value, long_string=long_string, small_lines=small_lines,
+              nested=nested, references=references)
+
+
+def measure(lexer, text, repeat=2):
+    """Return the (peak, retained) bytes allocated by lexing ``text``,
+    the least of ``repeat`` runs.
+    """
+    for token in lexer.get_tokens(text):
+        pass
+    results = []
+    for i in range(repeat):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for token in lexer.get_tokens(text):
+                pass
+            token = None
+            peak = tracemalloc.get_traced_memory()[1]
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        results.append((peak, retained))
+    return min(r[0] for r in results), min(r[1] for r in results)
+
+
+def measure_all():
+    from pygments_openssl.lexer import OpenSSLConfLexer
+    lexer = OpenSSLConfLexer()
+    results = {}
+    for name, shape in sorted(SHAPES.items()):
+        for size in SIZES:
+            peak, retained = measure(lexer, shape(size))
+            results['%s-%d' % (name, size)] = dict(peak=peak, retained=retained)
+    return results
+
+
+def record():
+    with open(BASELINES, 'w') as f:
+        json.dump(measure_all(), f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+@unittest.skipIf(tracemalloc is None, 'requires tracemalloc')
+class MemoryTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+        with open(BASELINES) as f:
+            self.baselines = json.load(f)
+
+    def check(self, name):
+        shape = SHAPES[name]
+        peaks = []
+        for size in SIZES:
+            key = '%s-%d' % (name, size)
+            peak, retained = measure(self.lexer, shape(size))
+            peaks.append(peak)
+            baseline = self.baselines[key]
+            self.assertTrue(peak <= baseline['peak'] * RATIO + SLACK,
+                            '%s: peak %d bytes, baseline %d' % (key, peak, baseline['peak']))
+            self.assertTrue(retained <= baseline['retained'] * RATIO + SLACK,
+                            '%s: retained %d bytes, baseline %d' % (key, retained, baseline['retained']))
+
+        # Peak memory grows no faster than the input
+        ratio = float(SIZES[-1]) / SIZES[-2]
+        self.assertTrue(peaks[-1] <= peaks[-2] * ratio * RATIO + SLACK,
+                        '%s: peak %d bytes at size %d, %d at size %d' % (
+                            name, peaks[-2], SIZES[-2], peaks[-1], SIZES[-1]))
+
+    def test_long_value(self):
+        self.check('long_value')
+
+    def test_long_string(self):
+        self.check('long_string')
+
+    def test_small_lines(self):
+        self.check('small_lines')
+
+    def test_nested(self):
+        self.check('nested')
+
+    def test_references(self):
+        self.check('references')
+
+    def test_baselines(self):
+        # Every shape and size has a baseline
+        keys = set('%s-%d' % (name, size) for name in SHAPES for size in SIZES)
+        self.assertEqual(set(self.baselines), keys)
+
+
+if __name__ == '__main__':
+    if tracemalloc is None:
+        sys.exit('requires tracemalloc')
+    record()
@@ -0,0 +1,77 @@
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+TEXT = '''\
+# Comment
+HOME = .
+.pragma dollarid:true
+
+[ ca ]
+dir = $HOME/${ENV::CA}/$(name)  # Comment
+name = "a b" \\
+    continued
+.include = /etc/ssl/extra.cnf
+empty =
+'''
+
+
+class ParserTests(unittest.TestCase):
+
+    def test_sections(self):
+        from pygments_openssl.model import parse
+        document = parse(TEXT)
+        self.assertEqual([s.name for s in document], ['default', 'ca'])
+        self.assertEqual([s.header for s in document], [None, '[ ca ]'])
+        self.assertEqual(document.sections[0].end, TEXT.index('[ ca ]'))
+        self.assertEqual(document.sections[1].end, len(TEXT))
+
+    def test_entries(self):
+        from pygments_openssl.model import parse
+        document = parse(TEXT)
+        entries = document.find('ca')[0].entries
+        self.assertEqual([e.key for e in entries], ['dir', 'name', 'empty'])
+        self.assertEqual([e.value for e in entries],
+                         ['$HOME/${ENV::CA}/$(name)', '"a b" \\\n    continued', ''])
+        self.assertEqual(entries[0].source, 'dir = $HOME/${ENV::CA}/$(name)')
+        self.assertEqual(document.lookup('default', 'HOME').value, '.')
+        self.assertEqual(document.lookup('ca', 'HOME'), None)
+
+    def test_directives(self):
+        from pygments_openssl.model import parse
+        document = parse(TEXT)
+        directives = document.sections[0].directives + document.sections[1].directives
+        self.assertEqual([d.name for d in directives], ['.pragma', '.include'])
+        self.assertEqual([d.value for d in directives], ['dollarid:true', '/etc/ssl/extra.cnf'])
+
+    def test_variables(self):
+        from pygments_openssl.model import parse
+        entry = parse(TEXT).lookup('ca', 'dir')
+        self.assertEqual([v.source for v in entry.variables], ['$HOME', '${ENV::CA}', '$(name)'])
+        self.assertEqual([v.name for v in entry.variables], ['HOME', 'ENV::CA', 'name'])
+        self.assertEqual([v.section for v in entry.variables], [None, 'ENV', None])
+        self.assertEqual([v.variable for v in entry.variables], ['HOME', 'CA', 'name'])
+        self.assertEqual(parse(TEXT).lookup('ca', 'name').variables, ())
+
+    def test_spans(self):
+        from pygments_openssl.model import parse
+        entry = parse(TEXT).lookup('ca', 'dir')
+        self.assertEqual(entry.value_start, TEXT.index('$HOME'))
+        self.assertEqual(entry.value_end, TEXT.index('  # Comment'))
+        self.assertEqual((entry.key_start, entry.key_end), (TEXT.index('dir'), TEXT.index('dir') + 3))
+
+    def test_slots(self):
+        from pygments_openssl.model import parse
+        entry = parse(TEXT).lookup('ca', 'dir')
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertFalse(hasattr(entry.variables[0], '__dict__'))
+
+    def test_same_tokens(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        from pygments_openssl.model import Parser
+        lexer = OpenSSLConfLexer()
+        parser = Parser(lexer)
+        for text in INPUTS + list(fuzzed_inputs(300, 13)):
+            self.assertEqual(list(parser.get_tokens_unprocessed(text)),
+                             list(lexer.get_tokens_unprocessed(text)), repr(text))
+            self.assertEqual(parser.document.text, text)
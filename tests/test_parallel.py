@@ -0,0 +1,68 @@
+import multiprocessing
+import random
+import unittest
+
+from tests.test_scanner import FRAGMENTS
+
+SECTION = '[ section ]\n'
+
+
+class ParallelLexerTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def assertSameTokens(self, parallel, text):
+        self.assertEqual(
+            list(parallel.get_tokens_unprocessed(text)),
+            list(self.lexer.get_tokens_unprocessed(text)), repr(text))
+
+    def test_split(self):
+        from pygments_openssl.parallel import ParallelLexer
+        text = 'a = b\n[ x ]\nc = d \\\n[ y ]\ne = f\n[ z ]\n'
+        parallel = ParallelLexer(processes=10, chunksize=1)
+        # The header after the continued line is skipped
+        self.assertEqual(parallel.split(text), [0, 6, 32, len(text)])
+
+    def test_no_split(self):
+        from pygments_openssl.parallel import ParallelLexer
+        parallel = ParallelLexer(processes=1, chunksize=1)
+        self.assertEqual(parallel.split('a = b\n'), [0, 6])
+        self.assertSameTokens(parallel, 'a = b\n')
+
+    def test_sections(self):
+        from pygments_openssl.parallel import ParallelLexer
+        text = ''.join('[ s%d ]\nkey = value%d # c\n' % (i, i) for i in range(100))
+        with ParallelLexer(processes=2, chunksize=100) as parallel:
+            self.assertSameTokens(parallel, text)
+
+    @unittest.skipUnless(hasattr(multiprocessing, 'get_context'), 'requires Python 3')
+    def test_spawn(self):
+        # Workers create the lexer, whose class was never instantiated there
+        from pygments_openssl.parallel import ParallelLexer
+        text = ''.join('[ s%d ]\nkey = value%d # c\n' % (i, i) for i in range(100))
+        with ParallelLexer(self.lexer, processes=2, chunksize=100,
+                           context=multiprocessing.get_context('spawn')) as parallel:
+            self.assertSameTokens(parallel, text)
+
+    def test_constructs_spanning_sections(self):
+        from pygments_openssl.parallel import ParallelLexer
+        parallel = ParallelLexer(processes=1, chunksize=1)
+        for text in [
+            'a = b \\\n[ x ]\nc = d\n[ y ]\n',
+            'a = "b\n[ x ]\nc = d"\n[ y ]\ne = f\n',
+            'a = "b\n[ x ]\nc = d\n[ y ]\ne = f\n',
+            'a = ${b\n[ x ]\n}\n[ y ]\ne = f\n',
+            'a = . \n[ x ]\nc = d\n[ y ]\ne = f\n',
+        ]:
+            self.assertSameTokens(parallel, text)
+
+    def test_fuzzed_inputs(self):
+        from pygments_openssl.parallel import ParallelLexer
+        rand = random.Random(42)
+        fragments = FRAGMENTS + ['\n' + SECTION] * 10
+        parallel = ParallelLexer(processes=1, chunksize=10)
+        for i in range(300):
+            text = ''.join(rand.choice(fragments) for j in range(rand.randint(1, 200)))
+            self.assertSameTokens(parallel, text)
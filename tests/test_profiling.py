@@ -0,0 +1,50 @@
+import unittest
+
+TEXT = '[ default ]\ndir = $ENV::HOME/ssl # Comment\nname = "quoted \\" value"\n'
+
+
+class LexerProfileTests(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer()
+        self.assertEqual(lexer.profile, None)
+        self.assertTrue(lexer._tokens is OpenSSLConfLexer.precompile())
+
+    def test_same_tokens(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        self.assertEqual(list(lexer.get_tokens(TEXT)), list(OpenSSLConfLexer().get_tokens(TEXT)))
+
+    def test_summary(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        list(lexer.get_tokens(TEXT))
+        summary = lexer.profile.summary()
+        self.assertEqual(sorted(summary), sorted(OpenSSLConfLexer.tokens))
+        rhs = summary['rhs']
+        self.assertTrue(rhs['attempts'] >= rhs['matches'] > 0)
+        self.assertEqual(rhs['attempts'], sum(r['attempts'] for r in rhs['rules']))
+        self.assertEqual(rhs['matches'], sum(r['matches'] for r in rhs['rules']))
+
+    def test_rule_labels(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        labels = [r['rule'] for r in lexer.profile.summary()['rhs']['rules']]
+        self.assertEqual(len(labels), len(OpenSSLConfLexer.precompile()['rhs']))
+        self.assertTrue(any(label.startswith('rhs-default:') for label in labels))
+
+    def test_reset(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        list(lexer.get_tokens(TEXT))
+        lexer.profile.reset()
+        self.assertEqual(sum(s['attempts'] for s in lexer.profile.summary().values()), 0)
+
+    def test_report(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        lexer = OpenSSLConfLexer(profile=True)
+        list(lexer.get_tokens(TEXT))
+        report = lexer.profile.report()
+        self.assertTrue(report.startswith('state/rule'))
+        self.assertTrue('\nrhs ' in report)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+COMMON = '''\
+base = /etc/ssl
+[ common ]
+cert = $base/cert.pem
+'''
+
+EXTRA = '''\
+[ extra ]
+key = ${common::cert}.key
+'''
+
+MAIN = '''\
+HOME = .
+.include common.cnf
+.include conf.d
+[ ca ]
+dir = $(HOME)/ca/${ENV::USER}
+undefined = $nope
+'''
+
+
+class ResolverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'conf.d'))
+        self.write('common.cnf', COMMON)
+        self.write('conf.d/extra.cnf', EXTRA)
+        self.write('conf.d/README', 'Not included')
+        self.main = self.write('main.cnf', MAIN)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def resolve(self, path, **kw):
+        from pygments_openssl.resolve import Resolver
+        return Resolver(environ={'USER': 'me'}, **kw).resolve(path)
+
+    def test_values(self):
+        resolved = self.resolve(self.main)
+        self.assertEqual(resolved.lookup('default', 'base'), '/etc/ssl')
+        self.assertEqual(resolved.lookup('common', 'cert'), '/etc/ssl/cert.pem')
+        self.assertEqual(resolved.lookup('extra', 'key'), '/etc/ssl/cert.pem.key')
+        self.assertEqual(resolved.lookup('ca', 'dir'), './ca/me')
+
+    def test_files(self):
+        resolved = self.resolve(self.main)
+        self.assertEqual([os.path.basename(p) for p in resolved.files],
+                         ['main.cnf', 'common.cnf', 'extra.cnf'])
+
+    def test_errors(self):
+        self.write('main.cnf', MAIN + '.include missing.cnf\n.include main.cnf\n')
+        resolved = self.resolve(self.main)
+        self.assertEqual([e[2].split()[:2] for e in resolved.errors],
+                         [['undefined', 'variable'], ['cannot', 'read'], ['include', 'cycle']])
+        self.assertEqual(resolved.lookup('ca', 'undefined'), '$nope')
+
+    def test_text(self):
+        resolved = self.resolve(self.main)
+        self.assertEqual(resolved.text, MAIN.replace('.include common.cnf\n', '.include common.cnf\n' + COMMON)
+                         .replace('.include conf.d\n', '.include conf.d\n' + EXTRA.replace('${common::cert}', '/etc/ssl/cert.pem'))
+                         .replace('$(HOME)/ca/${ENV::USER}', './ca/me')
+                         .replace('$base', '/etc/ssl'))
+
+    def test_get_tokens(self):
+        from pygments.token import String
+        resolved = self.resolve(self.main)
+        tokens = list(resolved.get_tokens())
+        self.assertEqual(''.join(value for ttype, value in tokens), resolved.text)
+        self.assertTrue((String, './ca/me') in tokens)
+
+    def test_includedir_pragma(self):
+        self.write('main.cnf', '.pragma includedir:%s\n.include extra.cnf\n' % os.path.join(self.directory, 'conf.d'))
+        resolved = self.resolve(self.main)
+        self.assertEqual([e[2] for e in resolved.errors], ['undefined variable ${common::cert}'])
+        self.assertEqual([os.path.basename(p) for p in resolved.files], ['main.cnf', 'extra.cnf'])
+
+    def test_abspath_pragma(self):
+        self.write('main.cnf', '.pragma abspath:true\n.include common.cnf\n')
+        resolved = self.resolve(self.main)
+        self.assertEqual(resolved.errors[0][2], 'relative include common.cnf')
+
+    def test_shared_cache(self):
+        from pygments_openssl.resolve import Resolver
+        resolver = Resolver(environ={})
+        paths = [self.write('main%d.cnf' % i, '.include common.cnf\nx = $base\n') for i in range(10)]
+        for path in paths:
+            self.assertEqual(resolver.resolve(path).lookup('common', 'x'), '/etc/ssl')
+        info = resolver.cache.info()
+        self.assertEqual(info['reads'], 11)
+        self.assertEqual(info['hits'], 9)
+
+    def test_changed_file_is_read_again(self):
+        from pygments_openssl.resolve import FileCache
+        cache = FileCache()
+        self.assertEqual(cache.get(self.main).text, MAIN)
+        self.write('main.cnf', MAIN + 'x = y\n')
+        self.assertEqual(cache.get(self.main).text, MAIN + 'x = y\n')
+        self.assertEqual(cache.info()['reads'], 2)
+
+    def test_mmap(self):
+        from pygments_openssl.resolve import FileCache
+        cache = FileCache(mmap_size=0)
+        resolved = self.resolve(self.main, cache=cache)
+        self.assertEqual(resolved.lookup('extra', 'key'), '/etc/ssl/cert.pem.key')
+        self.assertEqual(cache.info()['mapped'], 3)
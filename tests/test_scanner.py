@@ -0,0 +1,79 @@
+import random
+import unittest
+
+FRAGMENTS = [
+    '[ section ]\n', '[x]', 'key', ' = ', '=', '\n', '\n', '\n', '\\\n', '\\',
+    '"', "'", '${', '$(', '}', ')', '$var', 'a::b', '::', '{', '(', '$',
+    'email:', 'IP:', 'DER:', 'ip :', '1.2.3', '1..2', '42', '3.5', '@sec',
+    'critical', 'CRITICAL', '# comment', ' ', '  ', '\t', '\r\n',
+    '.include', '.INCLUDE', '.pragma', '.other', 'dollarid:', 'abspath',
+    'includedir :', 'x', 'ab', '0', '-', ';', ':', '.', ',', '+', '/',
+    'a@b.c', 'ff:0a', '\\"', '\\\\', 'value with words', 'MIIB+/Qx==',
+    u'\xe9', u'\u0131', u'\u0130', u'\u017f', u'\u0663', u'\xb2',
+]
+
+INPUTS = [
+    '# Comment\n',
+    '[ default ]\n',
+    'dir = .\n',
+    'dir \\\n = .\n',
+    'dir = \\\n.\n',
+    'dir = . # Comment\n',
+    'dir = . \nfoo = bar\n',
+    'foo = "bar\\"baz" \'x\\\ny\'\n',
+    'foo = $bar ${bar} $(bar) ${ a::b } $( c ) ${x\n',
+    'foo = 1.2.840.113549 42 3.14 @section critical,bar\n',
+    'san = email:copy, IP:127.0.0.1, IP:fe80::1, DER:0a:ff, email:a@b.c\n',
+    '.include foo.cnf\n.include = /etc/ssl\n.INCLUDE\n',
+    '.pragma dollarid:true\n.pragma = abspath : false\n.pragma foo:bar\n',
+    '.other = 1 $x\n.other\n',
+    'dir\ndir = .\n',
+    '= .\n',
+    'foo = "unterminated\n',
+]
+
+
+def fuzzed_inputs(count, seed):
+    rand = random.Random(seed)
+    for i in range(count):
+        yield u''.join(rand.choice(FRAGMENTS) for j in range(rand.randint(1, 30)))
+
+
+class ScannerTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        self.regex_lexer = OpenSSLConfLexer()
+        self.scanner_lexer = OpenSSLConfScannerLexer()
+
+    def assertSameTokens(self, text):
+        self.assertEqual(
+            list(self.scanner_lexer.get_tokens_unprocessed(text)),
+            list(self.regex_lexer.get_tokens_unprocessed(text)), repr(text))
+
+    def test_has_lexer(self):
+        from pygments.lexers import get_lexer_by_name
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        self.assertTrue(isinstance(get_lexer_by_name('openssl-scanner'), OpenSSLConfScannerLexer))
+
+    def test_inputs(self):
+        for text in INPUTS:
+            self.assertSameTokens(text)
+            self.assertSameTokens(text.rstrip('\n'))
+
+    def test_fuzzed_inputs(self):
+        for text in fuzzed_inputs(2000, 42):
+            self.assertSameTokens(text)
+
+    def test_fuzzed_characters(self):
+        rand = random.Random(42)
+        alphabet = u''.join(FRAGMENTS)
+        for i in range(2000):
+            self.assertSameTokens(u''.join(rand.choice(alphabet) for j in range(rand.randint(1, 60))))
+
+    def test_get_tokens(self):
+        for text in fuzzed_inputs(200, 7):
+            self.assertEqual(
+                list(self.scanner_lexer.get_tokens(text)),
+                list(self.regex_lexer.get_tokens(text)))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+TEXT = u'''\
+# Comment
+HOME = .
+
+[ ca ]
+default_ca = CA_default     # The default CA
+
+[ CA_default ]
+dir = "/etc/ssl \\
+[ not_a_section ]"
+name = ${ENV::NAME} \\
+[ neither ]
+subject = /CN=Gr\u00fc\u00dfe
+
+[tsa]
+'''
+
+
+class SectionIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def headers(self, text):
+        from pygments.token import Keyword
+        return [(i, v) for i, t, v in self.lexer.get_tokens_unprocessed(text) if t is Keyword]
+
+    def test_sections(self):
+        from pygments_openssl.sections import SectionIndex
+        index = SectionIndex(TEXT)
+        self.assertEqual([s.name for s in index], ['ca', 'CA_default', 'tsa'])
+        self.assertEqual([s.header for s in index], ['[ ca ]', '[ CA_default ]', '[tsa]'])
+        self.assertEqual([s.line for s in index], [4, 7, 14])
+        self.assertEqual([s.offset for s in index], [TEXT.index('[ ca'), TEXT.index('[ CA'), TEXT.index('[tsa')])
+        self.assertEqual([s.end for s in index], [TEXT.index('[ CA'), TEXT.index('[tsa'), len(TEXT)])
+
+    def test_byte_offsets(self):
+        from pygments_openssl.sections import SectionIndex
+        index = SectionIndex(TEXT)
+        data = TEXT.encode('utf-8')
+        self.assertEqual([s.byte_offset for s in index], [data.index(s.header.encode('utf-8')) for s in index])
+        self.assertEqual(index[2].byte_offset, index[2].offset + 2)
+
+    def test_find(self):
+        from pygments_openssl.sections import SectionIndex
+        index = SectionIndex(TEXT)
+        self.assertEqual(index.find('CA_default'), index[1])
+        self.assertEqual(index.find('not_a_section'), None)
+        self.assertEqual(index.section_at(0), None)
+        self.assertEqual(index.section_at(TEXT.index('dir')), index[1])
+        self.assertEqual(index.section_at(len(TEXT)), index[2])
+
+    def test_get_tokens_unprocessed(self):
+        from pygments_openssl.sections import SectionIndex
+        index = SectionIndex(TEXT)
+        tokens = list(self.lexer.get_tokens_unprocessed(TEXT))
+        for section in index:
+            self.assertEqual(list(index.get_tokens_unprocessed(section.offset)),
+                             [t for t in tokens if section.offset <= t[0] < section.end])
+        self.assertEqual(list(index.get_tokens_unprocessed(0)),
+                         [t for t in tokens if t[0] < index[0].offset])
+
+    def test_agrees_with_lexer(self):
+        from pygments_openssl.sections import find_headers
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        scanner = OpenSSLConfScannerLexer()
+        for text in INPUTS + list(fuzzed_inputs(500, 12)):
+            headers = self.headers(text)
+            self.assertEqual(list(find_headers(self.lexer, text)), headers, repr(text))
+            self.assertEqual(list(find_headers(scanner, text)), headers, repr(text))
+
+    def test_headers_need_root_state(self):
+        from pygments_openssl.sections import SectionIndex
+        for text in ['x = a \n[a]\n', 'x = a # \\\n[a]\n', 'x = ${\n[a]\n',
+                     "x = 'a\n[a]\n'\n", '.include "\n[a]\n"\n', 'x [a]\n']:
+            self.assertEqual([(s.offset, s.header) for s in SectionIndex(text)],
+                             self.headers(text), repr(text))
+
+    def test_resync(self):
+        from pygments_openssl.sections import resync
+        text = u'x = "a \\\n[a]"\n[b] y\n'
+        self.assertEqual(resync(self.lexer, text, 0), (text.index('[b'), []))
+        text = u'x \\\\[a]\ny = 1\n'
+        self.assertEqual(resync(self.lexer, text, 0), (text.index('y'), [(4, '[a]')]))
+        self.assertEqual(resync(self.lexer, u'x = "a', 0), (6, []))
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import sphinx
+except ImportError:
+    sphinx = None
+
+PAGE = '''\
+Page %(i)d
+=======
+
+.. code-block:: openssl
+
+   [ ca ]
+   default_ca = CA_%(i)d    # The default CA
+
+.. code-block:: openssl
+
+   dir = /etc/ssl
+   certs = $dir/certs_%(i)d
+
+.. code-block:: python
+
+   x = %(i)d
+'''
+
+
+@unittest.skipIf(sphinx is None, 'requires Sphinx')
+class SphinxExtensionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.srcdir = os.path.join(self.tempdir, 'src')
+        os.mkdir(self.srcdir)
+        with open(os.path.join(self.srcdir, 'conf.py'), 'w') as f:
+            f.write("extensions = ['pygments_openssl.sphinxext']\n")
+        pages = ['page%d' % i for i in range(4)]
+        with open(os.path.join(self.srcdir, 'index.rst'), 'w') as f:
+            f.write('Index\n=====\n\n.. toctree::\n\n%s\n' % ''.join('   %s\n' % p for p in pages))
+        for i, page in enumerate(pages):
+            with open(os.path.join(self.srcdir, page + '.rst'), 'w') as f:
+                f.write(PAGE % dict(i=i))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def build(self, outdir='out', parallel=0, **overrides):
+        from io import StringIO
+        from sphinx.application import Sphinx
+        outdir = os.path.join(self.tempdir, outdir)
+        app = Sphinx(self.srcdir, self.srcdir, os.path.join(outdir, 'html'),
+                     os.path.join(outdir, 'doctrees'), 'html', confoverrides=overrides,
+                     status=StringIO(), warning=StringIO(), parallel=parallel)
+        app.build(force_all=True)
+        return app
+
+    def read(self, outdir, page):
+        with open(os.path.join(self.tempdir, outdir, 'html', page + '.html')) as f:
+            return f.read()
+
+    def test_hits(self):
+        app = self.build()
+        self.assertEqual(app.openssl_highlight_cache.info()['hits'], 0)
+        self.assertEqual(app.openssl_highlight_cache.info()['misses'], 8)
+        app = self.build()
+        self.assertEqual(app.openssl_highlight_cache.info()['hits'], 8)
+        self.assertEqual(app.openssl_highlight_cache.info()['misses'], 0)
+        self.assertTrue('hit rate' in app._status.getvalue())
+
+    def test_same_output(self):
+        self.build('cached')
+        self.build('cached')
+        self.build('plain', openssl_highlight_cache=False)
+        for page in ('page0', 'page3'):
+            self.assertEqual(self.read('cached', page), self.read('plain', page))
+
+    def test_options_in_key(self):
+        self.build()
+        app = self.build(pygments_style='friendly')
+        self.assertEqual(app.openssl_highlight_cache.info()['misses'], 8)
+
+    def test_changed_block(self):
+        self.build()
+        with open(os.path.join(self.srcdir, 'page0.rst'), 'a') as f:
+            f.write('\n.. code-block:: openssl\n\n   new = block\n')
+        app = self.build()
+        self.assertEqual(app.openssl_highlight_cache.info()['hits'], 8)
+        self.assertEqual(app.openssl_highlight_cache.info()['misses'], 1)
+
+    @unittest.skipIf(not hasattr(os, 'fork'), 'requires fork')
+    def test_parallel(self):
+        from pygments_openssl.sphinxext import JOURNALS
+        app = self.build(parallel=2)
+        self.assertEqual(app.openssl_highlight_cache.info()['misses'], 8)
+        app = self.build(parallel=2)
+        self.assertEqual(app.openssl_highlight_cache.info()['hits'], 8)
+        journals = os.path.join(self.tempdir, 'out', 'doctrees', JOURNALS)
+        self.assertFalse(os.path.isdir(journals) and os.listdir(journals))
+
+    def test_maxsize(self):
+        app = self.build(openssl_highlight_cache_size=3)
+        self.assertEqual(app.openssl_highlight_cache.info()['currsize'], 3)
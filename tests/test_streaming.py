@@ -0,0 +1,66 @@
+import io
+import random
+import unittest
+
+from tests.test_scanner import fuzzed_inputs
+
+
+def split(text, rand, count):
+    cuts = sorted(rand.randint(0, len(text)) for i in range(count))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+class StreamLexerTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def test_chunks(self):
+        from pygments_openssl.streaming import StreamLexer
+        rand = random.Random(42)
+        for text in fuzzed_inputs(300, 42):
+            text = text + '\n' + text
+            self.assertEqual(
+                list(StreamLexer().get_tokens_unprocessed(split(text, rand, 10))),
+                list(self.lexer.get_tokens_unprocessed(text)), repr(text))
+
+    def test_scanner_lexer(self):
+        from pygments_openssl.scanner import OpenSSLConfScannerLexer
+        from pygments_openssl.streaming import StreamLexer
+        rand = random.Random(42)
+        stream = StreamLexer(OpenSSLConfScannerLexer())
+        for text in fuzzed_inputs(100, 7):
+            self.assertEqual(
+                list(stream.get_tokens_unprocessed(split(text, rand, 10))),
+                list(self.lexer.get_tokens_unprocessed(text)), repr(text))
+
+    def test_file_objects(self):
+        from pygments_openssl.streaming import StreamLexer
+        text = u''.join(fuzzed_inputs(100, 42))
+        expected = [(t, v) for i, t, v in self.lexer.get_tokens_unprocessed(text)]
+        stream = StreamLexer(chunksize=10)
+        self.assertEqual(list(stream.get_tokens(io.StringIO(text))), expected)
+        self.assertEqual(list(stream.get_tokens(io.BytesIO(text.encode('utf-8')))), expected)
+
+    def test_multiline_constructs(self):
+        from pygments_openssl.streaming import StreamLexer
+        text = 'a = "b\nc" \\\nd = ${e\n}\nf = g\n'
+        for size in range(1, len(text)):
+            chunks = [text[i:i+size] for i in range(0, len(text), size)]
+            self.assertEqual(
+                list(StreamLexer().get_tokens_unprocessed(chunks)),
+                list(self.lexer.get_tokens_unprocessed(text)))
+
+    def test_tokens_are_yielded_early(self):
+        from pygments_openssl.streaming import StreamLexer
+        consumed = []
+
+        def chunks():
+            for i in range(1000):
+                consumed.append(i)
+                yield 'key%d = value%d\n' % (i, i)
+
+        tokens = StreamLexer().get_tokens(chunks())
+        self.assertEqual(next(tokens)[1], 'key0')
+        self.assertTrue(len(consumed) < 5)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.test_scanner import fuzzed_inputs, INPUTS
+
+TEXT = u'''\
+# Comment
+HOME = .
+name = "Gr\u00fc\u00dfe
+[ not_a_section ]
+" \\
+continued
+[ ca ]
+dir = ${ENV::HOME
+}/ca
+x = 1
+'''
+
+
+class ViewportTests(unittest.TestCase):
+
+    def setUp(self):
+        from pygments_openssl.lexer import OpenSSLConfLexer
+        self.lexer = OpenSSLConfLexer()
+
+    def expected(self, text, first, last):
+        # Lex everything and cut out the lines
+        from pygments_openssl.lexer import merge_tokens
+        from pygments_openssl.viewport import cut_tokens, skip_lines
+        start = skip_lines(text, 0, first - 1)
+        end = skip_lines(text, start, last - first + 1)
+        return list(merge_tokens(cut_tokens(self.lexer.scan(text, 0, ['root']), start, end)))
+
+    def test_root_lines(self):
+        from pygments_openssl.viewport import root_lines
+        self.assertEqual([line for line, offset in root_lines(self.lexer, TEXT)], [1, 2, 3, 7, 8, 10])
+        for line, offset in root_lines(self.lexer, TEXT):
+            self.assertEqual(TEXT.count('\n', 0, offset), line - 1)
+
+    def test_get_line_tokens(self):
+        from pygments.token import Keyword, String
+        tokens = list(self.lexer.get_line_tokens(TEXT, 4, 4))
+        self.assertEqual(tokens, [(TEXT.index('[ not'), String.Double, u'[ not_a_section ]\n')])
+        tokens = list(self.lexer.get_line_tokens(TEXT, 7, 7))
+        self.assertEqual(tokens[0], (TEXT.index('[ ca'), Keyword, u'[ ca ]'))
+
+    def test_ranges(self):
+        from pygments_openssl.viewport import LineIndex
+        for text in [TEXT] + INPUTS + list(fuzzed_inputs(300, 21)):
+            lines = text.count('\n') + 1
+            index = LineIndex.build(text, self.lexer, every=2)
+            for first in range(1, lines + 1):
+                for last in (first, first + 2):
+                    expected = self.expected(text, first, last)
+                    self.assertEqual(list(self.lexer.get_line_tokens(text, first, last)), expected)
+                    self.assertEqual(list(self.lexer.get_line_tokens(text, first, last, index)), expected)
+
+    def test_index(self):
+        from pygments_openssl.viewport import LineIndex
+        index = LineIndex.build(TEXT, self.lexer, every=4)
+        self.assertEqual(index.lines, [1, 7])
+        self.assertEqual(index.offsets, [0, TEXT.index('[ ca')])
+        self.assertEqual(index.nearest(6), (1, 0))
+        self.assertEqual(index.nearest(9), (7, TEXT.index('[ ca')))
+        self.assertEqual(LineIndex.build(u'').nearest(5), (1, 0))
+
+    def test_save_and_load(self):
+        from pygments_openssl.viewport import LineIndex
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'openssl.cnf.idx')
+            LineIndex.build(TEXT, self.lexer, every=4).save(path)
+            index = LineIndex.load(path, TEXT)
+            self.assertEqual((index.lines, index.every), ([1, 7], 4))
+            self.assertEqual(LineIndex.load(path, TEXT + u'y = 2\n'), None)
+            self.assertEqual(LineIndex.load(path, TEXT.replace(u'HOME', u'ROOT')), None)
+            self.assertEqual(LineIndex.load(os.path.join(tempdir, 'missing')), None)
+        finally:
+            shutil.rmtree(tempdir)